@@ -0,0 +1,199 @@
+import sys
+import os
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import datetime
+import pandas as pd
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+# Add analysis directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.data_processing import load_data, clean_data, feature_engineering
+from analysis.insights import (
+    get_product_profitability,
+    get_division_performance,
+    get_pareto_data,
+    get_monthly_trends,
+    get_state_performance,
+    get_cost_breakdown,
+    get_customer_profitability
+)
+from analysis.forecasting import generate_forecast
+from analysis.scenario import run_scenario
+from analysis.report_generator import generate_report_stats
+from analysis.synthetic import generate_orders, fit_order_profile
+
+DEFAULT_SIZES = (100_000, 1_000_000, 10_000_000, 100_000_000)
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "nassau_benchmarks")
+
+INSIGHT_FUNCTIONS = [
+    get_product_profitability,
+    get_division_performance,
+    get_pareto_data,
+    get_monthly_trends,
+    get_state_performance,
+    get_cost_breakdown,
+    get_customer_profitability
+]
+
+
+def measure(func: Callable[[], Any], profile_memory: bool = True) -> Dict[str, Any]:
+    """
+    Times one call of func and, optionally, a second call under tracemalloc for its peak allocation.
+
+    The timed call runs without tracing so the tracing overhead does not distort the wall time.
+
+    Args:
+        func (Callable[[], Any]): The stage to run. Must be safe to call twice.
+        profile_memory (bool): Also record the peak traced allocation.
+
+    Returns:
+        Dict[str, Any]: 'Seconds', 'Peak MB' (NaN when not profiled) and 'Result' (the timed call's return value).
+    """
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+
+    peak_mb = float('nan')
+    if profile_memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+    return {'Seconds': seconds, 'Peak MB': peak_mb, 'Result': result}
+
+
+def benchmark_size(path: str, n_rows: int, profile_memory: bool = True) -> List[Dict[str, Any]]:
+    """
+    Runs every pipeline and analysis stage on one order file.
+
+    Args:
+        path (str): The order CSV.
+        n_rows (int): Its row count, recorded with each result.
+        profile_memory (bool): Record peak allocation per stage.
+
+    Returns:
+        List[Dict[str, Any]]: One record per stage.
+    """
+    records = []
+
+    def _run(stage: str, func: Callable[[], Any]) -> Any:
+        outcome = measure(func, profile_memory)
+        records.append({'Rows': n_rows, 'Stage': stage, 'Seconds': outcome['Seconds'], 'Peak MB': outcome['Peak MB']})
+        print(f"{n_rows:>12,} rows | {stage:<28} | {outcome['Seconds']:9.3f}s | {outcome['Peak MB']:10.1f} MB")
+        return outcome['Result']
+
+    # clean_data and feature_engineering modify their input, so each call gets its own copy
+    raw = _run('load_data', lambda: load_data(path))
+    cleaned = _run('clean_data', lambda: clean_data(raw.copy()))
+    df = _run('feature_engineering', lambda: feature_engineering(cleaned.copy()))
+    del raw, cleaned
+
+    for func in INSIGHT_FUNCTIONS:
+        _run(func.__name__, lambda func=func: func(df))
+    _run('generate_forecast', lambda: generate_forecast(df, periods=6))
+    _run('run_scenario', lambda: run_scenario(df, 5.0, 5.0, 2.0))
+    del df
+
+    # The report stage includes its own load and pipeline; a fresh snapshot directory keeps it cold
+    with tempfile.TemporaryDirectory() as scratch:
+        def _report():
+            cache_dir = os.path.join(scratch, f"cache-{time.perf_counter_ns()}")
+            generate_report_stats(data_path=path, output_path=os.path.join(scratch, "report_stats.txt"), cache_dir=cache_dir)
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        _run('generate_report_stats', _report)
+    return records
+
+
+def run_benchmark_suite(sizes: Sequence[int] = DEFAULT_SIZES, output_path: Optional[str] = None,
+                        data_dir: Optional[str] = None, profile_memory: bool = True, seed: int = 0) -> Dict[str, Any]:
+    """
+    Generates (or reuses) a synthetic order file per size, benchmarks every stage on it and saves the results as JSON.
+
+    Args:
+        sizes (Sequence[int]): Row counts to benchmark.
+        output_path (Optional[str]): JSON destination. Defaults to a timestamped file in data_dir.
+        data_dir (Optional[str]): Where synthetic files and results are kept. Defaults to the system temp dir.
+        profile_memory (bool): Record peak allocation per stage (runs every stage twice).
+        seed (int): Generator seed, so the same sizes always produce the same files.
+
+    Returns:
+        Dict[str, Any]: The saved document: environment metadata and one result record per (size, stage).
+    """
+    data_dir = data_dir or DEFAULT_DATA_DIR
+    os.makedirs(data_dir, exist_ok=True)
+    profile = fit_order_profile()
+
+    results = []
+    for n_rows in sizes:
+        path = os.path.join(data_dir, f"orders-{n_rows}-seed{seed}.csv")
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            generate_orders(path, n_rows, seed=seed, profile=profile)
+            print(f"Generated {n_rows:,} rows in {time.perf_counter() - start:.1f}s -> {path}")
+        results.extend(benchmark_size(path, n_rows, profile_memory))
+
+    document = {
+        'Created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'Environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'Seed': seed,
+        'Results': results,
+    }
+    output_path = output_path or os.path.join(data_dir, f"benchmark-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output_path, "w") as f:
+        json.dump(document, f, indent=2, default=float)
+    print(f"Results saved to {output_path}")
+    return document
+
+
+def compare_results(baseline: Union[str, Dict[str, Any]], candidate: Union[str, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Compares two benchmark runs stage by stage.
+
+    Args:
+        baseline (Union[str, Dict[str, Any]]): JSON path or document from an earlier run.
+        candidate (Union[str, Dict[str, Any]]): JSON path or document from the run to evaluate.
+
+    Returns:
+        pd.DataFrame: Seconds and Peak MB of both runs with candidate/baseline ratios, for the (size, stage) pairs
+        present in both.
+    """
+    def _load(run: Union[str, Dict[str, Any]]) -> pd.DataFrame:
+        if isinstance(run, str):
+            with open(run) as f:
+                run = json.load(f)
+        return pd.DataFrame(run['Results']).set_index(['Rows', 'Stage'])
+
+    merged = _load(baseline).join(_load(candidate), lsuffix=' (baseline)', rsuffix=' (candidate)', how='inner')
+    merged['Time Ratio'] = merged['Seconds (candidate)'] / merged['Seconds (baseline)']
+    merged['Memory Ratio'] = merged['Peak MB (candidate)'] / merged['Peak MB (baseline)']
+    return merged.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis package on synthetic order files.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Row counts to benchmark.")
+    parser.add_argument("--output", help="JSON results file.")
+    parser.add_argument("--data-dir", help="Directory for synthetic files and results.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc profiling (halves the run time).")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against.")
+    args = parser.parse_args()
+
+    document = run_benchmark_suite(args.sizes, args.output, args.data_dir, profile_memory=not args.no_memory)
+    if args.compare:
+        print(compare_results(args.compare, document).to_string(index=False))
@@ -0,0 +1,385 @@
+import sys
+import os
+import time
+import tracemalloc
+import tempfile
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+# Add analysis directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.data_processing import (
+    load_data, clean_data, feature_engineering, apply_schema, memory_report, row_keys, row_uniforms, parse_dates,
+    DATE_FORMAT,
+    SIMULATED_CUSTOMER_IDS, SIMULATED_SEGMENTS, SIMULATED_SEGMENT_WEIGHTS, SIMULATED_CATEGORIES
+)
+from analysis.dates import DAY_KEY_COLUMN, MONTH_KEY_COLUMN, day_keys, month_keys, date_range_positions
+from analysis.insights import aggregate_dimensions, get_product_profitability, get_division_performance, get_monthly_trends
+from analysis.scenario import run_scenario
+from analysis.parallel import prepare_data_parallel
+from analysis.synthetic import generate_orders
+from analysis.topk import top_k, pareto_count, HeavyHitters
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "Nassau Candy Distributor.csv")
+
+
+def _feature_engineering_rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reference implementation of feature_engineering using the original per-row DataFrame.apply calls.
+
+    Kept only so the benchmark can prove the vectorized version is bit-identical and measure the speedup.
+
+    Args:
+        df (pd.DataFrame): The cleaned dataframe.
+
+    Returns:
+        pd.DataFrame: The dataframe with added features.
+    """
+    df['Gross Margin (%)'] = df.apply(lambda row: (row['Gross Profit'] / row['Sales'] * 100) if row['Sales'] != 0 else 0, axis=1)
+    df['Profit per Unit'] = df.apply(lambda row: (row['Gross Profit'] / row['Units']) if row['Units'] != 0 else 0, axis=1)
+
+    df[DAY_KEY_COLUMN] = day_keys(df['Order Date'])
+    df[MONTH_KEY_COLUMN] = month_keys(df['Order Date'])
+
+    u = row_uniforms(row_keys(df), 5)
+    df['Customer ID'] = [SIMULATED_CUSTOMER_IDS[min(int(x * 500), 499)] for x in u[:, 0]]
+    segment_bounds = np.cumsum(SIMULATED_SEGMENT_WEIGHTS)
+    df['Customer Segment'] = [SIMULATED_SEGMENTS[min(int(np.searchsorted(segment_bounds, x, side='right')), 3)] for x in u[:, 1]]
+    df['Product Category'] = [SIMULATED_CATEGORIES[min(int(x * 5), 4)] for x in u[:, 2]]
+
+    if 'Cost' in df.columns:
+        df['Manufacturing Cost'] = df['Cost'] * (0.65 + 0.10 * u[:, 3])
+        df['Shipping Cost'] = df['Cost'] * (0.15 + 0.10 * u[:, 4])
+        df['Overhead Cost'] = df['Cost'] - df['Manufacturing Cost'] - df['Shipping Cost']
+        df['Overhead Cost'] = df['Overhead Cost'].apply(lambda x: max(x, 0))
+
+    return apply_schema(df)
+
+
+def make_cleaned_sample(n_rows: int, base: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Builds a cleaned dataframe of n_rows by tiling the shipped order file.
+
+    Args:
+        n_rows (int): Number of rows to produce.
+        base (Optional[pd.DataFrame]): Cleaned source rows. Loaded from the shipped CSV if omitted.
+
+    Returns:
+        pd.DataFrame: A cleaned dataframe with a fresh RangeIndex and unique Row IDs.
+    """
+    if base is None:
+        base = clean_data(load_data(DATA_PATH))
+    reps = int(np.ceil(n_rows / len(base)))
+    idx = np.tile(np.arange(len(base)), reps)[:n_rows]
+    sample = base.iloc[idx].reset_index(drop=True)
+    # Unique keys so tiled copies get their own simulated values
+    sample['Row ID'] = np.arange(1, n_rows + 1, dtype=np.int32)
+    return sample
+
+
+def benchmark_feature_engineering(sizes: Sequence[int] = (10_000, 1_000_000, 10_000_000),
+                                  rowwise_max_rows: int = 1_000_000) -> List[Dict[str, float]]:
+    """
+    Times the vectorized feature_engineering against the row-wise reference and checks that outputs match exactly.
+
+    Args:
+        sizes (Sequence[int]): Row counts to benchmark.
+        rowwise_max_rows (int): Largest size for which the (slow) row-wise reference is also run.
+
+    Returns:
+        List[Dict[str, float]]: One record per size with timings in seconds and the speedup.
+    """
+    base = clean_data(load_data(DATA_PATH))
+    results = []
+    for n in sizes:
+        sample = make_cleaned_sample(n, base)
+
+        start = time.perf_counter()
+        fast = feature_engineering(sample.copy())
+        vectorized_s = time.perf_counter() - start
+
+        record = {'rows': n, 'vectorized_s': vectorized_s, 'rowwise_s': float('nan'), 'speedup': float('nan')}
+        if n <= rowwise_max_rows:
+            start = time.perf_counter()
+            slow = _feature_engineering_rowwise(sample.copy())
+            record['rowwise_s'] = time.perf_counter() - start
+            record['speedup'] = record['rowwise_s'] / vectorized_s
+            pd.testing.assert_frame_equal(fast, slow, check_exact=True)
+
+        results.append(record)
+        print(f"{n:>12,} rows | vectorized {vectorized_s:8.3f}s | row-wise {record['rowwise_s']:8.3f}s | speedup {record['speedup']:8.1f}x")
+    return results
+
+
+def benchmark_memory_schema(n_rows: int = 1_000_000) -> pd.DataFrame:
+    """
+    Reports the per-column memory footprint of the engineered table without and with the compact schema.
+
+    Args:
+        n_rows (int): Number of rows to build by tiling the shipped order file.
+
+    Returns:
+        pd.DataFrame: The memory_report comparison.
+    """
+    compact = feature_engineering(make_cleaned_sample(n_rows))
+    # Undo the schema: plain object strings, int64 and float64, as produced before it existed
+    plain = compact.copy()
+    for col in plain.columns:
+        if isinstance(plain[col].dtype, pd.CategoricalDtype):
+            plain[col] = plain[col].astype(object)
+        elif pd.api.types.is_integer_dtype(plain[col]):
+            plain[col] = plain[col].astype('int64')
+    report = memory_report(plain, compact)
+    print(report.to_string())
+    return report
+
+
+def _peak_allocation(func) -> float:
+    """Runs func and returns the peak traced allocation in MB."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_filtered_views(n_rows: int = 1_000_000, selectivity: float = 0.5) -> pd.DataFrame:
+    """
+    Compares peak allocation of one dashboard rerun on a filtered selection: copying the rows with df[mask]
+    versus passing the mask as a row selection over the base frame.
+
+    Both paths compute the same KPIs, product/division views, monthly trend and scenario.
+
+    Args:
+        n_rows (int): Number of rows to build by tiling the shipped order file.
+        selectivity (float): Approximate fraction of rows kept by the filter.
+
+    Returns:
+        pd.DataFrame: Peak MB and wall time per path.
+    """
+    df = feature_engineering(make_cleaned_sample(n_rows))
+    mask = (df['Gross Margin (%)'] >= df['Gross Margin (%)'].quantile(1 - selectivity)).to_numpy()
+
+    def materialized():
+        filtered = df[mask]
+        aggregates = aggregate_dimensions(filtered, ['Product Name', 'Division'])
+        get_product_profitability(filtered, aggregates)
+        get_division_performance(filtered, aggregates)
+        get_monthly_trends(filtered)
+        run_scenario(filtered, 5.0, 5.0, 2.0)
+
+    def row_selection():
+        aggregates = aggregate_dimensions(df, ['Product Name', 'Division'], rows=mask)
+        get_product_profitability(df, aggregates, rows=mask)
+        get_division_performance(df, aggregates, rows=mask)
+        get_monthly_trends(df, rows=mask)
+        run_scenario(df, 5.0, 5.0, 2.0, rows=mask)
+
+    results = []
+    for name, func in [('df[mask] copy', materialized), ('row selection', row_selection)]:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        results.append({'Path': name, 'Rows Selected': int(mask.sum()), 'Peak MB': _peak_allocation(func), 'Seconds': elapsed})
+
+    report = pd.DataFrame(results)
+    report['Peak Reduction (%)'] = 100 * (1 - report['Peak MB'] / report['Peak MB'].iloc[0])
+    print(report.to_string(index=False))
+    return report
+
+
+def benchmark_date_parsing(n_rows: int = 10_000_000, invalid_fraction: float = 0.001) -> pd.DataFrame:
+    """
+    Times per-row pd.to_datetime against parse_dates on a tiled Order Date column and checks that the results
+    (including coerced NaT values for malformed strings) are identical.
+
+    Args:
+        n_rows (int): Number of date strings to parse.
+        invalid_fraction (float): Share of values replaced with malformed dates or missing values.
+
+    Returns:
+        pd.DataFrame: Seconds and speedup per path: the per-row parse, parse_dates on plain strings
+        (factorized first) and parse_dates on the categorical column load_data now reads.
+    """
+    raw = pd.read_csv(DATA_PATH, usecols=['Order Date'], dtype=str)['Order Date'].to_numpy(dtype=object)
+    values = np.resize(raw, n_rows)
+    rng = np.random.default_rng(0)
+    bad = rng.random(n_rows) < invalid_fraction
+    values[bad] = rng.choice(np.array(['31-02-2024', '2024/01/05', 'n/a', None], dtype=object), size=int(bad.sum()))
+    strings = pd.Series(values, name='Order Date')
+    categorical = strings.astype('category')
+
+    paths = [
+        ('pd.to_datetime per row', lambda: pd.to_datetime(strings, format=DATE_FORMAT, errors='coerce')),
+        ('parse_dates (strings)', lambda: parse_dates(strings)),
+        ('parse_dates (categorical)', lambda: parse_dates(categorical)),
+    ]
+    results, expected = [], None
+    for name, func in paths:
+        start = time.perf_counter()
+        parsed = func()
+        results.append({'Path': name, 'Rows': n_rows, 'Seconds': time.perf_counter() - start})
+        if expected is None:
+            expected = parsed
+        else:
+            pd.testing.assert_series_equal(parsed, expected, check_exact=True)
+
+    report = pd.DataFrame(results)
+    report['Speedup'] = report['Seconds'].iloc[0] / report['Seconds']
+    print(report.to_string(index=False))
+    return report
+
+
+def benchmark_date_filter(n_rows: int = 10_000_000, window_days: int = 90, repeats: int = 5) -> pd.DataFrame:
+    """
+    Compares the full-column date comparisons and per-row Period conversion the dashboard used to run on every
+    rerun against the searchsorted range lookup and the precomputed month keys, and checks the results match.
+
+    Args:
+        n_rows (int): Number of rows to build by tiling the shipped order file (sorted by Order Date, as
+            clean_data leaves it).
+        window_days (int): Length of the filtered date range, ending at the last order date.
+        repeats (int): Calls timed per path; the mean is reported.
+
+    Returns:
+        pd.DataFrame: Mean milliseconds per call and speedup for the range filter and the monthly trend.
+    """
+    sample = make_cleaned_sample(n_rows).sort_values(by='Order Date', kind='stable', ignore_index=True)
+    df = feature_engineering(sample)
+    end_date = df['Order Date'].max()
+    start_date = end_date - pd.Timedelta(days=window_days - 1)
+
+    def comparison_mask():
+        return ((df['Order Date'] >= start_date) & (df['Order Date'] <= end_date)).to_numpy()
+
+    def range_lookup():
+        return date_range_positions(df, start_date, end_date)
+
+    def period_trend():
+        months = df['Order Date'].dt.to_period('M').rename('Month')
+        monthly = df[['Sales', 'Gross Profit']].groupby(months).sum().reset_index()
+        monthly['Month'] = monthly['Month'].astype(str)
+        return monthly
+
+    def key_trend():
+        return get_monthly_trends(df)
+
+    def _mean_ms(func):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = func()
+        return (time.perf_counter() - start) * 1000 / repeats, result
+
+    mask_ms, mask = _mean_ms(comparison_mask)
+    lookup_ms, (lo, hi) = _mean_ms(range_lookup)
+    expected = np.zeros(len(df), dtype=bool)
+    expected[lo:hi] = True
+    assert np.array_equal(mask, expected), "searchsorted range differs from the comparison mask"
+
+    period_ms, by_period = _mean_ms(period_trend)
+    keys_ms, by_key = _mean_ms(key_trend)
+    np.testing.assert_array_equal(by_period['Month'].to_numpy(), by_key['Month'].to_numpy())
+    np.testing.assert_allclose(by_period['Sales'].to_numpy(), by_key['Sales'].to_numpy(), rtol=1e-12)
+
+    report = pd.DataFrame([
+        {'Operation': 'date range filter', 'Before ms': mask_ms, 'After ms': lookup_ms},
+        {'Operation': 'monthly trend', 'Before ms': period_ms, 'After ms': keys_ms},
+    ])
+    report['Speedup'] = report['Before ms'] / report['After ms']
+    print(report.to_string(index=False))
+    return report
+
+
+def benchmark_top_k(n_rows: int = 10_000_000, n_keys: int = 1_000_000, k: int = 20,
+                    capacity: int = 50_000) -> pd.DataFrame:
+    """
+    Answers "top k keys by profit" and "how many keys make up 80% of profit" over Zipf-distributed order lines
+    (one SKU x customer key each) three ways: group and fully sort, group and use top_k / pareto_count, and
+    stream the lines through a HeavyHitters sketch in 1M-row chunks.
+
+    Args:
+        n_rows (int): Number of order lines.
+        n_keys (int): Number of distinct SKU x customer keys.
+        k (int): Number of top keys to return.
+        capacity (int): Counters kept by the sketch.
+
+    Returns:
+        pd.DataFrame: Seconds, speedup, Pareto count and whether the top k match the full sort, per path.
+    """
+    rng = np.random.default_rng(0)
+    keys = np.minimum(rng.zipf(1.2, n_rows), n_keys) - 1
+    profit = rng.gamma(2.0, 5.0, n_rows)
+
+    def full_sort():
+        totals = pd.Series(profit).groupby(keys).sum().sort_values(ascending=False)
+        cumulative = 100 * totals.cumsum() / totals.sum()
+        return totals.index[:k].to_numpy(), int((cumulative <= 80).sum())
+
+    def partial():
+        totals = pd.Series(profit).groupby(keys).sum()
+        return totals.index[top_k(totals.to_numpy(), k)].to_numpy(), pareto_count(totals, 80)
+
+    def sketch():
+        hitters = HeavyHitters(capacity)
+        for start in range(0, n_rows, 1_000_000):
+            hitters.update(keys[start:start + 1_000_000], profit[start:start + 1_000_000])
+        return hitters.top(k)['Key'].to_numpy(), hitters.pareto_count(80)
+
+    results, expected = [], None
+    for name, func in [('Full sort', full_sort), ('top_k + pareto_count', partial), ('HeavyHitters sketch', sketch)]:
+        start = time.perf_counter()
+        top, count = func()
+        seconds = time.perf_counter() - start
+        if expected is None:
+            expected = top
+        results.append({'Path': name, 'Rows': n_rows, 'Seconds': seconds, 'Pareto Count': count,
+                        'Top k Match': bool(np.array_equal(np.sort(top), np.sort(expected)))})
+
+    report = pd.DataFrame(results)
+    report['Speedup'] = report['Seconds'].iloc[0] / report['Seconds']
+    print(report.to_string(index=False))
+    return report
+
+
+def benchmark_parallel_pipeline(n_rows: int = 50_000_000, workers: Sequence[int] = (1, 2, 4, 8),
+                                path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Times the byte-range partitioned pipeline on a synthetic order file for an increasing number of processes.
+
+    Args:
+        n_rows (int): Rows in the synthetic order file (generated once, reused when path already exists).
+        workers (Sequence[int]): Process counts to time.
+        path (Optional[str]): Where to keep the synthetic CSV. Defaults to the system temp dir.
+
+    Returns:
+        pd.DataFrame: Seconds, rows per second and speedup over one process, per process count.
+    """
+    path = path or os.path.join(tempfile.gettempdir(), f"nassau_orders_{n_rows}.csv")
+    if not os.path.exists(path):
+        generate_orders(path, n_rows)
+
+    results = []
+    for n in workers:
+        start = time.perf_counter()
+        df = prepare_data_parallel(path, max_workers=n)
+        elapsed = time.perf_counter() - start
+        results.append({'Workers': n, 'Rows': len(df), 'Seconds': elapsed, 'Rows/s': len(df) / elapsed})
+        del df
+
+    report = pd.DataFrame(results)
+    report['Speedup'] = report['Seconds'].iloc[0] / report['Seconds']
+    print(report.to_string(index=False))
+    return report
+
+
+if __name__ == "__main__":
+    benchmark_feature_engineering()
+    benchmark_memory_schema()
+    benchmark_filtered_views()
+    benchmark_date_parsing()
+    benchmark_date_filter()
+    benchmark_top_k()
+    benchmark_parallel_pipeline()
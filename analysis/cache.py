@@ -0,0 +1,117 @@
+import threading
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+
+def normalize_filter_state(start_date, end_date, divisions: Optional[Sequence] = None,
+                           categories: Optional[Sequence] = None, segments: Optional[Sequence] = None,
+                           margin_threshold: Optional[float] = None, search_term: str = "") -> Tuple:
+    """
+    Turns dashboard filter widgets into a hashable, order-independent cache key.
+
+    Args:
+        start_date: Start of the date range.
+        end_date: End of the date range.
+        divisions (Optional[Sequence]): Selected divisions.
+        categories (Optional[Sequence]): Selected product categories.
+        segments (Optional[Sequence]): Selected customer segments.
+        margin_threshold (Optional[float]): Minimum Gross Margin (%) filter.
+        search_term (str): Product search text (case-insensitive, surrounding whitespace ignored).
+
+    Returns:
+        Tuple: The normalized filter state.
+    """
+    def _members(values):
+        return None if values is None else tuple(sorted(str(v) for v in values))
+
+    return (
+        None if start_date is None else pd.Timestamp(start_date).isoformat(),
+        None if end_date is None else pd.Timestamp(end_date).isoformat(),
+        _members(divisions),
+        _members(categories),
+        _members(segments),
+        None if margin_threshold is None else round(float(margin_threshold), 6),
+        (search_term or "").strip().lower(),
+    )
+
+
+class LRUCache:
+    """
+    Thread-safe memo store with bounded LRU eviction and hit/miss counters.
+
+    Entries are keyed by (name, key) so one cache can serve every dashboard computation.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, name: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for (name, key), computing and storing it on a miss.
+
+        Args:
+            name (str): The computation name, e.g. 'product_stats'.
+            key (Hashable): The normalized inputs, e.g. from normalize_filter_state.
+            compute (Callable[[], Any]): Produces the value on a miss.
+
+        Returns:
+            Any: The cached or freshly computed value.
+        """
+        full_key = (name, key)
+        with self._lock:
+            if full_key in self._entries:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return self._entries[full_key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[full_key] = value
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def discard(self, name: str, key: Hashable) -> None:
+        """
+        Drops one entry, e.g. a cached export path whose file has been removed, so the next lookup recomputes it.
+
+        Args:
+            name (str): The computation name.
+            key (Hashable): The normalized inputs.
+        """
+        with self._lock:
+            self._entries.pop((name, key), None)
+
+    def clear(self) -> None:
+        """Drops every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            Dict[str, Any]: Entries, capacity, hits, misses, evictions and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'Entries': len(self._entries),
+                'Capacity': self.max_entries,
+                'Hits': self.hits,
+                'Misses': self.misses,
+                'Evictions': self.evictions,
+                'Hit Rate (%)': 100 * self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,137 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+from analysis.instrumentation import instrument
+from analysis.scenario import costed_measures
+
+# Grain of the cube. Every dashboard filter except the margin threshold maps to one of these.
+CUBE_DIMENSIONS = [
+    'Order Date', 'Division', 'Product Category', 'Customer Segment',
+    'Product Name', 'State/Province', 'Customer ID'
+]
+# Additive measures copied from the order table. 'Gross Margin Sum' and 'Row Count' are added on build
+# so the row-level average margin can be rebuilt, and the 'Costed ...' measures of costed_measures so
+# scenarios and risk leave incompletely costed rows out as they do on the raw rows.
+CUBE_MEASURES = [
+    'Sales', 'Gross Profit', 'Units', 'Cost',
+    'Manufacturing Cost', 'Shipping Cost', 'Overhead Cost'
+]
+
+
+class ProfitCube:
+    """
+    Pre-aggregated cube of additive measures at (day, division, category, segment, product, state, customer) grain.
+
+    Cube rows carry the same column names as the order table, so every additive insight
+    (get_product_profitability, get_monthly_trends, get_cost_breakdown, generate_forecast, run_scenario, ...)
+    returns the same result on a cube slice as on the matching raw rows.
+
+    The margin threshold filter is row-level and cannot be answered from the cube: once a threshold excludes
+    any order, callers must fall back to filtering the raw rows (see can_answer).
+    """
+
+    def __init__(self, cells: pd.DataFrame, min_row_margin: float):
+        self.cells = cells
+        self.min_row_margin = min_row_margin
+        self._days = cells['Order Date'].to_numpy()
+
+    @classmethod
+    @instrument(name='ProfitCube.from_frame')
+    def from_frame(cls, df: pd.DataFrame) -> "ProfitCube":
+        """
+        Builds the cube from the cleaned and engineered order table.
+
+        Args:
+            df (pd.DataFrame): The engineered dataframe.
+
+        Returns:
+            ProfitCube: The cube, with cells sorted by day.
+        """
+        dims = [d for d in CUBE_DIMENSIONS if d in df.columns]
+        measures = [m for m in CUBE_MEASURES if m in df.columns]
+
+        source = df[dims + measures].copy()
+        source['Order Date'] = source['Order Date'].dt.normalize()
+        source['Gross Margin Sum'] = df['Gross Margin (%)'] if 'Gross Margin (%)' in df.columns else 0.0
+        source['Row Count'] = 1
+        for name, values in costed_measures(df).items():
+            source[name] = values
+
+        cells = source.groupby(dims, observed=True, sort=False).sum().reset_index()
+        cells.sort_values(by='Order Date', kind='stable', inplace=True, ignore_index=True)
+
+        min_row_margin = float(df['Gross Margin (%)'].min()) if 'Gross Margin (%)' in df.columns and not df.empty else float('nan')
+        return cls(cells, min_row_margin)
+
+    def can_answer(self, margin_threshold: Optional[float] = None) -> bool:
+        """
+        Returns True if a filter with this margin threshold can be served from the cube.
+
+        Args:
+            margin_threshold (Optional[float]): The minimum row-level Gross Margin (%) filter, if any.
+
+        Returns:
+            bool: False when the threshold would exclude at least one order row.
+        """
+        return margin_threshold is None or margin_threshold <= self.min_row_margin
+
+    @instrument(name='ProfitCube.slice')
+    def slice(self, start_date=None, end_date=None, members: Optional[Dict[str, Sequence]] = None) -> pd.DataFrame:
+        """
+        Returns the cube cells matching a date range and per-dimension member lists.
+
+        The date range is located with a binary search over the sorted day column.
+
+        Args:
+            start_date: Inclusive start date, or None for no lower bound.
+            end_date: Inclusive end date, or None for no upper bound.
+            members (Optional[Dict[str, Sequence]]): Allowed values per dimension. A value of None means
+                "no filter" for that dimension; an empty list matches nothing.
+
+        Returns:
+            pd.DataFrame: The matching cells, with the order table's column names.
+        """
+        lo = 0 if start_date is None else np.searchsorted(self._days, np.datetime64(pd.Timestamp(start_date)), side='left')
+        hi = len(self._days) if end_date is None else np.searchsorted(self._days, np.datetime64(pd.Timestamp(end_date)), side='right')
+        view = self.cells.iloc[lo:hi]
+
+        mask = np.ones(len(view), dtype=bool)
+        for dim, values in (members or {}).items():
+            if dim in view.columns and values is not None:
+                mask &= view[dim].isin(values).to_numpy()
+        return view[mask]
+
+    @staticmethod
+    def rollup(cells: pd.DataFrame, dims: Sequence[str]) -> pd.DataFrame:
+        """
+        Rolls cube cells up to a coarser grain.
+
+        Args:
+            cells (pd.DataFrame): Cube cells, e.g. from slice.
+            dims (Sequence[str]): The dimensions to keep.
+
+        Returns:
+            pd.DataFrame: One row per combination of dims with all measures summed.
+        """
+        measures = [c for c in cells.columns if c not in CUBE_DIMENSIONS]
+        return cells.groupby(list(dims), observed=True)[measures].sum().reset_index()
+
+    @staticmethod
+    def kpis(cells: pd.DataFrame) -> Dict[str, float]:
+        """
+        Returns the dashboard headline metrics for a set of cube cells.
+
+        Args:
+            cells (pd.DataFrame): Cube cells, e.g. from slice.
+
+        Returns:
+            Dict[str, float]: Total Sales, Total Profit, Total Units and Avg Margin (mean of row-level margins).
+        """
+        rows = cells['Row Count'].sum()
+        return {
+            'Total Sales': cells['Sales'].sum(),
+            'Total Profit': cells['Gross Profit'].sum(),
+            'Total Units': cells['Units'].sum(),
+            'Avg Margin': cells['Gross Margin Sum'].sum() / rows if rows else float('nan')
+        }
@@ -1,8 +1,102 @@
 import pandas as pd
 import numpy as np
 import os
-from typing import Optional
+from typing import Iterator, Optional
 
+from analysis.dates import DAY_KEY_COLUMN, MONTH_KEY_COLUMN, day_keys, month_keys
+from analysis.instrumentation import instrument, report_error
+
+# Bump whenever clean_data or feature_engineering change their output so persisted snapshots are invalidated
+PIPELINE_VERSION = 5
+
+# --- Declared column schema ---
+# Low-cardinality strings are read straight into categoricals.
+CATEGORICAL_COLUMNS = [
+    'Ship Mode', 'Country/Region', 'City', 'State/Province', 'Postal Code',
+    'Division', 'Region', 'Product ID', 'Product Name'
+]
+# Simulated in feature_engineering
+SIMULATED_CATEGORICAL_COLUMNS = ['Customer ID', 'Customer Segment', 'Product Category']
+# Integer columns are downcast after clean_data has dropped missing values (read_csv cannot
+# parse NaN into a plain int32). Monetary columns stay float64: float32 only keeps ~7
+# significant digits, which visibly drifts cent-level totals once millions of rows are summed.
+INTEGER_COLUMNS = {'Row ID': 'int32', 'Units': 'int32', DAY_KEY_COLUMN: 'int32', MONTH_KEY_COLUMN: 'int32'}
+FLOAT_COLUMNS = {
+    'Sales': 'float64', 'Gross Profit': 'float64', 'Cost': 'float64',
+    'Gross Margin (%)': 'float64', 'Profit per Unit': 'float64',
+    'Manufacturing Cost': 'float64', 'Shipping Cost': 'float64', 'Overhead Cost': 'float64'
+}
+# Order and Ship Date are read as categoricals too: a few thousand distinct strings that parse_dates
+# decodes once each instead of once per row
+DATE_COLUMNS = ['Order Date', 'Ship Date']
+DATE_FORMAT = '%d-%m-%Y'
+READ_CSV_DTYPES = {col: 'category' for col in CATEGORICAL_COLUMNS + DATE_COLUMNS}
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Casts every declared column present in the dataframe to its compact dtype.
+
+    Args:
+        df (pd.DataFrame): A raw, cleaned or engineered dataframe.
+
+    Returns:
+        pd.DataFrame: The same dataframe with columns cast in place.
+    """
+    for col in CATEGORICAL_COLUMNS + SIMULATED_CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col, dtype in {**INTEGER_COLUMNS, **FLOAT_COLUMNS}.items():
+        if col in df.columns and df[col].dtype != dtype and not df[col].isna().any():
+            df[col] = df[col].astype(dtype)
+    return df
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compares the per-column memory footprint of two versions of the same table.
+
+    Args:
+        before (pd.DataFrame): The table with its original dtypes.
+        after (pd.DataFrame): The table with the compact schema applied.
+
+    Returns:
+        pd.DataFrame: Bytes and dtype per column before and after, plus a TOTAL row.
+    """
+    report = pd.DataFrame({
+        'Dtype Before': before.dtypes.astype(str),
+        'Bytes Before': before.memory_usage(index=False, deep=True),
+        'Dtype After': after.dtypes.astype(str),
+        'Bytes After': after.memory_usage(index=False, deep=True),
+    })
+    report.loc['TOTAL'] = ['', report['Bytes Before'].sum(), '', report['Bytes After'].sum()]
+    report['Reduction (%)'] = 100 * (1 - report['Bytes After'] / report['Bytes Before'])
+    return report
+
+def parse_dates(values: pd.Series, date_format: str = DATE_FORMAT) -> pd.Series:
+    """
+    Parses date strings with errors='coerce' semantics, parsing each distinct string only once.
+
+    Categorical input (as read by load_data) reuses its codes; other input is factorized first.
+    Unparseable and missing values become NaT, exactly as pd.to_datetime(..., errors='coerce') would.
+
+    Args:
+        values (pd.Series): Date strings, categorical or object. Datetime input is returned unchanged.
+        date_format (str): strptime format of the strings.
+
+    Returns:
+        pd.Series: datetime64[ns] values with the input's index and name.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Index(uniques, dtype=object), format=date_format, errors='coerce').to_numpy(dtype='datetime64[ns]')
+    # Code -1 (missing) picks the appended NaT
+    parsed = np.append(parsed, np.datetime64('NaT', 'ns'))
+    return pd.Series(parsed[codes], index=values.index, name=values.name)
+
+@instrument
 def load_data(filepath: str) -> Optional[pd.DataFrame]:
     """
     Loads data from a CSV file.
@@ -14,12 +108,31 @@ def load_data(filepath: str) -> Optional[pd.DataFrame]:
         Optional[pd.DataFrame]: The loaded dataframe, or None if an error occurs.
     """
     try:
-        df = pd.read_csv(filepath)
+        df = pd.read_csv(filepath, dtype=READ_CSV_DTYPES)
         return df
     except Exception as e:
-        print(f"Error loading data: {e}")
+        report_error("loading data", e)
         return None
 
+def load_data_chunks(filepath: str, chunksize: int = 250_000) -> Iterator[pd.DataFrame]:
+    """
+    Streams a CSV file in fixed-size row chunks instead of loading it all at once.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        chunksize (int): Number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next raw chunk. Nothing is yielded if the file cannot be read.
+    """
+    try:
+        with pd.read_csv(filepath, chunksize=chunksize, dtype=READ_CSV_DTYPES) as reader:
+            for chunk in reader:
+                yield chunk
+    except Exception as e:
+        report_error("loading data", e)
+
+@instrument
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Cleans the dataframe by handling dates, numeric conversions, and missing values.
@@ -32,10 +145,9 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     try:
         # Date conversion
-        date_cols = ['Order Date', 'Ship Date']
-        for col in date_cols:
+        for col in DATE_COLUMNS:
             if col in df.columns:
-                df[col] = pd.to_datetime(df[col], format='%d-%m-%Y', errors='coerce')
+                df[col] = parse_dates(df[col])
 
         # Numeric conversion (just in case)
         numeric_cols = ['Sales', 'Units', 'Gross Profit', 'Cost']
@@ -50,62 +162,189 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
         if 'Order Date' in df.columns:
             df.sort_values(by='Order Date', inplace=True)
 
-        return df
+        return apply_schema(df)
     except Exception as e:
-        print(f"Error cleaning data: {e}")
+        report_error("cleaning data", e)
         return pd.DataFrame()
 
-def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
+def _safe_divide(numerator: pd.Series, denominator: pd.Series, scale: float = 1) -> np.ndarray:
+    """
+    Element-wise numerator / denominator * scale, returning 0 where the denominator is 0.
+
+    Args:
+        numerator (pd.Series): The dividend column.
+        denominator (pd.Series): The divisor column.
+        scale (float): Multiplier applied after the division (e.g. 100 for percentages).
+
+    Returns:
+        np.ndarray: A float64 array aligned with the inputs.
+    """
+    num = numerator.to_numpy(dtype=np.float64)
+    den = denominator.to_numpy(dtype=np.float64)
+    out = np.zeros(len(num), dtype=np.float64)
+    np.divide(num, den, out=out, where=den != 0)
+    if scale != 1:
+        # Same operation order as (num / den * scale) so results are bit-identical
+        np.multiply(out, scale, out=out)
+    return out
+
+# SplitMix64 constants, used as a counter-based generator: every draw is a pure function of (seed, row key, stream)
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """Applies the SplitMix64 finalizer element-wise (uint64 arithmetic wraps modulo 2**64)."""
+    x = x + _GOLDEN_GAMMA
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+def row_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns a stable 64-bit key per row for the simulated columns.
+
+    Uses 'Row ID'. Without it, an order line is identified by a hash of 'Order ID', 'Product ID' (when
+    present) and the line's occurrence number among rows sharing both, counted in index (file) order, so
+    the lines of one order get different values. The occurrence number is counted within the frame being
+    engineered, so repeats of the same order and product split across chunks, partitions or drops can
+    share a key. Without 'Order ID' either, the row position is used.
+
+    Args:
+        df (pd.DataFrame): The cleaned dataframe.
+
+    Returns:
+        np.ndarray: A uint64 array aligned with the rows.
+    """
+    if 'Row ID' in df.columns:
+        return df['Row ID'].to_numpy(dtype=np.int64).astype(np.uint64)
+    if 'Order ID' in df.columns:
+        line = pd.DataFrame({col: df[col].astype(str).to_numpy() for col in ('Order ID', 'Product ID') if col in df.columns})
+        # Number repeated lines in index order, which re-sorting the frame does not change
+        by_index = np.argsort(df.index.to_numpy(), kind='stable')
+        occurrence = np.empty(len(df), dtype=np.int64)
+        occurrence[by_index] = line.iloc[by_index].groupby(list(line.columns), sort=False).cumcount().to_numpy()
+        line['Occurrence'] = occurrence
+        return pd.util.hash_pandas_object(line, index=False).to_numpy()
+    return np.arange(len(df), dtype=np.uint64)
+
+def row_uniforms(keys: np.ndarray, n_streams: int, seed: int = 42) -> np.ndarray:
+    """
+    Draws n_streams independent uniforms in [0, 1) per row key.
+
+    The draws depend only on the key, the stream number and the seed, never on row order or on the other
+    rows in the frame, so re-sorted, chunked, appended or parallel inputs get the same values per row.
+
+    Args:
+        keys (np.ndarray): uint64 row keys, e.g. from row_keys.
+        n_streams (int): Number of values per row.
+        seed (int): Generator key.
+
+    Returns:
+        np.ndarray: Float64 array of shape (len(keys), n_streams).
+    """
+    with np.errstate(over='ignore'):
+        base = _splitmix64(keys ^ _splitmix64(np.uint64(seed)))
+        counters = base[:, None] + np.arange(1, n_streams + 1, dtype=np.uint64) * _GOLDEN_GAMMA
+        bits = _splitmix64(counters)
+    # Top 53 bits -> exactly representable doubles in [0, 1)
+    return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+# Simulated attributes, in the order of their uniform streams
+SIMULATED_CUSTOMER_IDS = [f"CUST-{i:04d}" for i in range(1, 501)]
+SIMULATED_SEGMENTS = ['Wholesale', 'Retail', 'Online', 'Corporate']
+SIMULATED_SEGMENT_WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+SIMULATED_CATEGORIES = ['Sweets', 'Chocolates', 'Savory', 'Beverages', 'Gifts']
+
+def _draw_categorical(u: np.ndarray, labels: list, weights: Optional[list] = None) -> pd.Categorical:
+    """Maps uniforms to labels (uniformly, or by weights) as a categorical of the observed labels."""
+    if weights is None:
+        codes = np.minimum((u * len(labels)).astype(np.int64), len(labels) - 1)
+    else:
+        codes = np.minimum(np.searchsorted(np.cumsum(weights), u, side='right'), len(labels) - 1)
+    # Categories sorted like astype('category') would produce
+    order = np.argsort(labels)
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[order] = np.arange(len(labels))
+    return pd.Categorical.from_codes(rank[codes], categories=np.asarray(labels)[order]).remove_unused_categories()
+
+@instrument
+def feature_engineering(df: pd.DataFrame, seed: int = 42) -> pd.DataFrame:
     """
     Adds calculated columns to the dataframe, including margin percentages and simulated data.
 
+    Simulated columns are drawn per row from row_uniforms keyed on row_keys, so each row's values are
+    reproducible regardless of how the data is sorted, chunked or split across workers.
+
     Args:
         df (pd.DataFrame): The cleaned dataframe.
+        seed (int): Seed for the simulated columns.
 
     Returns:
         pd.DataFrame: The dataframe with added features. Returns original df if error occurs.
     """
     try:
         # Gross Margin Percentage
-        # Avoid division by zero
-        df['Gross Margin (%)'] = df.apply(lambda row: (row['Gross Profit'] / row['Sales'] * 100) if row['Sales'] != 0 else 0, axis=1)
+        # Avoid division by zero (masked division leaves zero-sales rows at 0)
+        df['Gross Margin (%)'] = _safe_divide(df['Gross Profit'], df['Sales'], scale=100)
         
         # Profit per Unit
-        df['Profit per Unit'] = df.apply(lambda row: (row['Gross Profit'] / row['Units']) if row['Units'] != 0 else 0, axis=1)
+        df['Profit per Unit'] = _safe_divide(df['Gross Profit'], df['Units'])
+
+        # Integer day/month keys: date-range filters binary-search the day key of the sorted frame,
+        # and monthly views group on the month key instead of converting every row to a Period
+        if 'Order Date' in df.columns:
+            df[DAY_KEY_COLUMN] = day_keys(df['Order Date'])
+            df[MONTH_KEY_COLUMN] = month_keys(df['Order Date'])
 
         # --- Data Simulation for Analytical Depth ---
-        np.random.seed(42) # For reproducibility
+        u = row_uniforms(row_keys(df), 5, seed)
         
         # 1. Simulate Customer ID
-        # Assume repeat customers exist. Generate 500 unique customer IDs.
-        customer_ids = [f"CUST-{i:04d}" for i in range(1, 501)]
-        df['Customer ID'] = np.random.choice(customer_ids, size=len(df))
+        # Assume repeat customers exist. 500 unique customer IDs.
+        df['Customer ID'] = _draw_categorical(u[:, 0], SIMULATED_CUSTOMER_IDS)
         
         # 2. Simulate Customer Segment
-        # Randomly assign segments
-        segments = ['Wholesale', 'Retail', 'Online', 'Corporate']
-        df['Customer Segment'] = np.random.choice(segments, size=len(df), p=[0.4, 0.3, 0.2, 0.1])
+        df['Customer Segment'] = _draw_categorical(u[:, 1], SIMULATED_SEGMENTS, SIMULATED_SEGMENT_WEIGHTS)
 
         # 3. Simulate Product Category
-        # Randomly assign categories
-        categories = ['Sweets', 'Chocolates', 'Savory', 'Beverages', 'Gifts']
-        df['Product Category'] = np.random.choice(categories, size=len(df))
+        df['Product Category'] = _draw_categorical(u[:, 2], SIMULATED_CATEGORIES)
 
         # 4. Simulate Cost Components (Manufacturing ~70%, Shipping ~20%, Overhead ~10%)
         # Add some random variation
         if 'Cost' in df.columns:
-            df['Manufacturing Cost'] = df['Cost'] * np.random.uniform(0.65, 0.75, size=len(df))
-            df['Shipping Cost'] = df['Cost'] * np.random.uniform(0.15, 0.25, size=len(df))
+            df['Manufacturing Cost'] = df['Cost'] * (0.65 + 0.10 * u[:, 3])
+            df['Shipping Cost'] = df['Cost'] * (0.15 + 0.10 * u[:, 4])
             df['Overhead Cost'] = df['Cost'] - df['Manufacturing Cost'] - df['Shipping Cost']
             
             # Ensure no negative costs due to rounding/subtraction
-            df['Overhead Cost'] = df['Overhead Cost'].apply(lambda x: max(x, 0))
+            df['Overhead Cost'] = df['Overhead Cost'].clip(lower=0)
 
-        return df
+        return apply_schema(df)
     except Exception as e:
-        print(f"Error in feature engineering: {e}")
+        report_error("in feature engineering", e)
         return df
 
+def iter_prepared_chunks(filepath: str, chunksize: int = 250_000) -> Iterator[pd.DataFrame]:
+    """
+    Streaming ingestion mode: reads, cleans and engineers the CSV one chunk at a time.
+
+    Chunks are only sorted locally, not globally. Simulated columns are keyed per row, so every row gets
+    the same values as in the in-memory pipeline.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        chunksize (int): Number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next cleaned and engineered chunk. Empty chunks are skipped.
+    """
+    for chunk in load_data_chunks(filepath, chunksize=chunksize):
+        chunk = clean_data(chunk)
+        if chunk.empty:
+            continue
+        yield feature_engineering(chunk)
+
 if __name__ == "__main__":
     # Test execution
     # Use relative path from the script location
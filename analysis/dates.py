@@ -0,0 +1,79 @@
+import pandas as pd
+import numpy as np
+from typing import Tuple
+
+# Integer date keys precomputed by feature_engineering. Missing dates get the largest key, so a frame
+# sorted by Order Date (NaT last) stays sorted by its keys.
+DAY_KEY_COLUMN = 'Order Day Key'
+MONTH_KEY_COLUMN = 'Order Month Key'
+DATE_KEY_COLUMNS = [DAY_KEY_COLUMN, MONTH_KEY_COLUMN]
+MISSING_DATE_KEY = np.iinfo(np.int32).max
+
+
+def _date_keys(dates, unit: str) -> np.ndarray:
+    """Converts datetimes to int32 counts of unit ('D' or 'M') since 1970-01, missing dates to MISSING_DATE_KEY."""
+    values = pd.DatetimeIndex(dates).to_numpy().astype(f'datetime64[{unit}]')
+    keys = values.astype(np.int64)
+    keys[np.isnat(values)] = MISSING_DATE_KEY
+    return keys.astype(np.int32)
+
+
+def day_keys(dates) -> np.ndarray:
+    """
+    Returns the day number (days since 1970-01-01) of each date.
+
+    Args:
+        dates: A datetime Series, index or array.
+
+    Returns:
+        np.ndarray: int32 day keys; MISSING_DATE_KEY for missing dates.
+    """
+    return _date_keys(dates, 'D')
+
+
+def month_keys(dates) -> np.ndarray:
+    """
+    Returns the month number (months since 1970-01) of each date.
+
+    Args:
+        dates: A datetime Series, index or array.
+
+    Returns:
+        np.ndarray: int32 month keys; MISSING_DATE_KEY for missing dates.
+    """
+    return _date_keys(dates, 'M')
+
+
+def month_labels(keys: np.ndarray) -> np.ndarray:
+    """
+    Formats month keys as 'YYYY-MM' strings, the same labels str(Period) gives for monthly periods.
+
+    Args:
+        keys (np.ndarray): Month keys from month_keys, without MISSING_DATE_KEY.
+
+    Returns:
+        np.ndarray: The labels, as an object array.
+    """
+    return np.asarray(keys, dtype=np.int64).astype('datetime64[M]').astype(str).astype(object)
+
+
+def date_range_positions(df: pd.DataFrame, start_date=None, end_date=None) -> Tuple[int, int]:
+    """
+    Locates the orders between two dates (inclusive, whole days) with a binary search.
+
+    The engineered frame is sorted by Order Date: clean_data sorts it, and ingestion and the parallel
+    pipeline merge new rows in date order. The matching rows are therefore one contiguous block.
+
+    Args:
+        df (pd.DataFrame): A frame sorted by Order Date, ideally carrying the precomputed day key.
+        start_date: Inclusive start date, or None for no lower bound.
+        end_date: Inclusive end date, or None for no upper bound.
+
+    Returns:
+        Tuple[int, int]: The (start, stop) positions of the matching rows, usable as df.iloc[start:stop].
+    """
+    keys = df[DAY_KEY_COLUMN].to_numpy() if DAY_KEY_COLUMN in df.columns else day_keys(df['Order Date'])
+    start = 0 if start_date is None else int(np.searchsorted(keys, day_keys([pd.Timestamp(start_date)])[0], side='left'))
+    stop = int(np.searchsorted(keys, MISSING_DATE_KEY, side='left')) if end_date is None else \
+        int(np.searchsorted(keys, day_keys([pd.Timestamp(end_date)])[0], side='right'))
+    return start, max(start, stop)
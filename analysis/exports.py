@@ -0,0 +1,226 @@
+import os
+import time
+import hashlib
+import tempfile
+import datetime
+import numpy as np
+import pandas as pd
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from analysis.views import RowSelection, row_mask, take_columns
+
+# Excel's hard limit, including the header row
+EXCEL_MAX_ROWS = 1_048_576
+
+DEFAULT_EXPORT_DIR = os.path.join(tempfile.gettempdir(), "nassau_exports")
+
+# A sheet is either a small frame written as is, or (base frame, row selection, columns) gathered chunk by chunk
+SheetRows = Union[pd.DataFrame, Tuple[pd.DataFrame, RowSelection, Optional[Sequence[str]]]]
+
+# Exports older than this are removed by sweep_exports; a cached path whose file is gone is rebuilt on request
+EXPORT_MAX_AGE_SECONDS = 24 * 60 * 60
+
+
+def export_path(name: str, key: Hashable, extension: str, export_dir: Optional[str] = None) -> str:
+    """
+    Returns a stable file path for an export, derived from a cache key so repeated requests reuse one file.
+
+    Args:
+        name (str): Export name, e.g. 'filtered_data'.
+        key (Hashable): The normalized filter state the export was built for.
+        extension (str): File extension without the dot.
+        export_dir (Optional[str]): Target directory. Defaults to a folder in the system temp dir.
+
+    Returns:
+        str: The export path.
+    """
+    export_dir = export_dir or DEFAULT_EXPORT_DIR
+    os.makedirs(export_dir, exist_ok=True)
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(export_dir, f"{name}-{digest}.{extension}")
+
+
+def sweep_exports(export_dir: Optional[str] = None, max_age_seconds: float = EXPORT_MAX_AGE_SECONDS) -> int:
+    """
+    Removes export files (and abandoned temporary files) older than max_age_seconds.
+
+    Args:
+        export_dir (Optional[str]): The export directory. Defaults to DEFAULT_EXPORT_DIR.
+        max_age_seconds (float): Files last modified longer ago than this are removed.
+
+    Returns:
+        int: The number of files removed.
+    """
+    export_dir = export_dir or DEFAULT_EXPORT_DIR
+    if not os.path.isdir(export_dir):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for entry in os.scandir(export_dir):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            # Another session may have replaced or removed it meanwhile
+            pass
+    return removed
+
+
+def _temp_path(path: str) -> str:
+    """Creates a uniquely named empty file next to path, so concurrent writers never share a file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    return tmp_path
+
+
+def _replace(tmp_path: str, path: str) -> None:
+    """Moves a finished temporary file into place atomically; readers of the old file keep their handle."""
+    os.replace(tmp_path, path)
+
+
+def _discard(tmp_path: str) -> None:
+    """Removes a temporary file after a failed write."""
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def _selected_columns(df: pd.DataFrame, columns: Optional[Sequence[str]]) -> List[str]:
+    """Returns the requested columns that exist in df, or all of them."""
+    return list(df.columns) if columns is None else [c for c in columns if c in df.columns]
+
+
+def _gather_chunks(df: pd.DataFrame, rows: RowSelection, columns: List[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Yields the selected rows of df chunksize rows at a time, gathering each chunk from the base frame on its own
+    so memory grows with the chunk size rather than with the selection.
+    """
+    mask = row_mask(rows, len(df))
+    if mask is None:
+        for start in range(0, len(df), chunksize):
+            yield take_columns(df.iloc[start:start + chunksize], columns)
+        return
+    positions = np.flatnonzero(mask)
+    for start in range(0, len(positions), chunksize):
+        chunk = positions[start:start + chunksize]
+        # Only the rows spanned by the chunk are masked, not the whole base frame
+        lo, hi = chunk[0], chunk[-1] + 1
+        yield take_columns(df.iloc[lo:hi], columns, chunk - lo)
+
+
+def write_csv_chunked(df: pd.DataFrame, path: str, rows: RowSelection = None, columns: Optional[Sequence[str]] = None,
+                      chunksize: int = 100_000) -> str:
+    """
+    Writes the selected rows of a dataframe to CSV in chunks so only one chunk is ever gathered and encoded.
+
+    The selection is never materialized: each chunk's rows are taken from the base frame just before they are
+    written. The rows go to a unique temporary file that then replaces path, so a reader never sees a partial file.
+
+    Args:
+        df (pd.DataFrame): The base frame.
+        path (str): Destination file.
+        rows (RowSelection): Optional boolean mask or positions over df; every row is written when None.
+        columns (Optional[Sequence[str]]): Columns to write, in order. Defaults to all of them.
+        chunksize (int): Rows gathered and encoded per chunk.
+
+    Returns:
+        str: The path written.
+    """
+    columns = _selected_columns(df, columns)
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            header = True
+            for chunk in _gather_chunks(df, rows, columns, chunksize):
+                chunk.to_csv(f, index=False, header=header)
+                header = False
+            if header:
+                pd.DataFrame(columns=columns).to_csv(f, index=False)
+        _replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    return path
+
+
+def _excel_cell(value):
+    """Converts a pandas/NumPy scalar into something xlsxwriter can write (None for missing values)."""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _write_sheet(workbook, name: str, sheet: SheetRows, chunksize: int, formats: Dict[str, object]) -> None:
+    """Streams a sheet's rows into one or more worksheets, row by row in order (required by constant_memory)."""
+    df, rows, columns = (sheet, None, None) if isinstance(sheet, pd.DataFrame) else sheet
+    columns = _selected_columns(df, columns)
+    header = [str(c) for c in columns]
+    rows_per_sheet = EXCEL_MAX_ROWS - 1
+
+    sheet_no = 0
+    worksheet = workbook.add_worksheet(name[:31])
+    worksheet.write_row(0, 0, header, formats['header'])
+    row_idx = 1
+    for chunk in _gather_chunks(df, rows, columns, chunksize):
+        for record in chunk.itertuples(index=False, name=None):
+            if row_idx > rows_per_sheet:
+                sheet_no += 1
+                worksheet = workbook.add_worksheet(f"{name} ({sheet_no + 1})"[:31])
+                worksheet.write_row(0, 0, header, formats['header'])
+                row_idx = 1
+            for col_idx, value in enumerate(record):
+                cell = _excel_cell(value)
+                if cell is None:
+                    continue
+                if isinstance(cell, (datetime.datetime, datetime.date)):
+                    worksheet.write_datetime(row_idx, col_idx, cell, formats['date'])
+                else:
+                    worksheet.write(row_idx, col_idx, cell)
+            row_idx += 1
+
+
+def write_excel_report(path: str, sheets: Dict[str, SheetRows], chunksize: int = 50_000) -> str:
+    """
+    Writes a multi-sheet workbook with xlsxwriter's constant_memory mode.
+
+    In constant_memory mode each row is flushed to disk once the next one starts, so peak memory does not
+    grow with the number of rows. Sheets longer than Excel's row limit spill into '<name> (2)', '<name> (3)', ...
+    A sheet given as (base frame, row selection, columns) is gathered one chunk at a time, as in
+    write_csv_chunked. The workbook is built in a unique temporary file that then replaces path.
+
+    Args:
+        path (str): Destination .xlsx file.
+        sheets (Dict[str, SheetRows]): Sheet name to a frame or a (frame, rows, columns) selection, written
+            in insertion order.
+        chunksize (int): Rows gathered from the frame at a time.
+
+    Returns:
+        str: The path written.
+    """
+    import xlsxwriter
+
+    tmp_path = _temp_path(path)
+    try:
+        workbook = xlsxwriter.Workbook(tmp_path, {'constant_memory': True, 'nan_inf_to_errors': True})
+        try:
+            formats = {
+                'header': workbook.add_format({'bold': True}),
+                'date': workbook.add_format({'num_format': 'yyyy-mm-dd'}),
+            }
+            for name, df in sheets.items():
+                _write_sheet(workbook, name, df, chunksize, formats)
+        finally:
+            workbook.close()
+        _replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    return path
@@ -1,23 +1,308 @@
+import os
+import glob
+import time
+import pickle
+import tempfile
+import hashlib
+import threading
+import warnings
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-def generate_forecast(df: pd.DataFrame, periods: int = 6) -> pd.DataFrame:
+from analysis.instrumentation import instrument, report_error
+from analysis.views import RowSelection, take_columns
+
+def _fit_holt_winters(series: pd.Series, periods: int) -> pd.Series:
+    """
+    Fits an additive Holt-Winters model (trend + 12-month seasonality) and forecasts the next periods.
+
+    Args:
+        series (pd.Series): Monthly values indexed by month-end dates.
+        periods (int): Number of months to forecast.
+
+    Returns:
+        pd.Series: The forecast, indexed by future month-end dates. Raises if the model cannot be fitted.
+    """
+    # Use 'add' (additive) trend/seasonal if no zeros/negatives, otherwise might need care.
+    # Sales/Profit can be high, additive is usually safe for this scale.
+    model = ExponentialSmoothing(series, **HOLT_WINTERS_CONFIG).fit()
+    return model.forecast(periods)
+
+# Model configuration shared by every Holt-Winters fit; part of every cache key
+HOLT_WINTERS_CONFIG = {'trend': 'add', 'seasonal': 'add', 'seasonal_periods': 12}
+
+def _start_params(params: Dict[str, object]) -> np.ndarray:
+    """Packs fitted Holt-Winters parameters into the start_params layout accepted by ExponentialSmoothing.fit."""
+    return np.r_[
+        params['smoothing_level'], params['smoothing_trend'], params['smoothing_seasonal'],
+        params['initial_level'], params['initial_trend'], params['initial_seasons']
+    ]
+
+def series_fingerprint(series: pd.Series, *extra) -> str:
+    """
+    Hashes a monthly series (dates and values) together with any extra configuration.
+
+    Args:
+        series (pd.Series): Monthly values indexed by dates.
+        *extra: Additional hashable configuration, e.g. the horizon.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(np.asarray(series.index.asi8, dtype=np.int64).tobytes())
+    digest.update(np.asarray(series.to_numpy(), dtype=np.float64).tobytes())
+    digest.update(repr((sorted(HOLT_WINTERS_CONFIG.items()),) + extra).encode('utf-8'))
+    return digest.hexdigest()
+
+class ForecastModelCache:
+    """
+    LRU cache of Holt-Winters forecasts keyed by series fingerprint, configuration and horizon.
+
+    On a miss, a series whose history up to the previous month matches a cached fit (the latest month was
+    revised, or a new month was appended) is refitted starting from the cached parameters, which skips the
+    brute-force search and converges in a few iterations. Entries are optionally persisted as pickles in
+    cache_dir so they survive restarts; the warm-start index is written by flush(), once per batch of fits.
+    The persisted entries are bounded by max_entries too: their LRU order is kept in the files' modification
+    times, so pickles left by earlier sessions are indexed on start and evicted like any other entry.
+
+    A warm-started fit converges to a slightly different optimum than a cold fit of the same series
+    (forecasts differ by about 1e-4 relative), so with warm starts a forecast depends on which fits the
+    cache has seen. Pass warm_start=False when results must be reproducible regardless of cache history.
+
+    Args:
+        max_entries (int): Maximum number of cached forecasts.
+        cache_dir (Optional[str]): Directory to persist entries in, or None to keep them in memory only.
+        warm_start (bool): Refit revised or extended series from cached parameters.
+    """
+
+    def __init__(self, max_entries: int = 256, cache_dir: Optional[str] = None, warm_start: bool = True):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.warm_start = warm_start
+        self.hits = 0
+        self.misses = 0
+        self.warm_starts = 0
+        self.cold_fits = 0
+        self._entries: "OrderedDict[str, Dict[str, object]]" = OrderedDict()
+        # fingerprint of a history (without horizon) -> fitted parameters, for warm starts
+        self._warm: "OrderedDict[str, Dict[str, object]]" = OrderedDict()
+        self._warm_dirty = False
+        # Keys of the persisted entries, least recently used first
+        self._files: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._warm.update(self._read_pickle('warm_index') or {})
+            self._index_files()
+
+    def _index_files(self) -> None:
+        """Indexes entries persisted by earlier sessions by modification time and evicts those over capacity."""
+        entries = []
+        for path in glob.glob(os.path.join(glob.escape(self.cache_dir), '*.pkl')):
+            key = os.path.splitext(os.path.basename(path))[0]
+            if key == 'warm_index':
+                continue
+            try:
+                entries.append((os.path.getmtime(path), key))
+            except OSError:
+                pass
+        for _, key in sorted(entries):
+            self._files[key] = None
+        self._remove_files(self._evict_files())
+
+    def _evict_files(self) -> List[str]:
+        """Drops the least recently used persisted keys over capacity; call with the lock held (or during init)."""
+        evicted = []
+        while len(self._files) > self.max_entries:
+            evicted.append(self._files.popitem(last=False)[0])
+        return evicted
+
+    def _remove_files(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+
+    def _read_pickle(self, name: str):
+        try:
+            with open(self._path(name), 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _write_pickle(self, name: str, value) -> bool:
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{name}.", suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(value, f)
+                os.replace(tmp_path, self._path(name))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            return True
+        except Exception as e:
+            report_error("persisting forecast cache", e)
+            return False
+
+    def _lookup(self, key: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        entry = self._read_pickle(key) if self.cache_dir else None
+        if entry is not None:
+            try:
+                # Record the use in the file itself, so the LRU order survives a restart
+                os.utime(self._path(key))
+            except OSError:
+                pass
+            self._store(key, entry, persist=False)
+        return entry
+
+    def _store(self, key: str, entry: Dict[str, object], persist: bool = True) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if not self.cache_dir:
+            return
+        if persist and not self._write_pickle(key, entry):
+            return
+        with self._lock:
+            self._files[key] = None
+            self._files.move_to_end(key)
+            evicted = self._evict_files()
+        self._remove_files(evicted)
+
+    def _remember_params(self, series: pd.Series, params: Dict[str, object]) -> None:
+        with self._lock:
+            # A later call may see this series with its last month revised (same prefix) or a month appended
+            for history in (series, series.iloc[:-1]):
+                key = series_fingerprint(history)
+                self._warm[key] = params
+                self._warm.move_to_end(key)
+            while len(self._warm) > 2 * self.max_entries:
+                self._warm.popitem(last=False)
+            self._warm_dirty = True
+
+    def flush(self) -> None:
+        """Persists the warm-start index if it changed since the last flush (no-op without cache_dir)."""
+        with self._lock:
+            if not (self.cache_dir and self._warm_dirty):
+                return
+            snapshot = dict(self._warm)
+            self._warm_dirty = False
+        self._write_pickle('warm_index', snapshot)
+
+    def fit_forecast(self, series: pd.Series, periods: int) -> pd.Series:
+        """
+        Returns the Holt-Winters forecast for a series, from the cache when possible.
+
+        Args:
+            series (pd.Series): Monthly values indexed by month-end dates.
+            periods (int): Number of months to forecast.
+
+        Returns:
+            pd.Series: The forecast. Raises, like _fit_holt_winters, if the model cannot be fitted.
+        """
+        key = series_fingerprint(series, periods)
+        entry = self._lookup(key)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return entry['forecast'].copy()
+
+        with self._lock:
+            self.misses += 1
+            warm_params = self._warm.get(series_fingerprint(series.iloc[:-1])) if self.warm_start else None
+
+        model = ExponentialSmoothing(series, **HOLT_WINTERS_CONFIG)
+        fitted = None
+        if warm_params is not None:
+            try:
+                fitted = model.fit(start_params=_start_params(warm_params), use_brute=False)
+                with self._lock:
+                    self.warm_starts += 1
+            except Exception:
+                fitted = None
+        if fitted is None:
+            fitted = model.fit()
+            with self._lock:
+                self.cold_fits += 1
+
+        forecast = fitted.forecast(periods)
+        params = {k: fitted.params[k] for k in ('smoothing_level', 'smoothing_trend', 'smoothing_seasonal',
+                                                'initial_level', 'initial_trend', 'initial_seasons')}
+        self._store(key, {'forecast': forecast, 'params': params})
+        self._remember_params(series, params)
+        return forecast.copy()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            Dict[str, object]: Entries, capacity, hits, misses, warm starts and cold fits.
+        """
+        with self._lock:
+            return {
+                'Entries': len(self._entries),
+                'Capacity': self.max_entries,
+                'Hits': self.hits,
+                'Misses': self.misses,
+                'Warm Starts': self.warm_starts,
+                'Cold Fits': self.cold_fits
+            }
+
+def _naive_forecast(series: pd.Series, periods: int) -> pd.Series:
+    """
+    Fallback forecast repeating the last observed value.
+
+    Args:
+        series (pd.Series): Monthly values indexed by month-end dates. Must not be empty.
+        periods (int): Number of months to forecast.
+
+    Returns:
+        pd.Series: The forecast, indexed by future month-end dates.
+    """
+    last_value = series.iloc[-1]
+    if not series.index.empty:
+        start_date = series.index[-1] + pd.DateOffset(months=1)
+    else:
+        start_date = pd.Timestamp.now()
+    dates = pd.date_range(start=start_date, periods=periods, freq='M')
+    return pd.Series([last_value] * periods, index=dates)
+
+@instrument
+def generate_forecast(df: pd.DataFrame, periods: int = 6, cache: Optional[ForecastModelCache] = None,
+                      rows: RowSelection = None) -> pd.DataFrame:
     """
     Generates a sales and profit forecast for the specified number of months.
     
     Args:
         df (pd.DataFrame): The input dataframe containing 'Order Date', 'Sales', and 'Gross Profit'.
         periods (int): Number of months to forecast.
+        cache (Optional[ForecastModelCache]): Reuses fitted models for unchanged (or nearly unchanged) monthly series.
+        rows (RowSelection): Optional boolean mask or positions over df to forecast instead of every row.
         
     Returns:
         pd.DataFrame: A DataFrame containing historical and forecasted data. Returns original reshaped data if forecast fails.
     """
-    # Prepare data
-    df_copy = df.copy()
-    if 'Order Date' not in df_copy.columns:
-         return df_copy
+    # Prepare data: only the columns the forecast reads are copied
+    if 'Order Date' not in df.columns:
+         return df.copy()
+    df_copy = take_columns(df, ['Order Date', 'Sales', 'Gross Profit'], rows)
          
     df_copy['Order Date'] = pd.to_datetime(df_copy['Order Date'])
     monthly_data = df_copy.groupby(pd.Grouper(key='Order Date', freq='M')).agg({
@@ -33,18 +318,11 @@ def generate_forecast(df: pd.DataFrame, periods: int = 6) -> pd.DataFrame:
     
     for col in ['Sales', 'Gross Profit']:
         try:
-            # Fit Holt-Winters model (Trend + Seasonality)
-            # Use 'add' (additive) trend/seasonal if no zeros/negatives, otherwise might need care.
-            # Sales/Profit can be high, additive is usually safe for this scale.
-            model = ExponentialSmoothing(
-                monthly_data[col],
-                trend='add',
-                seasonal='add',
-                seasonal_periods=12
-            ).fit()
-            
-            # Forecast
-            forecast = model.forecast(periods)
+            # Fit Holt-Winters model (Trend + Seasonality) and forecast
+            if cache is not None:
+                forecast = cache.fit_forecast(monthly_data[col], periods)
+            else:
+                forecast = _fit_holt_winters(monthly_data[col], periods)
             
             # Create a localized dataframe for this metric's forecast
             fc_df = pd.DataFrame({
@@ -60,19 +338,13 @@ def generate_forecast(df: pd.DataFrame, periods: int = 6) -> pd.DataFrame:
                 forecast_results[0][col] = fc_df[col]
                 
         except Exception as e:
-            print(f"Forecasting error for {col}: {e}")
+            report_error(f"forecasting {col}", e)
             # Fallback: Simple Moving Average or Naive
             if not monthly_data.empty:
-                last_value = monthly_data[col].iloc[-1]
-                if not monthly_data.index.empty:
-                    start_date = monthly_data.index[-1] + pd.DateOffset(months=1)
-                else:
-                    start_date = pd.Timestamp.now()
-                    
-                dates = pd.date_range(start=start_date, periods=periods, freq='M')
+                naive = _naive_forecast(monthly_data[col], periods)
                 fc_df = pd.DataFrame({
-                    'Order Date': dates,
-                    f'{col}': [last_value] * periods,
+                    'Order Date': naive.index,
+                    f'{col}': naive.values,
                     'Type': 'Forecast'
                 })
                 if not forecast_results:
@@ -83,6 +355,9 @@ def generate_forecast(df: pd.DataFrame, periods: int = 6) -> pd.DataFrame:
                 # If truly empty, create dummy
                 pass
 
+    if cache is not None:
+        cache.flush()
+
     # Combine History and Forecast
     history = monthly_data.reset_index()
     history['Type'] = 'Historical'
@@ -93,3 +368,112 @@ def generate_forecast(df: pd.DataFrame, periods: int = 6) -> pd.DataFrame:
         return combined
     else:
         return history
+
+
+def build_monthly_series(df: pd.DataFrame, by: Union[str, Sequence[str]],
+                         metrics: Sequence[str] = ('Sales', 'Gross Profit')) -> Dict[Tuple, Dict[str, pd.Series]]:
+    """
+    Builds every per-key monthly series in one groupby pass.
+
+    All series share the dataset's full month-end range, with months without orders filled with 0,
+    matching the company-wide series used by generate_forecast.
+
+    Args:
+        df (pd.DataFrame): The input dataframe containing 'Order Date' and the metric columns.
+        by (Union[str, Sequence[str]]): Key column(s), e.g. 'Division' or ['State/Province'].
+        metrics (Sequence[str]): Columns to build series for.
+
+    Returns:
+        Dict[Tuple, Dict[str, pd.Series]]: Key tuple -> metric -> monthly series.
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    data = df.dropna(subset=['Order Date'])
+    if data.empty:
+        return {}
+
+    month_end = data['Order Date'].dt.normalize() + pd.offsets.MonthEnd(0)
+    months = pd.date_range(month_end.min(), month_end.max(), freq='M')
+    grouped = data[list(metrics)].groupby([data[k] for k in keys] + [month_end.rename('_month')], observed=True).sum()
+
+    series: Dict[Tuple, Dict[str, pd.Series]] = {}
+    for metric in metrics:
+        matrix = grouped[metric].unstack('_month').reindex(columns=months).fillna(0)
+        for key, values in zip(matrix.index, matrix.to_numpy()):
+            key = key if isinstance(key, tuple) else (key,)
+            s = pd.Series(values, index=months, name=metric)
+            s.index.freq = 'M'
+            series.setdefault(key, {})[metric] = s
+    return series
+
+
+def _forecast_batch(batch: List[Tuple[Tuple, str, pd.Series]], periods: int) -> List[Dict[str, object]]:
+    """Process-pool worker: forecasts a batch of series, isolating failures per series with the naive fallback."""
+    results = []
+    # Runs inline in the caller's process too, so the warning filters are restored afterwards
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for key, metric, series in batch:
+            try:
+                forecast, method, error = _fit_holt_winters(series, periods), 'Holt-Winters', None
+            except Exception as e:
+                forecast, method, error = _naive_forecast(series, periods), 'Naive', str(e)
+            results.append({'key': key, 'metric': metric, 'forecast': forecast, 'method': method, 'error': error})
+    return results
+
+
+@instrument
+def forecast_many(df: pd.DataFrame, by: Union[str, Sequence[str]], metrics: Sequence[str] = ('Sales', 'Gross Profit'),
+                  periods: int = 6, max_workers: Optional[int] = None,
+                  batch_size: int = 16) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """
+    Forecasts every monthly series of a dimension (e.g. each Division, State or Product) across a process pool.
+
+    Args:
+        df (pd.DataFrame): The input dataframe containing 'Order Date' and the metric columns.
+        by (Union[str, Sequence[str]]): Key column(s) defining one series per distinct value.
+        metrics (Sequence[str]): Columns to forecast.
+        periods (int): Number of months to forecast.
+        max_workers (Optional[int]): Worker processes. Defaults to os.cpu_count(); 1 runs inline.
+        batch_size (int): Series sent to a worker per task.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, float]]: A tidy long frame with the key columns, 'Metric', 'Order Date',
+        'Value', 'Type' (Historical/Forecast) and 'Method', plus throughput statistics.
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    start = time.perf_counter()
+
+    series = build_monthly_series(df, keys, metrics)
+    tasks = [(key, metric, s) for key, per_metric in series.items() for metric, s in per_metric.items()]
+    batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(batches) <= 1:
+        outputs = [_forecast_batch(b, periods) for b in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            outputs = list(executor.map(_forecast_batch, batches, [periods] * len(batches)))
+
+    frames = []
+    fallbacks = 0
+    for result in (r for batch in outputs for r in batch):
+        key, metric = result['key'], result['metric']
+        fallbacks += result['method'] == 'Naive'
+        history = series[key][metric]
+        for values, kind, method in ((history, 'Historical', None), (result['forecast'], 'Forecast', result['method'])):
+            part = pd.DataFrame({'Order Date': values.index, 'Value': values.to_numpy(), 'Type': kind, 'Method': method})
+            part.insert(0, 'Metric', metric)
+            for name, value in zip(keys, key):
+                part.insert(keys.index(name), name, value)
+            frames.append(part)
+
+    elapsed = time.perf_counter() - start
+    result_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=keys + ['Metric', 'Order Date', 'Value', 'Type', 'Method'])
+    stats = {
+        'series': len(tasks),
+        'fallbacks': fallbacks,
+        'workers': max_workers,
+        'seconds': elapsed,
+        'series_per_second': len(tasks) / elapsed if elapsed > 0 else float('nan')
+    }
+    return result_df, stats
@@ -1,132 +1,241 @@
 import pandas as pd
 import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from analysis.dates import MONTH_KEY_COLUMN, MISSING_DATE_KEY, month_keys, month_labels
+from analysis.instrumentation import instrument, report_error
+from analysis.topk import top_k_frame
+from analysis.views import RowSelection, row_mask, masked_sum, take_columns
 
-def get_product_profitability(df: pd.DataFrame) -> pd.DataFrame:
+# Additive measures summed by the aggregation engine
+AGGREGATION_MEASURES = ['Sales', 'Gross Profit', 'Units', 'Cost']
+# Dimensions served by the get_* views below
+AGGREGATION_DIMENSIONS = ['Product Name', 'Division', 'State/Province', 'Customer ID']
+
+
+def _group_codes(keys: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Returns dense integer group codes for a key column (-1 for missing keys) and the matching labels.
+
+    Categorical columns reuse their stored codes; anything else is factorized once.
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        return keys.cat.codes.to_numpy(), keys.cat.categories
+    codes, uniques = pd.factorize(keys, sort=True)
+    return codes, pd.Index(uniques)
+
+
+@instrument
+def aggregate_dimensions(df: pd.DataFrame, dimensions: Optional[Sequence[str]] = None,
+                         measures: Optional[Sequence[str]] = None, rows: RowSelection = None) -> Dict[str, pd.DataFrame]:
+    """
+    Sums every measure for every requested dimension, sharing one extraction of the measure columns.
+
+    Each dimension is reduced with np.bincount over precomputed integer group codes instead of a
+    separate groupby, so calling several insights back to back costs one pass per dimension.
+
+    Args:
+        df (pd.DataFrame): The input dataframe.
+        dimensions (Optional[Sequence[str]]): Key columns to aggregate by. Defaults to AGGREGATION_DIMENSIONS.
+        measures (Optional[Sequence[str]]): Columns to sum. Defaults to AGGREGATION_MEASURES.
+        rows (RowSelection): Optional boolean mask or positions over df; only these rows are aggregated,
+            read straight from the base frame's column buffers without copying the rows.
+
+    Returns:
+        Dict[str, pd.DataFrame]: One frame per available dimension, with the key column followed by the summed
+        measures, one row per observed key, ordered by key.
+    """
+    dimensions = [d for d in (dimensions or AGGREGATION_DIMENSIONS) if d in df.columns]
+    measures = [m for m in (measures or AGGREGATION_MEASURES) if m in df.columns]
+    mask = row_mask(rows, len(df))
+
+    # Extract the measure buffers once; NaN counts as 0 like groupby().sum()
+    values: Dict[str, np.ndarray] = {}
+    for m in measures:
+        arr = df[m].to_numpy(dtype=np.float64, na_value=np.nan)
+        values[m] = np.where(np.isnan(arr), 0.0, arr)
+
+    results: Dict[str, pd.DataFrame] = {}
+    for dim in dimensions:
+        codes, labels = _group_codes(df[dim])
+        valid = codes >= 0
+        if mask is not None:
+            valid &= mask
+        codes = codes[valid]
+        counts = np.bincount(codes, minlength=len(labels))
+        observed = counts > 0
+
+        stats = pd.DataFrame({dim: labels[observed]})
+        for m in measures:
+            sums = np.bincount(codes, weights=values[m][valid], minlength=len(labels))[observed]
+            if pd.api.types.is_integer_dtype(df[m]):
+                sums = np.rint(sums).astype(np.int64)
+            stats[m] = sums
+        results[dim] = stats
+    return results
+
+
+def _dimension_stats(df: pd.DataFrame, dim: str, measures: List[str],
+                     aggregates: Optional[Dict[str, pd.DataFrame]], rows: RowSelection = None) -> pd.DataFrame:
+    """Returns the [dim] + measures frame, from precomputed aggregates when they cover it."""
+    if aggregates is None or dim not in aggregates or not set(measures) <= set(aggregates[dim].columns):
+        aggregates = aggregate_dimensions(df, [dim], measures, rows=rows)
+    return aggregates[dim][[dim] + measures].copy()
+
+
+@instrument
+def get_product_profitability(df: pd.DataFrame, aggregates: Optional[Dict[str, pd.DataFrame]] = None,
+                              rows: RowSelection = None, top_n: Optional[int] = None) -> pd.DataFrame:
     """
     Calculates product-level profitability metrics.
 
     Args:
         df (pd.DataFrame): The input dataframe.
+        aggregates (Optional[Dict[str, pd.DataFrame]]): Precomputed aggregate_dimensions output to reuse.
+        rows (RowSelection): Optional boolean mask or positions over df to analyse instead of every row.
+        top_n (Optional[int]): Only return the n most profitable products, selected without sorting the rest.
 
     Returns:
         pd.DataFrame: A dataframe containing Sales, Gross Profit, Units, Margin %, and Profit per Unit, ranked by Gross Profit.
     """
     try:
-        product_stats = df.groupby('Product Name').agg({
-            'Sales': 'sum',
-            'Gross Profit': 'sum',
-            'Units': 'sum'
-        }).reset_index()
+        product_stats = _dimension_stats(df, 'Product Name', ['Sales', 'Gross Profit', 'Units'], aggregates, rows)
         
         product_stats['Gross Margin (%)'] = (product_stats['Gross Profit'] / product_stats['Sales'] * 100)
         product_stats['Profit per Unit'] = product_stats['Gross Profit'] / product_stats['Units']
         
+        if top_n is not None:
+            return top_k_frame(product_stats, 'Gross Profit', top_n)
         return product_stats.sort_values(by='Gross Profit', ascending=False)
     except Exception as e:
-        print(f"Error in get_product_profitability: {e}")
+        report_error("in get_product_profitability", e)
         return pd.DataFrame()
 
-def get_division_performance(df: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def get_division_performance(df: pd.DataFrame, aggregates: Optional[Dict[str, pd.DataFrame]] = None,
+                             rows: RowSelection = None) -> pd.DataFrame:
     """
     Calculates division-level performance metrics.
 
     Args:
         df (pd.DataFrame): The input dataframe.
+        aggregates (Optional[Dict[str, pd.DataFrame]]): Precomputed aggregate_dimensions output to reuse.
+        rows (RowSelection): Optional boolean mask or positions over df to analyse instead of every row.
 
     Returns:
         pd.DataFrame: A dataframe containing Sales, Gross Profit, Units, and Margin % by Division, ranked by Gross Profit.
     """
     try:
-        division_stats = df.groupby('Division').agg({
-            'Sales': 'sum',
-            'Gross Profit': 'sum',
-            'Units': 'sum'
-        }).reset_index()
+        division_stats = _dimension_stats(df, 'Division', ['Sales', 'Gross Profit', 'Units'], aggregates, rows)
         
         division_stats['Gross Margin (%)'] = (division_stats['Gross Profit'] / division_stats['Sales'] * 100)
         
         return division_stats.sort_values(by='Gross Profit', ascending=False)
     except Exception as e:
-        print(f"Error in get_division_performance: {e}")
+        report_error("in get_division_performance", e)
         return pd.DataFrame()
 
-def get_pareto_data(df: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def get_pareto_data(df: pd.DataFrame, aggregates: Optional[Dict[str, pd.DataFrame]] = None,
+                    rows: RowSelection = None, top_n: Optional[int] = None) -> pd.DataFrame:
     """
     Performs Pareto analysis on products based on Gross Profit.
 
     Args:
         df (pd.DataFrame): The input dataframe.
+        aggregates (Optional[Dict[str, pd.DataFrame]]): Precomputed aggregate_dimensions output to reuse.
+        rows (RowSelection): Optional boolean mask or positions over df to analyse instead of every row.
+        top_n (Optional[int]): Only return the n most profitable products, selected without sorting the rest.
+            Cumulative Percentage stays relative to the total over all products.
 
     Returns:
         pd.DataFrame: A dataframe with Cumulative Profit and Cumulative Percentage columns.
     """
     try:
-        product_stats = df.groupby('Product Name').agg({'Gross Profit': 'sum'}).reset_index()
-        product_stats = product_stats.sort_values(by='Gross Profit', ascending=False)
+        product_stats = _dimension_stats(df, 'Product Name', ['Gross Profit'], aggregates, rows)
+        if top_n is not None:
+            total_profit = product_stats['Gross Profit'].sum()
+            product_stats = top_k_frame(product_stats, 'Gross Profit', top_n).copy()
+        else:
+            product_stats = product_stats.sort_values(by='Gross Profit', ascending=False)
+            total_profit = product_stats['Gross Profit'].sum()
         
         product_stats['Cumulative Profit'] = product_stats['Gross Profit'].cumsum()
-        product_stats['Cumulative Percentage'] = 100 * product_stats['Cumulative Profit'] / product_stats['Gross Profit'].sum()
+        product_stats['Cumulative Percentage'] = 100 * product_stats['Cumulative Profit'] / total_profit
         
         return product_stats
     except Exception as e:
-        print(f"Error in get_pareto_data: {e}")
+        report_error("in get_pareto_data", e)
         return pd.DataFrame()
 
-def get_monthly_trends(df: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def get_monthly_trends(df: pd.DataFrame, rows: RowSelection = None) -> pd.DataFrame:
     """
     Aggregates sales and profit metrics by month.
 
     Args:
         df (pd.DataFrame): The input dataframe.
+        rows (RowSelection): Optional boolean mask or positions over df to analyse instead of every row.
 
     Returns:
         pd.DataFrame: A dataframe with Monthly Sales, Gross Profit, and Gross Margin %.
     """
     try:
-        # Ensure Order Date is datetime
-        df['Month'] = df['Order Date'].dt.to_period('M')
-        monthly_stats = df.groupby('Month').agg({
+        # Group on the precomputed integer month key; frames without it (e.g. streamed aggregates) derive it once
+        if MONTH_KEY_COLUMN in df.columns:
+            df = take_columns(df, [MONTH_KEY_COLUMN, 'Sales', 'Gross Profit'], rows)
+        else:
+            df = take_columns(df, ['Order Date', 'Sales', 'Gross Profit'], rows)
+            df[MONTH_KEY_COLUMN] = month_keys(df.pop('Order Date'))
+        missing = df[MONTH_KEY_COLUMN].to_numpy() == MISSING_DATE_KEY
+        if missing.any():
+            df = df[~missing]
+        monthly_stats = df.groupby(MONTH_KEY_COLUMN).agg({
             'Sales': 'sum',
             'Gross Profit': 'sum'
-        }).reset_index()
+        })
         
-        monthly_stats['Month'] = monthly_stats['Month'].astype(str)
+        labels = month_labels(monthly_stats.index.to_numpy())
+        monthly_stats = monthly_stats.reset_index(drop=True)
+        monthly_stats.insert(0, 'Month', labels)
         monthly_stats['Gross Margin (%)'] = (monthly_stats['Gross Profit'] / monthly_stats['Sales'] * 100)
         
         return monthly_stats
     except Exception as e:
-        print(f"Error in get_monthly_trends: {e}")
+        report_error("in get_monthly_trends", e)
         return pd.DataFrame()
 
-def get_state_performance(df: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def get_state_performance(df: pd.DataFrame, aggregates: Optional[Dict[str, pd.DataFrame]] = None,
+                          rows: RowSelection = None) -> pd.DataFrame:
     """
     Aggregates performance metrics by State/Province.
 
     Args:
         df (pd.DataFrame): The input dataframe.
+        aggregates (Optional[Dict[str, pd.DataFrame]]): Precomputed aggregate_dimensions output to reuse.
+        rows (RowSelection): Optional boolean mask or positions over df to analyse instead of every row.
 
     Returns:
         pd.DataFrame: A dataframe containing Sales, Gross Profit, and Gross Margin % by State, ranked by Gross Profit.
     """
     try:
-        state_stats = df.groupby('State/Province').agg({
-            'Sales': 'sum',
-            'Gross Profit': 'sum'
-        }).reset_index()
+        state_stats = _dimension_stats(df, 'State/Province', ['Sales', 'Gross Profit'], aggregates, rows)
         
         state_stats['Gross Margin (%)'] = (state_stats['Gross Profit'] / state_stats['Sales'] * 100)
         return state_stats.sort_values(by='Gross Profit', ascending=False)
     except Exception as e:
-        print(f"Error in get_state_performance: {e}")
+        report_error("in get_state_performance", e)
         return pd.DataFrame()
 
-def get_cost_breakdown(df: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def get_cost_breakdown(df: pd.DataFrame, rows: RowSelection = None) -> pd.DataFrame:
     """
     Summarizes the total cost components (Manufacturing, Shipping, Overhead).
 
     Args:
         df (pd.DataFrame): The input dataframe.
+        rows (RowSelection): Optional boolean mask or positions over df to analyse instead of every row.
 
     Returns:
         pd.DataFrame: A dataframe with 'Cost Component' and 'Total Cost' columns.
@@ -138,19 +247,25 @@ def get_cost_breakdown(df: pd.DataFrame) -> pd.DataFrame:
         if not existing_cols:
              return pd.DataFrame(columns=['Cost Component', 'Total Cost'])
              
-        cost_summary = df[existing_cols].sum().reset_index()
-        cost_summary.columns = ['Cost Component', 'Total Cost']
+        cost_summary = pd.DataFrame({
+            'Cost Component': existing_cols,
+            'Total Cost': [masked_sum(df[c], rows) for c in existing_cols]
+        })
         return cost_summary
     except Exception as e:
-        print(f"Error in get_cost_breakdown: {e}")
+        report_error("in get_cost_breakdown", e)
         return pd.DataFrame()
 
-def get_customer_profitability(df: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def get_customer_profitability(df: pd.DataFrame, aggregates: Optional[Dict[str, pd.DataFrame]] = None,
+                               rows: RowSelection = None) -> pd.DataFrame:
     """
     Aggregates performance metrics by Customer ID (Simulated).
 
     Args:
         df (pd.DataFrame): The input dataframe.
+        aggregates (Optional[Dict[str, pd.DataFrame]]): Precomputed aggregate_dimensions output to reuse.
+        rows (RowSelection): Optional boolean mask or positions over df to analyse instead of every row.
 
     Returns:
         pd.DataFrame: A dataframe containing Sales, Gross Profit, Units, and Gross Margin % by Customer ID, ranked by Gross Profit.
@@ -159,16 +274,12 @@ def get_customer_profitability(df: pd.DataFrame) -> pd.DataFrame:
         if 'Customer ID' not in df.columns:
              return pd.DataFrame()
              
-        cust_stats = df.groupby('Customer ID').agg({
-            'Sales': 'sum',
-            'Gross Profit': 'sum',
-            'Units': 'sum'
-        }).reset_index()
+        cust_stats = _dimension_stats(df, 'Customer ID', ['Sales', 'Gross Profit', 'Units'], aggregates, rows)
         
         cust_stats['Gross Margin (%)'] = (cust_stats['Gross Profit'] / cust_stats['Sales'] * 100)
         return cust_stats.sort_values(by='Gross Profit', ascending=False)
     except Exception as e:
-        print(f"Error in get_customer_profitability: {e}")
+        report_error("in get_customer_profitability", e)
         return pd.DataFrame()
 
 
@@ -0,0 +1,281 @@
+import os
+import time
+import threading
+import functools
+import tracemalloc
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional
+
+from analysis.views import row_count
+
+# NASSAU_INSTRUMENTATION=0 makes instrument() return functions unwrapped, so disabled builds pay nothing at all.
+# Otherwise a disabled recorder costs one thread-local lookup per instrumented call.
+INSTRUMENTATION_AVAILABLE = os.environ.get("NASSAU_INSTRUMENTATION", "1") != "0"
+
+STAGE_COLUMNS = ['Stage', 'Calls', 'Total ms', 'Mean ms', 'Rows In', 'Rows Out', 'Peak MB', 'Errors']
+
+
+class _RecorderState(threading.local):
+    """Recording state, per thread so concurrent dashboard sessions keep separate timings."""
+
+    def __init__(self):
+        # Set on first access from each thread, so the disabled fast path never raises AttributeError
+        self.enabled = False
+        self.memory = False
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.stack: List[Dict[str, Any]] = []
+
+
+_local = _RecorderState()
+# tracemalloc's peak is process-wide and every stage resets it, so only one thread records memory at a time;
+# other threads that enable recording meanwhile get wall times and row counts only
+_tracing_lock = threading.Lock()
+_memory_owner: Optional[int] = None
+_started_tracing = False
+
+
+def is_enabled() -> bool:
+    """Returns True while the current thread is recording."""
+    return _local.enabled
+
+
+def memory_recorded() -> bool:
+    """Returns True if the current (or last) recording on this thread also records peak memory."""
+    return _local.memory
+
+
+def _release_memory_owner() -> None:
+    """Stops tracing started by enable(). Call with _tracing_lock held."""
+    global _memory_owner, _started_tracing
+    _memory_owner = None
+    if _started_tracing:
+        tracemalloc.stop()
+        _started_tracing = False
+
+
+def enable(memory: bool = True) -> None:
+    """
+    Starts recording instrumented stages on the current thread, clearing earlier records.
+
+    Args:
+        memory (bool): Also record peak traced allocation per stage. tracemalloc slows allocation-heavy
+            code noticeably, so leave this off when only wall times are needed. Only one thread records
+            memory at a time (see memory_recorded()); a thread that exited while recording is released.
+    """
+    global _memory_owner, _started_tracing
+    if not INSTRUMENTATION_AVAILABLE:
+        return
+    if is_enabled():
+        disable()
+    _local.records = {}
+    _local.stack = []
+    if memory:
+        with _tracing_lock:
+            live_threads = {thread.ident for thread in threading.enumerate()}
+            if _memory_owner is not None and _memory_owner not in live_threads:
+                _release_memory_owner()
+            if _memory_owner is None:
+                _memory_owner = threading.get_ident()
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _started_tracing = True
+            else:
+                memory = False
+    _local.memory = memory
+    _local.enabled = True
+
+
+def disable() -> None:
+    """Stops recording on the current thread. Records are kept until the next enable() or reset()."""
+    if not is_enabled():
+        return
+    _local.enabled = False
+    if _local.memory:
+        with _tracing_lock:
+            if _memory_owner == threading.get_ident():
+                _release_memory_owner()
+
+
+def reset() -> None:
+    """Clears the records of the current thread."""
+    _local.records = {}
+    _local.stack = []
+
+
+def _first_frame(args: tuple, kwargs: Dict[str, Any]) -> Optional[pd.DataFrame]:
+    """Returns the first DataFrame argument, which is the input of every instrumented stage."""
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, pd.DataFrame):
+            return value
+    return None
+
+
+def _rows_in(args: tuple, kwargs: Dict[str, Any]) -> Optional[int]:
+    """Counts the input rows, honouring a rows= selection over the input frame."""
+    df = _first_frame(args, kwargs)
+    if df is None:
+        return None
+    if kwargs.get('rows') is not None:
+        return row_count(df, kwargs['rows'])
+    return len(df)
+
+
+def _rows_out(result: Any) -> Optional[int]:
+    """Counts the output rows of a frame, series, or a tuple led by one."""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    return None
+
+
+def _record(name: str, seconds: float, rows_in: Optional[int], rows_out: Optional[int],
+            peak_bytes: Optional[int], errors: int) -> None:
+    """Folds one call into the per-stage totals."""
+    record = _local.records.get(name)
+    if record is None:
+        record = _local.records[name] = {'Calls': 0, 'Seconds': 0.0, 'Rows In': None, 'Rows Out': None,
+                                         'Peak Bytes': None, 'Errors': 0}
+    record['Calls'] += 1
+    record['Seconds'] += seconds
+    record['Rows In'] = rows_in
+    record['Rows Out'] = rows_out
+    if peak_bytes is not None:
+        record['Peak Bytes'] = max(record['Peak Bytes'] or 0, peak_bytes)
+    record['Errors'] += errors
+
+
+class stage:
+    """
+    Context manager that records one block as a named stage while recording is enabled.
+
+    Nested stages are measured independently: each reports its own wall time and the peak allocation
+    above what was live when it started, and a parent's peak includes its children.
+
+    Args:
+        name (str): The stage name shown in the report.
+        rows_in (Optional[int]): Input row count, when known.
+    """
+
+    def __init__(self, name: str, rows_in: Optional[int] = None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self._frame = None
+
+    def __enter__(self) -> "stage":
+        if not is_enabled():
+            return self
+        frame = {'errors': 0, 'base': None, 'peak': None}
+        if _local.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if _local.stack and _local.stack[-1]['peak'] is not None:
+                _local.stack[-1]['peak'] = max(_local.stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['base'] = frame['peak'] = current
+        _local.stack.append(frame)
+        self._frame = frame
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self._frame is None:
+            return False
+        seconds = time.perf_counter() - self._start
+        frame = _local.stack.pop()
+        peak_bytes = None
+        if frame['base'] is not None and tracemalloc.is_tracing():
+            frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            peak_bytes = frame['peak'] - frame['base']
+            if _local.stack and _local.stack[-1]['peak'] is not None:
+                _local.stack[-1]['peak'] = max(_local.stack[-1]['peak'], frame['peak'])
+        errors = frame['errors'] + (exc_type is not None)
+        _record(self.name, seconds, self.rows_in, self.rows_out, peak_bytes, errors)
+        self._frame = None
+        return False
+
+
+def instrument(func: Optional[Callable] = None, *, name: Optional[str] = None) -> Callable:
+    """
+    Decorator that records a function as a stage: wall time, rows in (its first DataFrame argument, or the
+    rows= selection over it), rows out (its DataFrame or Series result) and peak allocation.
+
+    Usable bare (@instrument) or with a stage name (@instrument(name='...')).
+
+    Args:
+        func (Optional[Callable]): The function to wrap.
+        name (Optional[str]): Stage name. Defaults to the function name.
+
+    Returns:
+        Callable: The wrapped function, or func itself when NASSAU_INSTRUMENTATION=0.
+    """
+    def decorate(f: Callable) -> Callable:
+        if not INSTRUMENTATION_AVAILABLE:
+            return f
+        stage_name = name or f.__name__
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if not _local.enabled:
+                return f(*args, **kwargs)
+            with stage(stage_name, _rows_in(args, kwargs)) as s:
+                result = f(*args, **kwargs)
+                s.rows_out = _rows_out(result)
+            return result
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def report_error(context: str, error: Exception) -> None:
+    """
+    Prints an error the way the analysis functions always have and, while recording, counts it against the
+    innermost running stage (the functions catch their own errors, so the stage itself sees a normal return).
+
+    Args:
+        context (str): Where the error happened, e.g. 'get_pareto_data' or 'cleaning data'.
+        error (Exception): The caught exception.
+    """
+    print(f"Error {context}: {error}")
+    if is_enabled() and _local.stack:
+        _local.stack[-1]['errors'] += 1
+
+
+def stage_report() -> pd.DataFrame:
+    """
+    Returns the recorded stages of the current thread in first-call order.
+
+    Returns:
+        pd.DataFrame: One row per stage with STAGE_COLUMNS. Rows In/Out are from the stage's last call and
+        Peak MB is the largest over its calls (NaN when memory was not recorded).
+    """
+    rows: List[Dict[str, Any]] = []
+    for stage_name, record in _local.records.items():
+        rows.append({
+            'Stage': stage_name,
+            'Calls': record['Calls'],
+            'Total ms': record['Seconds'] * 1000,
+            'Mean ms': record['Seconds'] * 1000 / record['Calls'],
+            'Rows In': record['Rows In'],
+            'Rows Out': record['Rows Out'],
+            'Peak MB': float('nan') if record['Peak Bytes'] is None else record['Peak Bytes'] / 1024 ** 2,
+            'Errors': record['Errors'],
+        })
+    report = pd.DataFrame(rows, columns=STAGE_COLUMNS)
+    report[['Rows In', 'Rows Out']] = report[['Rows In', 'Rows Out']].astype('Int64')
+    return report
+
+
+def format_stage_report(report: pd.DataFrame) -> str:
+    """
+    Formats a stage report as a fixed-width text table.
+
+    Args:
+        report (pd.DataFrame): Output of stage_report.
+
+    Returns:
+        str: The table, or a note when nothing was recorded.
+    """
+    if report.empty:
+        return "No stages recorded."
+    return report.to_string(index=False, float_format=lambda v: f"{v:,.1f}")
@@ -0,0 +1,168 @@
+import io
+import os
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from analysis.instrumentation import instrument, report_error
+from analysis.data_processing import (
+    clean_data, feature_engineering, apply_schema, READ_CSV_DTYPES,
+    CATEGORICAL_COLUMNS, SIMULATED_CATEGORICAL_COLUMNS
+)
+
+
+def byte_range_partitions(filepath: str, n_partitions: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Splits a CSV file into byte ranges that start and end on line boundaries.
+
+    Fields must not contain embedded newlines (true for the order file), otherwise a boundary could
+    fall inside a quoted value.
+
+    Args:
+        filepath (str): The CSV file.
+        n_partitions (int): Desired number of ranges. Fewer are returned for small files.
+
+    Returns:
+        Tuple[bytes, List[Tuple[int, int]]]: The header line and the (start, end) offset of each range.
+    """
+    size = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        boundaries = [data_start]
+        for i in range(1, n_partitions):
+            target = data_start + (size - data_start) * i // n_partitions
+            if target <= boundaries[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()  # advance to the start of the next full line
+            position = f.tell()
+            if boundaries[-1] < position < size:
+                boundaries.append(position)
+        boundaries.append(size)
+    return header, [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start]
+
+
+def _prepare_partition(filepath: str, header: bytes, start: int, end: int) -> Tuple[pd.DataFrame, int]:
+    """
+    Reads, cleans and engineers one byte range.
+
+    Returns the prepared rows (indexed by their row number within the range) and the number of raw rows read,
+    so the caller can turn the index into positions in the whole file.
+    """
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        block = f.read(end - start)
+    raw = pd.read_csv(io.BytesIO(header + block), dtype=READ_CSV_DTYPES)
+    raw_rows = len(raw)
+    df = clean_data(raw)
+    if df.empty:
+        return df, raw_rows
+    return feature_engineering(df), raw_rows
+
+
+def merge_order(keys: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Returns the permutation that k-way merges already sorted key arrays, without a global sort.
+
+    Runs are merged pairwise in a balanced tree (log2(k) rounds). Each round places one run's keys into the
+    other with np.searchsorted, and equal keys keep the earlier run first, so the merge is stable.
+
+    Args:
+        keys (Sequence[np.ndarray]): Sorted key arrays, one per partition, in partition order.
+
+    Returns:
+        np.ndarray: Positions into the concatenation of keys, in merged order.
+    """
+    offsets = np.cumsum([0] + [len(k) for k in keys[:-1]])
+    runs = [(np.asarray(k), np.arange(len(k)) + off) for k, off in zip(keys, offsets)]
+    if not runs:
+        return np.empty(0, dtype=np.int64)
+
+    while len(runs) > 1:
+        merged = []
+        for i in range(0, len(runs) - 1, 2):
+            (a_keys, a_pos), (b_keys, b_pos) = runs[i], runs[i + 1]
+            # Final slot of each element of b: elements of a that sort at or before it, plus its own rank in b
+            b_slots = np.searchsorted(a_keys, b_keys, side='right') + np.arange(len(b_keys))
+            out_keys = np.empty(len(a_keys) + len(b_keys), dtype=np.result_type(a_keys, b_keys))
+            out_pos = np.empty(len(out_keys), dtype=np.int64)
+            is_b = np.zeros(len(out_keys), dtype=bool)
+            is_b[b_slots] = True
+            out_keys[b_slots], out_pos[b_slots] = b_keys, b_pos
+            out_keys[~is_b], out_pos[~is_b] = a_keys, a_pos
+            merged.append((out_keys, out_pos))
+        if len(runs) % 2:
+            merged.append(runs[-1])
+        runs = merged
+    return runs[0][1]
+
+
+def concat_partitions(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates engineered frames, unifying categorical categories first so the columns stay categorical.
+
+    Args:
+        frames (List[pd.DataFrame]): The frames, in order. Their categorical columns are updated in place.
+
+    Returns:
+        pd.DataFrame: The concatenated frame.
+    """
+    for col in CATEGORICAL_COLUMNS + SIMULATED_CATEGORICAL_COLUMNS:
+        if all(col in f.columns and isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            categories = pd.Index(sorted(set().union(*(f[col].cat.categories for f in frames))))
+            for f in frames:
+                f[col] = f[col].cat.set_categories(categories)
+    return pd.concat(frames)
+
+
+@instrument
+def prepare_data_parallel(filepath: str, max_workers: Optional[int] = None,
+                          n_partitions: Optional[int] = None) -> Optional[pd.DataFrame]:
+    """
+    Runs load_data -> clean_data -> feature_engineering on byte-range partitions of the CSV in a process pool.
+
+    Each worker reads only its own range, and clean_data sorts that range by Order Date. The sorted partitions
+    are then k-way merged on Order Date. Simulated columns are keyed per row, so the result has the same rows
+    and values as the single-process pipeline. Rows with equal Order Date may come out in a different order.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        max_workers (Optional[int]): Worker processes. Defaults to the CPU count.
+        n_partitions (Optional[int]): Byte ranges to split the file into. Defaults to max_workers.
+
+    Returns:
+        Optional[pd.DataFrame]: The engineered dataframe, indexed by row position in the file like the
+        sequential pipeline, or None if the file could not be processed.
+    """
+    try:
+        max_workers = max_workers or os.cpu_count() or 1
+        header, ranges = byte_range_partitions(filepath, n_partitions or max_workers)
+        if not ranges:
+            return None
+
+        jobs = [(filepath, header, start, end) for start, end in ranges]
+        if max_workers == 1 or len(jobs) == 1:
+            results = [_prepare_partition(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+                results = list(executor.map(_prepare_partition, *zip(*jobs)))
+
+        # Shift each partition's index by the raw rows before it, giving positions in the whole file
+        frames = []
+        offset = 0
+        for df, raw_rows in results:
+            if not df.empty:
+                df.index = df.index + offset
+                frames.append(df)
+            offset += raw_rows
+        if not frames:
+            return None
+
+        order = merge_order([f['Order Date'].to_numpy() for f in frames])
+        merged = concat_partitions(frames)
+        return apply_schema(merged.iloc[order])
+    except Exception as e:
+        report_error("in parallel pipeline", e)
+        return None
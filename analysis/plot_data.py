@@ -0,0 +1,121 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+
+# Default number of markers sent to the browser per scatter plot
+DEFAULT_POINT_BUDGET = 5_000
+
+
+def stratified_sample(df: pd.DataFrame, max_points: int, by: str = 'Division', seed: int = 0) -> pd.DataFrame:
+    """
+    Samples at most max_points rows, allocating the budget to each group in proportion to its size.
+
+    Every non-empty group keeps at least one row so small divisions do not vanish from the plot, as long as
+    the budget allows: with more groups than max_points only the largest max_points groups are guaranteed one.
+
+    Args:
+        df (pd.DataFrame): The rows to sample.
+        max_points (int): The point budget.
+        by (str): Column defining the strata.
+        seed (int): Seed for reproducible samples across reruns.
+
+    Returns:
+        pd.DataFrame: The sampled rows, in their original order.
+    """
+    if len(df) <= max_points:
+        return df
+    if by not in df.columns:
+        return df.sample(n=max_points, random_state=seed).sort_index()
+
+    rng = np.random.default_rng(seed)
+    codes, _ = pd.factorize(df[by])
+    counts = np.bincount(codes[codes >= 0])
+    # One guaranteed row per group, largest groups first, then the rest of the budget in proportion to size
+    guaranteed = np.zeros(len(counts), dtype=int)
+    guaranteed[np.argsort(-counts, kind='stable')[:max_points]] = 1
+    remaining = max_points - guaranteed.sum()
+    spare = counts - guaranteed
+    quotas = guaranteed + np.floor(spare * remaining / max(spare.sum(), 1)).astype(int)
+
+    positions = []
+    for code, quota in enumerate(quotas):
+        members = np.flatnonzero(codes == code)
+        positions.append(members if quota >= len(members) else rng.choice(members, size=quota, replace=False))
+    positions = np.sort(np.concatenate(positions))
+    return df.iloc[positions]
+
+
+def grid_bin(df: pd.DataFrame, x: str, y: str, by: Optional[str] = 'Division', bins: int = 60,
+             measures: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Aggregates points onto a bins x bins grid (per group), returning one marker per occupied cell.
+
+    Args:
+        df (pd.DataFrame): The rows to bin.
+        x (str): Column for the horizontal axis.
+        y (str): Column for the vertical axis.
+        by (Optional[str]): Optional grouping column kept as its own colour.
+        bins (int): Number of cells along each axis.
+        measures (Sequence[str]): Additional columns to sum per cell.
+
+    Returns:
+        pd.DataFrame: Cell centers in x and y, the grouping column, 'Count' and summed measures.
+    """
+    data = df[[c for c in [x, y, by, *measures] if c is not None]].dropna(subset=[x, y])
+    if data.empty:
+        return data.assign(Count=pd.Series(dtype='int64'))
+
+    def _edges(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        lo, hi = values.min(), values.max()
+        if lo == hi:
+            hi = lo + 1
+        edges = np.linspace(lo, hi, bins + 1)
+        idx = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+        centers = (edges[:-1] + edges[1:]) / 2
+        return idx, centers
+
+    x_idx, x_centers = _edges(data[x].to_numpy(dtype=np.float64))
+    y_idx, y_centers = _edges(data[y].to_numpy(dtype=np.float64))
+
+    keys = {'_x': x_idx, '_y': y_idx}
+    if by is not None:
+        keys[by] = data[by].to_numpy()
+    cells = pd.DataFrame(keys)
+    agg: Dict[str, pd.Series] = {'Count': pd.Series(1, index=cells.index)}
+    for m in measures:
+        agg[m] = pd.Series(data[m].to_numpy(), index=cells.index)
+    cells = cells.assign(**agg).groupby(list(keys), observed=True, sort=False).sum().reset_index()
+
+    cells[x] = x_centers[cells['_x']]
+    cells[y] = y_centers[cells['_y']]
+    return cells.drop(columns=['_x', '_y'])
+
+
+def reduce_scatter_data(df: pd.DataFrame, x: str, y: str, by: Optional[str] = 'Division',
+                        max_points: int = DEFAULT_POINT_BUDGET, method: str = 'sample',
+                        measures: Sequence[str] = ()) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """
+    Returns the data to plot for a scatter, reduced to the point budget when there are more rows than that.
+
+    Args:
+        df (pd.DataFrame): The rows to plot.
+        x (str): Column for the horizontal axis.
+        y (str): Column for the vertical axis.
+        by (Optional[str]): Colour / stratification column.
+        max_points (int): The point budget. Frames at or under it are returned unchanged.
+        method (str): 'sample' for a stratified sample (keeps row-level hover data) or 'bin' for grid density.
+        measures (Sequence[str]): Columns summed per cell when binning.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, object]]: The plot data and a description with 'method', 'rows' and 'points'.
+    """
+    if len(df) <= max_points:
+        return df, {'method': 'exact', 'rows': len(df), 'points': len(df)}
+    if method == 'bin':
+        # Pick a grid resolution whose cell count roughly matches the budget
+        groups = df[by].nunique() if by in df.columns else 1
+        bins = max(10, int(np.sqrt(max_points / max(groups, 1))))
+        reduced = grid_bin(df, x, y, by=by if by in df.columns else None, bins=bins, measures=measures)
+    else:
+        reduced = stratified_sample(df, max_points, by=by)
+    return reduced, {'method': method, 'rows': len(df), 'points': len(reduced)}
@@ -0,0 +1,367 @@
+import sys
+import os
+import re
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Add analysis directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.snapshot import load_prepared_data, load_snapshot, save_snapshot
+from analysis.dates import date_range_positions
+from analysis.exports import write_excel_report
+from analysis.instrumentation import report_error
+from analysis.report_generator import compute_report_sections, write_report
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "Nassau Candy Distributor.csv")
+
+# A filter spec is a flat dict: 'name', optional 'start_date' / 'end_date' / 'margin_threshold', and any
+# other key is a column mapped to one value or a list of allowed values, e.g.
+# {"name": "Texas", "State/Province": "Texas", "start_date": "2024-01-01"}
+FilterSpec = Dict[str, Any]
+SPEC_OPTIONS = ('name', 'start_date', 'end_date', 'margin_threshold')
+OUTPUT_FORMATS = ('txt', 'json', 'xlsx')
+
+# Sheet names of the xlsx output, keyed by report section
+EXCEL_SHEETS = {
+    'prod_stats': 'Product Performance',
+    'div_stats': 'Division Performance',
+    'pareto_df': 'Pareto',
+    'cost_breakdown': 'Cost Breakdown',
+    'monthly': 'Monthly Trends',
+    'state_stats': 'State Performance',
+    'cust_stats': 'Customer Insights',
+}
+
+# Set in the parent before the pool starts: forked workers inherit it, spawned workers load it once each
+_SHARED_FRAME: Optional[Tuple[str, pd.DataFrame]] = None
+
+
+def specs_by(df: pd.DataFrame, columns: Sequence[str], base: Optional[FilterSpec] = None) -> List[FilterSpec]:
+    """
+    Builds one filter spec per distinct value of each column, e.g. one report per Division and per State.
+
+    Args:
+        df (pd.DataFrame): The engineered dataframe.
+        columns (Sequence[str]): Columns to split on.
+        base (Optional[FilterSpec]): Options and filters shared by every spec (e.g. a date range).
+
+    Returns:
+        List[FilterSpec]: The specs, column by column, values in sorted order.
+    """
+    specs = []
+    for column in columns:
+        for value in sorted(df[column].dropna().unique().tolist(), key=str):
+            specs.append({**(base or {}), 'name': f"{column}={value}", column: value})
+    return specs
+
+
+def spec_rows(df: pd.DataFrame, spec: FilterSpec) -> np.ndarray:
+    """
+    Evaluates a filter spec as a boolean row mask over df.
+
+    The date range is located by binary search on the sorted frame; the other conditions are only
+    evaluated inside it.
+
+    Args:
+        df (pd.DataFrame): The engineered dataframe, sorted by Order Date.
+        spec (FilterSpec): The filter spec.
+
+    Returns:
+        np.ndarray: Boolean mask of the matching rows.
+    """
+    mask = np.zeros(len(df), dtype=bool)
+    start, stop = (0, len(df))
+    if spec.get('start_date') is not None or spec.get('end_date') is not None:
+        start, stop = date_range_positions(df, spec.get('start_date'), spec.get('end_date'))
+    window = slice(start, stop)
+
+    selected = np.ones(stop - start, dtype=bool)
+    for column, allowed in spec.items():
+        if column in SPEC_OPTIONS:
+            continue
+        if column not in df.columns:
+            raise KeyError(f"Unknown filter column '{column}'")
+        values = allowed if isinstance(allowed, (list, tuple, set)) else [allowed]
+        selected &= df[column].iloc[window].isin(values).to_numpy()
+    if spec.get('margin_threshold') is not None:
+        selected &= (df['Gross Margin (%)'].iloc[window] >= spec['margin_threshold']).to_numpy()
+    mask[window] = selected
+    return mask
+
+
+def _json_value(value: Any) -> Any:
+    """Converts NumPy/pandas scalars into JSON-serializable Python values (None for missing)."""
+    if isinstance(value, (pd.Timestamp, pd.Period)):
+        return str(value)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _frame_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Turns a section frame into records, keeping a named index as a column."""
+    if frame.index.name is not None:
+        frame = frame.reset_index()
+    return [{str(k): _json_value(v) for k, v in record.items()} for record in frame.to_dict(orient='records')]
+
+
+def write_report_json(path: str, sections: Dict[str, Any], spec: FilterSpec) -> None:
+    """
+    Writes the report sections as a JSON document.
+
+    Args:
+        path (str): Destination file.
+        sections (Dict[str, Any]): Output of compute_report_sections.
+        spec (FilterSpec): The spec the report was built for, recorded in the document.
+    """
+    document = {'Filter': {k: _json_value(v) if not isinstance(v, (list, tuple, set)) else [_json_value(x) for x in v]
+                           for k, v in spec.items()}}
+    for key, value in sections.items():
+        document[key] = _frame_records(value) if isinstance(value, pd.DataFrame) else _json_value(value)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+
+
+def write_report_excel(path: str, sections: Dict[str, Any]) -> None:
+    """
+    Writes the report sections as a workbook: a Summary sheet of the scalar metrics, then one sheet per section.
+
+    Args:
+        path (str): Destination .xlsx file.
+        sections (Dict[str, Any]): Output of compute_report_sections.
+    """
+    summary = pd.DataFrame({
+        'Metric': ['Total Sales', 'Total Gross Profit', 'Overall Gross Margin (%)', 'Total Units',
+                   'Products', 'Cost-Margin Correlation'],
+        'Value': [sections['total_sales'], sections['total_profit'],
+                  sections['total_profit'] / sections['total_sales'] * 100, sections['total_units'],
+                  sections['total_products'], sections['cost_margin_corr']],
+    })
+    sheets = {'Summary': summary}
+    for key, sheet_name in EXCEL_SHEETS.items():
+        frame = sections[key]
+        sheets[sheet_name] = frame.reset_index() if frame.index.name is not None else frame
+    write_excel_report(path, sheets)
+
+
+def file_stems(specs: Sequence[FilterSpec]) -> List[str]:
+    """
+    Derives a unique, filesystem-safe file name stem per spec from its name.
+
+    Args:
+        specs (Sequence[FilterSpec]): The specs, in output order.
+
+    Returns:
+        List[str]: One stem per spec; repeated names get a numeric suffix.
+    """
+    stems, seen = [], {}
+    for i, spec in enumerate(specs):
+        stem = re.sub(r'[^A-Za-z0-9._=-]+', '_', str(spec.get('name') or f"report-{i + 1}")).strip('_') or f"report-{i + 1}"
+        count = seen.get(stem.lower(), 0)
+        seen[stem.lower()] = count + 1
+        stems.append(stem if count == 0 else f"{stem}-{count + 1}")
+    return stems
+
+
+def render_report(df: pd.DataFrame, spec: FilterSpec, stem: str, output_dir: str,
+                  formats: Sequence[str] = ('txt',)) -> Dict[str, Any]:
+    """
+    Computes the report sections for one filter spec and writes them in every requested format.
+
+    Args:
+        df (pd.DataFrame): The engineered dataframe.
+        spec (FilterSpec): The filter spec.
+        stem (str): Output file name without extension.
+        output_dir (str): Destination directory.
+        formats (Sequence[str]): Any of OUTPUT_FORMATS.
+
+    Returns:
+        Dict[str, Any]: Manifest entry: 'Report', 'Rows', 'Status' ('ok', 'empty' or 'error'), 'Seconds', 'Files'.
+    """
+    start = time.perf_counter()
+    entry = {'Report': spec.get('name') or stem, 'Rows': 0, 'Status': 'ok', 'Seconds': 0.0, 'Files': []}
+    try:
+        rows = spec_rows(df, spec)
+        entry['Rows'] = int(rows.sum())
+        if entry['Rows'] == 0:
+            entry['Status'] = 'empty'
+        else:
+            sections = compute_report_sections(df, rows=rows)
+            for fmt in formats:
+                path = os.path.join(output_dir, f"{stem}.{fmt}")
+                if fmt == 'txt':
+                    write_report(path, sections)
+                elif fmt == 'json':
+                    write_report_json(path, sections, spec)
+                elif fmt == 'xlsx':
+                    write_report_excel(path, sections)
+                else:
+                    raise ValueError(f"Unknown report format '{fmt}'")
+                entry['Files'].append(path)
+    except Exception as e:
+        report_error(f"rendering report {entry['Report']}", e)
+        entry['Status'] = 'error'
+    entry['Seconds'] = time.perf_counter() - start
+    return entry
+
+
+def _init_worker(token: str, data_path: str, cache_dir: Optional[str], frame_path: Optional[str] = None) -> None:
+    """
+    Gives each worker the shared frame: inherited when forked, otherwise loaded once from frame_path (a
+    caller-supplied frame persisted by the parent) or from the source file's snapshot.
+    """
+    global _SHARED_FRAME
+    if _SHARED_FRAME is None or _SHARED_FRAME[0] != token:
+        df = load_snapshot(frame_path, memory_map=True) if frame_path else load_prepared_data(data_path, cache_dir)
+        _SHARED_FRAME = (token, df)
+
+
+def _render_batch(jobs: List[Tuple[FilterSpec, str]], output_dir: str, formats: Sequence[str]) -> List[Dict[str, Any]]:
+    """Renders a batch of (spec, stem) jobs against the worker's shared frame."""
+    df = _SHARED_FRAME[1]
+    return [render_report(df, spec, stem, output_dir, formats) for spec, stem in jobs]
+
+
+def run_report_pack(specs: Sequence[FilterSpec], output_dir: str, formats: Sequence[str] = ('txt', 'json'),
+                    data_path: str = DATA_PATH, cache_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                    batch_size: int = 8, df: Optional[pd.DataFrame] = None,
+                    start_method: Optional[str] = None) -> pd.DataFrame:
+    """
+    Renders one report per filter spec from a single load of the dataset, spreading the specs over a process pool.
+
+    The engineered frame is loaded once in the parent. Workers forked from it share its memory, while spawned
+    workers (Windows, macOS, forkserver) read a snapshot once each instead of re-running the pipeline: the
+    source file's snapshot, or, when df is supplied, a temporary snapshot of df, so every start method reports
+    on the same rows. If that snapshot cannot be written the reports are rendered inline. Each task carries
+    only a batch of specs, and workers write their report files directly. A manifest.json listing every
+    report is written to output_dir.
+
+    Args:
+        specs (Sequence[FilterSpec]): The reports to produce, e.g. from specs_by.
+        output_dir (str): Destination directory (created if missing).
+        formats (Sequence[str]): Any of OUTPUT_FORMATS.
+        data_path (str): Source CSV.
+        cache_dir (Optional[str]): Snapshot directory. Defaults to data/.cache.
+        max_workers (Optional[int]): Worker processes. Defaults to os.cpu_count(); 1 renders inline.
+        batch_size (int): Specs sent to a worker per task.
+        df (Optional[pd.DataFrame]): An already loaded engineered frame to report on instead of data_path.
+        start_method (Optional[str]): Worker start method ('fork', 'spawn' or 'forkserver'). Defaults to the
+            platform's.
+
+    Returns:
+        pd.DataFrame: The manifest: one row per spec with 'Report', 'Rows', 'Status', 'Seconds' and 'Files'.
+        Empty if the data could not be loaded.
+    """
+    global _SHARED_FRAME
+    unknown = set(formats) - set(OUTPUT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown report formats: {sorted(unknown)}")
+
+    start = time.perf_counter()
+    supplied = df is not None
+    if df is None:
+        df = load_prepared_data(data_path, cache_dir)
+        if df is None:
+            print("Failed to load data")
+            return pd.DataFrame()
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = list(zip(specs, file_stems(specs)))
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+    max_workers = max_workers or os.cpu_count() or 1
+    context = multiprocessing.get_context(start_method)
+
+    token = f"{os.getpid()}-{time.perf_counter_ns()}"
+    _SHARED_FRAME = (token, df)
+    frame_path = None
+    try:
+        if max_workers > 1 and len(batches) > 1 and supplied and context.get_start_method() != 'fork':
+            # Only forked workers inherit the caller's frame; the others must not fall back to data_path
+            fd, frame_path = tempfile.mkstemp(prefix="report_pack-", suffix=".arrow")
+            os.close(fd)
+            if not save_snapshot(df, frame_path):
+                max_workers = 1
+        if max_workers == 1 or len(batches) <= 1:
+            outputs = [_render_batch(batch, output_dir, formats) for batch in batches]
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(batches)), mp_context=context,
+                                     initializer=_init_worker,
+                                     initargs=(token, data_path, cache_dir, frame_path)) as executor:
+                outputs = list(executor.map(_render_batch, batches, [output_dir] * len(batches),
+                                            [formats] * len(batches)))
+    finally:
+        _SHARED_FRAME = None
+        if frame_path:
+            try:
+                os.remove(frame_path)
+            except OSError:
+                pass
+
+    manifest = pd.DataFrame([entry for batch in outputs for entry in batch],
+                            columns=['Report', 'Rows', 'Status', 'Seconds', 'Files'])
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump({
+            'Reports': len(manifest),
+            'Workers': max_workers,
+            'Seconds': time.perf_counter() - start,
+            'Entries': manifest.to_dict(orient='records'),
+        }, f, indent=2, default=_json_value)
+    return manifest
+
+
+def load_specs(path: str) -> List[FilterSpec]:
+    """
+    Reads filter specs from a JSON file holding a list of spec objects.
+
+    Args:
+        path (str): The JSON file.
+
+    Returns:
+        List[FilterSpec]: The specs.
+    """
+    with open(path) as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError("A spec file must contain a JSON list of filter specs")
+    return specs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a pack of filtered profitability reports in one run.")
+    parser.add_argument("output_dir", help="Directory for the reports and manifest.json.")
+    parser.add_argument("--by", nargs="+", default=[], help="Columns to split on, one report per value (e.g. Division Region).")
+    parser.add_argument("--specs", help="JSON file with a list of filter specs.")
+    parser.add_argument("--all", action="store_true", help="Also render an unfiltered report.")
+    parser.add_argument("--start-date", help="Inclusive start date applied to every report.")
+    parser.add_argument("--end-date", help="Inclusive end date applied to every report.")
+    parser.add_argument("--formats", nargs="+", default=["txt", "json"], choices=OUTPUT_FORMATS)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count).")
+    parser.add_argument("--data", default=DATA_PATH, help="Source CSV.")
+    args = parser.parse_args()
+
+    data = load_prepared_data(args.data)
+    if data is None:
+        print("Failed to load data")
+        sys.exit(1)
+
+    base = {k: v for k, v in (('start_date', args.start_date), ('end_date', args.end_date)) if v is not None}
+    pack = ([{**base, 'name': 'All'}] if args.all else []) + specs_by(data, args.by, base)
+    if args.specs:
+        pack += [{**base, **spec} for spec in load_specs(args.specs)]
+    if not pack:
+        parser.error("nothing to render: pass --by, --specs or --all")
+
+    result = run_report_pack(pack, args.output_dir, args.formats, data_path=args.data,
+                             max_workers=args.workers, df=data)
+    print(result.drop(columns='Files').to_string(index=False))
+    print(f"{(result['Status'] == 'ok').sum()} of {len(result)} reports written to {args.output_dir}")
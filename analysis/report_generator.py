@@ -1,91 +1,229 @@
 import sys
 import os
+import warnings
 import pandas as pd
 import numpy as np
+from typing import Any, Dict, Optional
 
 # Add analysis directory to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from analysis.data_processing import load_data, clean_data, feature_engineering
+from analysis.snapshot import load_prepared_data
+from analysis.data_processing import iter_prepared_chunks
+from analysis import instrumentation
+from analysis.topk import pareto_count
+from analysis.views import RowSelection, masked_sum, take_columns
 
-def generate_report_stats():
-    # Load Data
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, "..", "data", "Nassau Candy Distributor.csv")
-    output_path = os.path.join(script_dir, "report_stats.txt")
-    
-    df = load_data(data_path)
-    if df is None:
-        print("Failed to load data")
-        return
+def compute_report_sections(df: pd.DataFrame, rows: RowSelection = None) -> Dict[str, Any]:
+    """
+    Computes every value written to the report from an in-memory dataframe.
 
-    df = clean_data(df)
-    df = feature_engineering(df)
-    
+    Args:
+        df (pd.DataFrame): The cleaned and engineered dataframe.
+        rows (RowSelection): Optional boolean mask or positions over df to report on instead of every row.
+
+    Returns:
+        Dict[str, Any]: The report sections, as consumed by write_report.
+    """
     # Import analysis functions
     from analysis.insights import (
-        get_product_profitability, 
-        get_division_performance, 
-        get_pareto_data, 
-        get_monthly_trends, 
-        get_state_performance, 
-        get_cost_breakdown, 
-        get_customer_profitability
+        get_product_profitability,
+        get_division_performance,
+        get_pareto_data,
+        get_monthly_trends,
+        get_state_performance,
+        get_cost_breakdown,
+        get_customer_profitability,
+        aggregate_dimensions
     )
 
+    # One aggregation pass shared by every per-dimension section
+    aggregates = aggregate_dimensions(df, rows=rows)
+    prod_stats = get_product_profitability(df, aggregates)
+    cost_margin = take_columns(df, ['Cost', 'Gross Margin (%)'], rows)
+    with warnings.catch_warnings():
+        # Selections of a single order (or constant columns) have no correlation; report NaN quietly
+        warnings.simplefilter("ignore", RuntimeWarning)
+        cost_margin_corr = cost_margin['Cost'].corr(cost_margin['Gross Margin (%)'])
+
+    return {
+        'total_sales': masked_sum(df['Sales'], rows),
+        'total_profit': masked_sum(df['Gross Profit'], rows),
+        'total_units': masked_sum(df['Units'], rows),
+        'prod_stats': prod_stats,
+        'div_stats': get_division_performance(df, aggregates),
+        'pareto_df': get_pareto_data(df, aggregates),
+        'total_products': len(prod_stats),
+        'cost_margin_corr': cost_margin_corr,
+        'cost_breakdown': get_cost_breakdown(df, rows=rows),
+        'monthly': get_monthly_trends(df, rows=rows),
+        'state_stats': get_state_performance(df, aggregates),
+        'cust_stats': get_customer_profitability(df, aggregates),
+    }
+
+def compute_report_sections_streaming(data_path: str, chunksize: int = 250_000) -> Dict[str, Any]:
+    """
+    Computes the report sections by streaming the CSV in chunks, in memory bounded by key cardinality.
+
+    Args:
+        data_path (str): The path to the source CSV.
+        chunksize (int): Number of rows per chunk.
+
+    Returns:
+        Dict[str, Any]: The report sections, as consumed by write_report.
+    """
+    from analysis.streaming import StreamingAggregator
+
+    return compute_report_sections_from_aggregates(StreamingAggregator().consume(iter_prepared_chunks(data_path, chunksize=chunksize)))
+
+def compute_report_sections_from_aggregates(agg) -> Dict[str, Any]:
+    """
+    Computes the report sections from running aggregates, e.g. the ones kept up to date by analysis/ingest.py.
+
+    Args:
+        agg (StreamingAggregator): The aggregates.
+
+    Returns:
+        Dict[str, Any]: The report sections, as consumed by write_report.
+    """
+    prod_stats = agg.product_profitability()
+    return {
+        'total_sales': agg.total('Sales'),
+        'total_profit': agg.total('Gross Profit'),
+        'total_units': agg.total('Units'),
+        'prod_stats': prod_stats,
+        'div_stats': agg.division_performance(),
+        'pareto_df': agg.pareto_data(),
+        'total_products': len(prod_stats),
+        'cost_margin_corr': agg.cost_margin_correlation(),
+        'cost_breakdown': agg.cost_breakdown(),
+        'monthly': agg.monthly_trends(),
+        'state_stats': agg.state_performance(),
+        'cust_stats': agg.customer_profitability(),
+    }
+
+def write_report(output_path: str, sections: Dict[str, Any], performance: Optional[pd.DataFrame] = None) -> None:
+    """
+    Writes the plain-text report from precomputed sections.
+
+    Args:
+        output_path (str): Destination file.
+        sections (Dict[str, Any]): Output of any of the compute_report_sections* functions.
+        performance (Optional[pd.DataFrame]): Stage timings from instrumentation.stage_report, appended as a
+            final section when given.
+    """
     with open(output_path, "w") as f:
         # 1. Overall Metrics
         f.write("--- Executive Summary Metrics ---\n")
-        f.write(f"Total Sales: ${df['Sales'].sum():,.2f}\n")
-        f.write(f"Total Gross Profit: ${df['Gross Profit'].sum():,.2f}\n")
-        f.write(f"Overall Gross Margin: {(df['Gross Profit'].sum() / df['Sales'].sum() * 100):.2f}%\n")
-        f.write(f"Total Units: {df['Units'].sum():,.0f}\n\n")
-        
+        f.write(f"Total Sales: ${sections['total_sales']:,.2f}\n")
+        f.write(f"Total Gross Profit: ${sections['total_profit']:,.2f}\n")
+        f.write(f"Overall Gross Margin: {(sections['total_profit'] / sections['total_sales'] * 100):.2f}%\n")
+        f.write(f"Total Units: {sections['total_units']:,.0f}\n\n")
+
         # 2. Product Performance
-        prod_stats = get_product_profitability(df)
+        prod_stats = sections['prod_stats']
         f.write("--- Product Performance ---\n")
         f.write(f"Top Product: {prod_stats.iloc[0]['Product Name']} (${prod_stats.iloc[0]['Gross Profit']:,.2f})\n")
         f.write(f"Bottom Product: {prod_stats.iloc[-1]['Product Name']} (${prod_stats.iloc[-1]['Gross Profit']:,.2f})\n\n")
-        
+
         # 3. Division Analysis
-        div_stats = get_division_performance(df)
+        div_stats = sections['div_stats']
         f.write("--- Division Performance ---\n")
         f.write(div_stats.to_string() + "\n\n")
-        
+
         # 4. Pareto Analysis
-        pareto_df = get_pareto_data(df)
-        total_profit = df['Gross Profit'].sum()
-        count_80 = pareto_df[pareto_df['Cumulative Percentage'] <= 80].shape[0]
-        total_products = df['Product Name'].nunique()
+        pareto_df = sections['pareto_df']
+        count_80 = pareto_count(pareto_df['Gross Profit'], 80)
+        total_products = sections['total_products']
         f.write("--- Pareto Analysis ---\n")
         f.write(f"Products for 80% Profit: {count_80} out of {total_products} ({count_80/total_products*100:.1f}%)\n\n")
-        
+
         # 5. Cost Diagnostics
         f.write("--- Cost Diagnostics ---\n")
-        f.write(f"Cost-Margin Correlation: {df['Cost'].corr(df['Gross Margin (%)']):.4f}\n")
-        
-        cost_breakdown = get_cost_breakdown(df)
+        f.write(f"Cost-Margin Correlation: {sections['cost_margin_corr']:.4f}\n")
+
+        cost_breakdown = sections['cost_breakdown']
         f.write("\nSimulated Cost Breakdown:\n")
         f.write(cost_breakdown.to_string() + "\n\n")
 
         # 6. Temporal Trends
-        monthly = get_monthly_trends(df)
+        monthly = sections['monthly']
         f.write("--- Temporal Trends ---\n")
         f.write(monthly.to_string() + "\n\n")
 
         # 7. Geospatial Insights
-        state_stats = get_state_performance(df)
+        state_stats = sections['state_stats']
         f.write("--- Top 5 States ---\n")
         f.write(state_stats.head(5).to_string() + "\n\n")
 
         # 8. Customer Insights
-        cust_stats = get_customer_profitability(df)
+        cust_stats = sections['cust_stats']
         f.write("--- Customer Insights ---\n")
         f.write(f"Total Customers: {len(cust_stats)}\n")
         f.write(f"Avg Profit/Customer: ${cust_stats['Gross Profit'].mean():,.2f}\n")
         f.write(f"Top 5 Customers:\n{cust_stats.head(5).to_string()}\n")
 
+        # 9. Performance (only when the run was instrumented; timings differ between runs)
+        if performance is not None:
+            f.write("\n--- Performance ---\n")
+            f.write(instrumentation.format_stage_report(performance) + "\n")
+
+def _compute_sections(streaming: bool, chunksize: int, stored: bool, data_path: Optional[str],
+                      cache_dir: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Computes the report sections in the requested mode, or returns None if the data could not be loaded."""
+    # Load Data
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = data_path or os.path.join(script_dir, "..", "data", "Nassau Candy Distributor.csv")
+
+    if stored:
+        from analysis.ingest import load_aggregates
+
+        agg = load_aggregates(data_path, cache_dir)
+        if agg is None:
+            return None
+        with instrumentation.stage('compute_report_sections_from_aggregates'):
+            return compute_report_sections_from_aggregates(agg)
+    if streaming:
+        with instrumentation.stage('compute_report_sections_streaming'):
+            sections = compute_report_sections_streaming(data_path, chunksize=chunksize)
+        return sections if len(sections['prod_stats']) else None
+
+    df = load_prepared_data(data_path, cache_dir)
+    if df is None:
+        return None
+    with instrumentation.stage('compute_report_sections', rows_in=len(df)):
+        return compute_report_sections(df)
+
+def generate_report_stats(streaming: bool = False, chunksize: int = 250_000, stored: bool = False,
+                          data_path: Optional[str] = None, output_path: Optional[str] = None,
+                          cache_dir: Optional[str] = None, profile: bool = False):
+    """
+    Generates report_stats.txt for the whole dataset.
+
+    Args:
+        streaming (bool): Stream the CSV in chunks instead of loading it, for files larger than memory.
+        chunksize (int): Number of rows per chunk in streaming mode.
+        stored (bool): Use the stored aggregates maintained by incremental ingestion instead of reading any rows.
+        data_path (Optional[str]): Source CSV. Defaults to the shipped order file.
+        output_path (Optional[str]): Report destination. Defaults to analysis/report_stats.txt.
+        cache_dir (Optional[str]): Snapshot directory. Defaults to data/.cache.
+        profile (bool): Record wall time, rows and peak memory per stage and append them as a Performance section.
+    """
+    if profile:
+        instrumentation.enable(memory=True)
+    try:
+        sections = _compute_sections(streaming, chunksize, stored, data_path, cache_dir)
+    finally:
+        if profile:
+            instrumentation.disable()
+    if sections is None:
+        print("Failed to load data")
+        return
+
+    output_path = output_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_stats.txt")
+    write_report(output_path, sections, instrumentation.stage_report() if profile else None)
+
     print(f"Report generated at {output_path}")
 
 if __name__ == "__main__":
-    generate_report_stats()
+    generate_report_stats(streaming="--streaming" in sys.argv, stored="--stored" in sys.argv, profile="--profile" in sys.argv)
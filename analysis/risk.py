@@ -0,0 +1,195 @@
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from analysis.instrumentation import instrument, report_error
+from analysis.scenario import scenario_components
+from analysis.streaming import merge_moments
+from analysis.views import RowSelection
+
+# Shock factors, in the order used by the correlation matrix
+RISK_FACTORS = ['Price', 'Manufacturing Cost', 'Shipping Cost']
+
+# Default factor correlation: cost shocks move together, and prices partly pass cost shocks through
+DEFAULT_FACTOR_CORRELATION = [
+    [1.0, 0.3, 0.2],
+    [0.3, 1.0, 0.5],
+    [0.2, 0.5, 1.0],
+]
+
+QUANTILES = [0.01, 0.05, 0.10, 0.25, 0.50, 0.75, 0.90, 0.95, 0.99]
+
+
+def _simulate_chunk(rng: np.random.Generator, base: np.ndarray, chol: np.ndarray, vols: np.ndarray,
+                    group_corr: float, n: int) -> np.ndarray:
+    """
+    Draws n trials of correlated shocks and returns the per-group profit of each trial.
+
+    Shocks follow a one-factor model across groups: every group shares a market shock (weight sqrt(group_corr))
+    and adds an idiosyncratic one, and within each shock the three factors are correlated through chol.
+
+    Args:
+        rng (np.random.Generator): Random source.
+        base (np.ndarray): Shape (groups, 4) with costed Sales, Manufacturing, Shipping and fixed cost per group.
+        chol (np.ndarray): Cholesky factor of the 3x3 factor correlation matrix.
+        vols (np.ndarray): Shock standard deviations as fractions (price, mfg, shipping).
+        group_corr (float): Correlation of the same factor between two groups.
+        n (int): Number of trials.
+
+    Returns:
+        np.ndarray: Shape (n, groups) of simulated gross profit.
+    """
+    groups = base.shape[0]
+    common = rng.standard_normal((n, 1, 3))
+    own = rng.standard_normal((n, groups, 3))
+    z = np.sqrt(group_corr) * common + np.sqrt(1 - group_corr) * own
+    shocks = (z @ chol.T) * vols  # (n, groups, 3)
+
+    sales = base[:, 0] * (1 + shocks[:, :, 0])
+    cost = base[:, 1] * (1 + shocks[:, :, 1]) + base[:, 2] * (1 + shocks[:, :, 2]) + base[:, 3]
+    return sales - cost
+
+
+def _simulate_worker(seed: Any, n_trials: int, chunk_size: int, tail_size: int, base: np.ndarray, chol: np.ndarray,
+                     vols: np.ndarray, group_corr: float) -> Dict[str, np.ndarray]:
+    """
+    Runs n_trials in chunks, keeping only streaming aggregates.
+
+    Returns the total profit of every trial (one float per trial), per-group centred moments (trial count,
+    mean and sum of squared deviations, merged across chunks with merge_moments) and the per-group profits
+    of the tail_size worst trials seen so far (for tail contributions).
+    """
+    rng = np.random.default_rng(seed)
+    groups = base.shape[0]
+    totals = np.empty(n_trials)
+    group_n, group_mean, group_m2 = 0, np.zeros(groups), np.zeros(groups)
+    tail_totals = np.empty(0)
+    tail_groups = np.empty((0, groups))
+
+    for start in range(0, n_trials, chunk_size):
+        n = min(chunk_size, n_trials - start)
+        profits = _simulate_chunk(rng, base, chol, vols, group_corr, n)
+        chunk_totals = profits.sum(axis=1)
+        totals[start:start + n] = chunk_totals
+        chunk_mean = profits.mean(axis=0)
+        chunk_m2 = ((profits - chunk_mean) ** 2).sum(axis=0)
+        group_n, group_mean, group_m2 = merge_moments(group_n, group_mean, group_m2, n, chunk_mean, chunk_m2)
+
+        # Keep the worst tail_size trials across chunks without sorting everything
+        tail_totals = np.concatenate([tail_totals, chunk_totals])
+        tail_groups = np.concatenate([tail_groups, profits])
+        if len(tail_totals) > tail_size:
+            keep = np.argpartition(tail_totals, tail_size - 1)[:tail_size]
+            tail_totals, tail_groups = tail_totals[keep], tail_groups[keep]
+
+    return {'totals': totals, 'group_n': group_n, 'group_mean': group_mean, 'group_m2': group_m2,
+            'tail_totals': tail_totals, 'tail_groups': tail_groups}
+
+
+@instrument
+def simulate_profit_risk(df: pd.DataFrame, by: str = 'Division', n_trials: int = 100_000,
+                         price_vol_pct: float = 5.0, mfg_vol_pct: float = 5.0, shipping_vol_pct: float = 10.0,
+                         factor_correlation: Optional[Sequence[Sequence[float]]] = None, group_correlation: float = 0.5,
+                         confidence: float = 0.95, chunk_size: int = 10_000, max_workers: int = 1,
+                         seed: int = 42, rows: RowSelection = None) -> Dict[str, Any]:
+    """
+    Monte Carlo simulation of gross profit under correlated price and cost shocks.
+
+    Uses run_scenario's cost model per group: Sales and Manufacturing/Shipping cost respond to the shocks,
+    Overhead stays fixed. Trials are generated in chunks so memory is bounded by chunk_size x groups, and can
+    be split across worker processes with independent random streams.
+
+    Args:
+        df (pd.DataFrame): The engineered dataframe (raw rows or cube cells).
+        by (str): Column defining the groups that receive their own shocks, e.g. 'Division' or 'Product Name'.
+        n_trials (int): Number of simulated trials.
+        price_vol_pct (float): Standard deviation of the price shock, in percent.
+        mfg_vol_pct (float): Standard deviation of the manufacturing cost shock, in percent.
+        shipping_vol_pct (float): Standard deviation of the shipping cost shock, in percent.
+        factor_correlation (Optional[Sequence[Sequence[float]]]): 3x3 correlation of (price, mfg, shipping) shocks.
+        group_correlation (float): Correlation of the same shock between two groups, in [0, 1].
+        confidence (float): Confidence level for VaR and expected shortfall, e.g. 0.95.
+        chunk_size (int): Trials generated per chunk.
+        max_workers (int): Worker processes; 1 runs inline.
+        seed (int): Seed for reproducible results.
+        rows (RowSelection): Optional boolean mask or positions over df to simulate instead of every row.
+
+    Returns:
+        Dict[str, Any]: 'Summary' (dict of headline metrics), 'Quantiles' (DataFrame), 'Contributions'
+        (DataFrame per group) and 'Trials' (total profit per trial). Returns an empty dict if an error occurs.
+    """
+    try:
+        components = scenario_components(df, by=by, rows=rows)
+        base_frame = pd.DataFrame({
+            # Sales of the fully costed rows, the ones that carry a scenario profit (see scenario_components)
+            'Sales': components['Costed Sales'],
+            'Manufacturing Cost': components['Manufacturing Cost'],
+            'Shipping Cost': components['Shipping Cost'],
+            'Fixed Cost': components['Fixed Cost']
+        }).fillna(0.0)
+        base = base_frame.to_numpy(dtype=np.float64)
+        baseline_groups = base[:, 0] - base[:, 1] - base[:, 2] - base[:, 3]
+        baseline = baseline_groups.sum()
+
+        corr = np.asarray(factor_correlation if factor_correlation is not None else DEFAULT_FACTOR_CORRELATION, dtype=np.float64)
+        chol = np.linalg.cholesky(corr)
+        vols = np.array([price_vol_pct, mfg_vol_pct, shipping_vol_pct]) / 100
+        alpha = 1 - confidence
+        tail_size = max(1, int(np.ceil(alpha * n_trials)))
+
+        # Split trials across workers with independent, reproducible random streams
+        max_workers = max(1, min(max_workers, n_trials))
+        seeds = np.random.SeedSequence(seed).spawn(max_workers)
+        shares = np.diff(np.linspace(0, n_trials, max_workers + 1).astype(int))
+        jobs = [(s, int(n), chunk_size, tail_size, base, chol, vols, group_correlation) for s, n in zip(seeds, shares) if n > 0]
+        if len(jobs) == 1:
+            parts: List[Dict[str, np.ndarray]] = [_simulate_worker(*jobs[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+                parts = list(executor.map(_simulate_worker, *zip(*jobs)))
+
+        totals = np.concatenate([p['totals'] for p in parts])
+        group_n, group_mean, group_m2 = parts[0]['group_n'], parts[0]['group_mean'], parts[0]['group_m2']
+        for p in parts[1:]:
+            group_n, group_mean, group_m2 = merge_moments(group_n, group_mean, group_m2,
+                                                          p['group_n'], p['group_mean'], p['group_m2'])
+        group_std = np.sqrt(group_m2 / group_n)
+        tail_totals = np.concatenate([p['tail_totals'] for p in parts])
+        tail_groups = np.concatenate([p['tail_groups'] for p in parts])
+        worst = np.argpartition(tail_totals, tail_size - 1)[:tail_size]
+        tail_totals, tail_groups = tail_totals[worst], tail_groups[worst]
+
+        var_threshold = tail_totals.max()  # the alpha-quantile of the total profit distribution
+        expected_shortfall_profit = tail_totals.mean()
+
+        summary = {
+            'Trials': n_trials,
+            'Baseline Profit': baseline,
+            'Mean Profit': totals.mean(),
+            'Std Profit': totals.std(),
+            f'VaR {confidence:.0%}': baseline - var_threshold,
+            f'Expected Shortfall {confidence:.0%}': baseline - expected_shortfall_profit,
+            'Probability Below Baseline': float((totals < baseline).mean()),
+            'Probability of Loss': float((totals < 0).mean())
+        }
+        quantiles = pd.DataFrame({'Quantile': QUANTILES, 'Profit': np.quantile(totals, QUANTILES)})
+        quantiles['Change vs Baseline'] = quantiles['Profit'] - baseline
+
+        tail_mean = tail_groups.mean(axis=0)
+        contributions = pd.DataFrame({
+            by: base_frame.index,
+            'Baseline Profit': baseline_groups,
+            'Mean Profit': group_mean,
+            'Std Profit': group_std,
+            'Tail Mean Profit': tail_mean,
+            'Shortfall Contribution': baseline_groups - tail_mean
+        })
+        total_shortfall = contributions['Shortfall Contribution'].sum()
+        contributions['Shortfall Share (%)'] = 100 * contributions['Shortfall Contribution'] / total_shortfall if total_shortfall else 0.0
+        contributions = contributions.sort_values(by='Shortfall Contribution', ascending=False).reset_index(drop=True)
+
+        return {'Summary': summary, 'Quantiles': quantiles, 'Contributions': contributions, 'Trials': totals}
+    except Exception as e:
+        report_error("in simulate_profit_risk", e)
+        return {}
@@ -1,88 +1,226 @@
 import pandas as pd
-import copy
-from typing import Dict, Any
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
-def run_scenario(df: pd.DataFrame, mfg_cost_change_pct: float, shipping_cost_change_pct: float, price_change_pct: float) -> Dict[str, Any]:
+from analysis.instrumentation import instrument, report_error
+from analysis.views import RowSelection, row_mask, masked_sum, take_columns
+
+# Keys of the metrics dict returned by run_scenario, in display order
+SCENARIO_METRICS = [
+    'Original Sales', 'Original Profit', 'Original Margin',
+    'New Sales', 'New Profit', 'New Margin',
+    'Profit Change', 'Margin Change'
+]
+
+# Share of total Cost assumed for a component when its column is missing
+COST_COMPONENT_FALLBACK_SHARES = {'Manufacturing Cost': 0.7, 'Shipping Cost': 0.2, 'Overhead Cost': 0.1}
+
+# Prefix of the pre-summed measures that pre-aggregated frames (the profit cube) carry, see costed_measures
+COSTED_PREFIX = 'Costed '
+
+
+def _cost_sources(columns) -> Tuple[Dict[str, Tuple[str, float]], List[str]]:
+    """Maps each cost component to its (source column, share) and lists the cost columns the model reads."""
+    # Assuming 'Manufacturing Cost' and 'Shipping Cost' columns exist from feature engineering.
+    # Fallbacks if detailed components are missing: ~70% / ~20% / ~10% of total cost.
+    has_cost = 'Cost' in columns
+    sources = {}
+    for component, share in COST_COMPONENT_FALLBACK_SHARES.items():
+        if component in columns:
+            sources[component] = (component, 1.0)
+        elif has_cost:
+            sources[component] = ('Cost', share)
+    # Without a full breakdown there is no Cost column either, so cost does not respond to the sliders
+    if len(sources) < len(COST_COMPONENT_FALLBACK_SHARES):
+        return sources, []
+    return sources, sorted({col for col, _ in sources.values()})
+
+
+def costed_measures(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """
+    Returns the per-row measures a pre-aggregated frame needs to reproduce scenario_components.
+
+    Summing cells turns missing costs into zeros, which would give incompletely costed rows a scenario profit.
+    These columns hold Sales and each cost column the model reads for fully costed rows and 0 otherwise;
+    scenario_components reads their sums when a frame carries them.
+
+    Args:
+        df (pd.DataFrame): The engineered dataframe.
+
+    Returns:
+        Dict[str, pd.Series]: 'Costed Sales' and 'Costed <column>' for each cost column.
+    """
+    _, cost_columns = _cost_sources(df.columns)
+    complete = df[['Sales'] + cost_columns].notna().all(axis=1)
+    return {COSTED_PREFIX + col: df[col].where(complete, 0.0) for col in ['Sales'] + cost_columns}
+
+
+def scenario_components(df: pd.DataFrame, by: Optional[str] = None, rows: RowSelection = None) -> Dict[str, Any]:
+    """
+    Reduces the dataframe to the column sums the scenario model depends on.
+
+    Every scenario metric is linear in the three percentage changes, so these few sums are enough to evaluate
+    any number of scenarios without touching the rows again.
+
+    Like the row-by-row model, a row whose Sales or any cost component is missing has no scenario profit:
+    the cost bases and 'Costed Sales' are summed over the fully costed rows only, while 'Sales' (which
+    drives New Sales) and 'Gross Profit' keep every row. Pre-aggregated frames answer the same way through
+    the measures of costed_measures.
+
+    Args:
+        df (pd.DataFrame): Input dataframe.
+        by (Optional[str]): If given, sums per value of this column (e.g. 'Division') instead of overall.
+        rows (RowSelection): Optional boolean mask or positions over df; sums are taken over these rows only,
+            directly on the column buffers.
+
+    Returns:
+        Dict[str, Any]: Sales, Gross Profit, Costed Sales and the Manufacturing/Shipping/fixed cost bases, as
+        floats, or as Series indexed by group when by is given.
+    """
+    sources, cost_columns = _cost_sources(df.columns)
+    breakdown = bool(cost_columns)
+    # Pre-aggregated cells carry their fully costed sums; raw rows are checked for completeness here
+    pre_costed = COSTED_PREFIX + 'Sales' in df.columns
+    costed_columns = [COSTED_PREFIX + col for col in ['Sales'] + cost_columns] if pre_costed else []
+    numeric = ['Sales', 'Gross Profit'] + cost_columns + costed_columns
+
+    if by is None:
+        mask = row_mask(rows, len(df))
+        _sum = lambda col: masked_sum(df[col], mask)
+        _costed_sum = _sum
+        if pre_costed:
+            _costed_sum = lambda col: masked_sum(df[COSTED_PREFIX + col], mask)
+        elif cost_columns:
+            complete = df[['Sales'] + cost_columns].notna().all(axis=1).to_numpy()
+            if not complete.all():
+                costed = complete if mask is None else complete & mask
+                _costed_sum = lambda col: masked_sum(df[col], costed)
+    else:
+        data = df if rows is None else take_columns(df, [by] + numeric, rows)
+        grouped = data.groupby(by, observed=True)[numeric].sum()
+        _sum = lambda col: grouped[col]
+        _costed_sum = _sum
+        if pre_costed:
+            _costed_sum = lambda col: grouped[COSTED_PREFIX + col]
+        elif cost_columns:
+            complete = data[['Sales'] + cost_columns].notna().all(axis=1)
+            if not complete.all():
+                costed_grouped = data[numeric].where(complete, 0.0).groupby(data[by], observed=True).sum()
+                _costed_sum = lambda col: costed_grouped[col]
+
+    if breakdown:
+        # New Cost = Manufacturing + Shipping + Overhead (assume fixed)
+        variable_mfg, variable_ship, fixed = (_costed_sum(sources[c][0]) * sources[c][1] for c in COST_COMPONENT_FALLBACK_SHARES)
+    else:
+        variable_mfg = variable_ship = fixed = 0.0
+
+    return {
+        'Sales': _sum('Sales'),
+        'Gross Profit': _sum('Gross Profit'),
+        'Costed Sales': _costed_sum('Sales'),
+        'Manufacturing Cost': variable_mfg,
+        'Shipping Cost': variable_ship,
+        'Fixed Cost': fixed
+    }
+
+def evaluate_scenarios(components: Dict[str, float], params: np.ndarray) -> pd.DataFrame:
+    """
+    Evaluates scenarios from precomputed component sums.
+
+    Args:
+        components (Dict[str, float]): Output of scenario_components.
+        params (np.ndarray): Array of shape (n, 3) with (mfg, shipping, price) percentage changes per scenario.
+
+    Returns:
+        pd.DataFrame: One row per scenario with the parameter columns followed by SCENARIO_METRICS.
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+    mfg_pct, ship_pct, price_pct = params[:, 0], params[:, 1], params[:, 2]
+
+    original_sales = components['Sales']
+    original_profit = components['Gross Profit']
+    original_margin = (original_profit / original_sales) * 100 if original_sales else 0
+
+    new_sales = original_sales * (1 + price_pct / 100)
+    new_cost = (components['Manufacturing Cost'] * (1 + mfg_pct / 100)
+                + components['Shipping Cost'] * (1 + ship_pct / 100)
+                + components['Fixed Cost'])
+    new_profit = components['Costed Sales'] * (1 + price_pct / 100) - new_cost
+    with np.errstate(divide='ignore', invalid='ignore'):
+        new_margin = np.where(new_sales != 0, new_profit / np.where(new_sales != 0, new_sales, 1) * 100, 0.0)
+
+    return pd.DataFrame({
+        'Mfg Cost Change (%)': mfg_pct,
+        'Shipping Cost Change (%)': ship_pct,
+        'Price Change (%)': price_pct,
+        'Original Sales': original_sales,
+        'Original Profit': original_profit,
+        'Original Margin': original_margin,
+        'New Sales': new_sales,
+        'New Profit': new_profit,
+        'New Margin': new_margin,
+        'Profit Change': new_profit - original_profit,
+        'Margin Change': new_margin - original_margin
+    })
+
+@instrument
+def run_scenario_batch(df: pd.DataFrame, params: np.ndarray, rows: RowSelection = None) -> pd.DataFrame:
+    """
+    Evaluates many (mfg, shipping, price) scenarios at once without copying the dataframe.
+
+    Args:
+        df (pd.DataFrame): Input dataframe.
+        params (np.ndarray): Array of shape (n, 3) with percentage changes per scenario.
+        rows (RowSelection): Optional boolean mask or positions over df to evaluate instead of every row.
+
+    Returns:
+        pd.DataFrame: One row per scenario; row.to_dict() matches run_scenario's output plus the parameters.
+        Returns an empty dataframe if an error occurs.
+    """
+    try:
+        return evaluate_scenarios(scenario_components(df, rows=rows), params)
+    except Exception as e:
+        report_error("in run_scenario_batch", e)
+        return pd.DataFrame()
+
+@instrument
+def sensitivity_grid(df: pd.DataFrame, mfg_values: Sequence[float], shipping_values: Sequence[float],
+                     price_values: Sequence[float], rows: RowSelection = None) -> pd.DataFrame:
+    """
+    Evaluates the full cartesian grid of parameter values (e.g. 41 x 41 x 41 slider positions).
+
+    Args:
+        df (pd.DataFrame): Input dataframe.
+        mfg_values (Sequence[float]): Manufacturing cost changes (%).
+        shipping_values (Sequence[float]): Shipping cost changes (%).
+        price_values (Sequence[float]): Sales price changes (%).
+        rows (RowSelection): Optional boolean mask or positions over df to evaluate instead of every row.
+
+    Returns:
+        pd.DataFrame: One row per combination, as returned by run_scenario_batch.
+    """
+    grid = np.stack(np.meshgrid(mfg_values, shipping_values, price_values, indexing='ij'), axis=-1).reshape(-1, 3)
+    return run_scenario_batch(df, grid, rows)
+
+@instrument
+def run_scenario(df: pd.DataFrame, mfg_cost_change_pct: float, shipping_cost_change_pct: float, price_change_pct: float,
+                 rows: RowSelection = None) -> Dict[str, Any]:
     """
     Calculates the impact of cost and price changes on profitability.
-    
+
     Args:
         df (pd.DataFrame): Input dataframe.
         mfg_cost_change_pct (float): Percentage change in manufacturing cost (e.g., 5.0 for +5%).
         shipping_cost_change_pct (float): Percentage change in shipping cost.
         price_change_pct (float): Percentage change in sales price.
-        
+        rows (RowSelection): Optional boolean mask or positions over df to evaluate instead of every row.
+
     Returns:
         Dict[str, Any]: A dictionary containing key metrics for the scenario. Returns default zero-values dict if error occurs.
     """
     try:
-        # Work on a copy to avoid modifying the original dataframe in session state
-        scenario_df = df.copy()
-        
-        # Apply changes
-        # 1. Price Change
-        if price_change_pct != 0:
-            scenario_df['Sales'] = scenario_df['Sales'] * (1 + price_change_pct / 100)
-        
-        # 2. Cost Changes
-        # Assuming 'Manufacturing Cost' and 'Shipping Cost' columns exist from feature engineering
-        if 'Manufacturing Cost' in scenario_df.columns:
-            scenario_df['Manufacturing Cost'] = scenario_df['Manufacturing Cost'] * (1 + mfg_cost_change_pct / 100)
-        else:
-            # Fallback if detailed components are missing (approx 70% of total cost)
-            if 'Cost' in scenario_df.columns:
-                scenario_df['Manufacturing Cost'] = scenario_df['Cost'] * 0.7 * (1 + mfg_cost_change_pct / 100)
-            
-        if 'Shipping Cost' in scenario_df.columns:
-            scenario_df['Shipping Cost'] = scenario_df['Shipping Cost'] * (1 + shipping_cost_change_pct / 100)
-        else:
-            # Fallback (approx 20% of total cost)
-            if 'Cost' in scenario_df.columns:
-                 scenario_df['Shipping Cost'] = scenario_df['Cost'] * 0.2 * (1 + shipping_cost_change_pct / 100)
-            
-        # Recalculate Total Cost (Manufacturing + Shipping + Overhead (assume fixed))
-        # Note: Overhead might not be in the df if it was just created in get_cost_breakdown, 
-        # but feature_engineering adds it.
-        if 'Overhead Cost' not in scenario_df.columns and 'Cost' in scenario_df.columns:
-             scenario_df['Overhead Cost'] = scenario_df['Cost'] * 0.1
-             
-        if 'Manufacturing Cost' in scenario_df.columns and 'Shipping Cost' in scenario_df.columns and 'Overhead Cost' in scenario_df.columns:
-            scenario_df['New Cost'] = scenario_df['Manufacturing Cost'] + scenario_df['Shipping Cost'] + scenario_df['Overhead Cost']
-        elif 'Cost' in scenario_df.columns:
-            # Simplistic fallback if breakdown completely failed
-            scenario_df['New Cost'] = scenario_df['Cost']
-        else:
-            scenario_df['New Cost'] = 0
-        
-        # Recalculate Profit
-        if 'New Cost' in scenario_df.columns:
-            scenario_df['New Gross Profit'] = scenario_df['Sales'] - scenario_df['New Cost']
-        else:
-            scenario_df['New Gross Profit'] = scenario_df['Gross Profit'] # No change if no cost info
-        
-        # Aggregated Metrics
-        original_sales = df['Sales'].sum()
-        original_profit = df['Gross Profit'].sum()
-        original_margin = (original_profit / original_sales) * 100 if original_sales else 0
-        
-        new_sales = scenario_df['Sales'].sum()
-        new_profit = scenario_df['New Gross Profit'].sum()
-        new_margin = (new_profit / new_sales) * 100 if new_sales else 0
-        
-        return {
-            'Original Sales': original_sales,
-            'Original Profit': original_profit,
-            'Original Margin': original_margin,
-            'New Sales': new_sales,
-            'New Profit': new_profit,
-            'New Margin': new_margin,
-            'Profit Change': new_profit - original_profit,
-            'Margin Change': new_margin - original_margin
-        }
+        results = evaluate_scenarios(scenario_components(df, rows=rows), [[mfg_cost_change_pct, shipping_cost_change_pct, price_change_pct]])
+        return {key: results[key].iloc[0] for key in SCENARIO_METRICS}
     except Exception as e:
-        print(f"Error in run_scenario: {e}")
-        return {
-            'Original Sales': 0, 'Original Profit': 0, 'Original Margin': 0,
-            'New Sales': 0, 'New Profit': 0, 'New Margin': 0,
-            'Profit Change': 0, 'Margin Change': 0
-        }
+        report_error("in run_scenario", e)
+        return {key: 0 for key in SCENARIO_METRICS}
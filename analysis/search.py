@@ -0,0 +1,126 @@
+import pandas as pd
+import numpy as np
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+FUZZY_THRESHOLD = 0.6
+
+
+def _normalize(text: str) -> str:
+    """Lowercases text and collapses runs of whitespace, the form names are indexed and queried in."""
+    return " ".join(str(text).lower().split())
+
+
+def _trigrams(text: str) -> set:
+    """Returns the set of 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ProductSearchIndex:
+    """
+    Trigram index over the distinct product names, with a posting list of order rows per product.
+
+    A query is resolved against the distinct names only, so its cost depends on the number of products
+    rather than the number of orders. The matching products are then turned into rows via their posting
+    lists. Names are indexed padded with a space, so word-boundary trigrams are indexed too and help
+    fuzzy matching.
+    """
+
+    def __init__(self, names: Sequence[str], row_order: np.ndarray, bounds: np.ndarray):
+        self.names = np.asarray(names, dtype=object)
+        self._normalized = [_normalize(name) for name in self.names]
+        self._row_order = row_order
+        self._bounds = bounds
+
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for product_id, name in enumerate(self._normalized):
+            for gram in _trigrams(f" {name} "):
+                postings[gram].append(product_id)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, column: str = 'Product Name') -> "ProductSearchIndex":
+        """
+        Builds the index and the product -> rows posting lists from an order table.
+
+        Args:
+            df (pd.DataFrame): The base frame whose row positions the posting lists refer to.
+            column (str): The product name column.
+
+        Returns:
+            ProductSearchIndex: The index.
+        """
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, names = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, names = pd.factorize(values)
+        # Rows grouped by product code, each group in row order; bounds[i]:bounds[i + 1] is product i's list
+        row_order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[row_order], np.arange(len(names) + 1), side='left')
+        return cls(list(names), row_order, bounds)
+
+    def search(self, term: str, prefix: bool = False) -> np.ndarray:
+        """
+        Returns the products whose name contains the term (case-insensitive).
+
+        Terms of three or more characters only verify the products that contain all of the term's trigrams.
+
+        Args:
+            term (str): The search text. An empty term matches every product.
+            prefix (bool): Only match names with a word that starts with the term.
+
+        Returns:
+            np.ndarray: Matching product ids (positions in self.names), in ascending order.
+        """
+        term = _normalize(term)
+        if not term:
+            return np.arange(len(self.names))
+
+        candidates = range(len(self.names))
+        if len(term) >= 3:
+            lists = [self._postings.get(gram) for gram in _trigrams(term)]
+            if any(ids is None for ids in lists):
+                return np.empty(0, dtype=np.int64)
+            candidates = sorted(set.intersection(*(set(ids.tolist()) for ids in lists)))
+
+        needle = f" {term}" if prefix else term
+        return np.asarray([i for i in candidates if needle in f" {self._normalized[i]}"], dtype=np.int64)
+
+    def fuzzy_search(self, term: str, threshold: float = FUZZY_THRESHOLD) -> np.ndarray:
+        """
+        Returns the products sharing at least threshold of the term's trigrams, best match first.
+
+        This tolerates typos and transpositions ("choclate" finds "Chocolate").
+
+        Args:
+            term (str): The search text.
+            threshold (float): Minimum fraction of the term's (space-padded) trigrams found in a name.
+
+        Returns:
+            np.ndarray: Matching product ids, by descending similarity.
+        """
+        grams = _trigrams(f" {_normalize(term)} ")
+        if not grams:
+            return np.empty(0, dtype=np.int64)
+        shared = np.zeros(len(self.names), dtype=np.int64)
+        for gram in grams:
+            ids = self._postings.get(gram)
+            if ids is not None:
+                shared[ids] += 1
+        score = shared / len(grams)
+        matches = np.flatnonzero(score >= threshold)
+        return matches[np.argsort(-score[matches], kind='stable')]
+
+    def rows(self, product_ids: Sequence[int]) -> np.ndarray:
+        """
+        Returns the row positions of the given products, from their posting lists.
+
+        Args:
+            product_ids (Sequence[int]): Product ids from search or fuzzy_search.
+
+        Returns:
+            np.ndarray: Sorted row positions over the frame the index was built from.
+        """
+        parts = [self._row_order[self._bounds[i]:self._bounds[i + 1]] for i in product_ids]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
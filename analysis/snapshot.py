@@ -0,0 +1,174 @@
+import os
+import glob
+import hashlib
+import tempfile
+import pandas as pd
+from typing import Optional
+
+from analysis.instrumentation import instrument, report_error
+from analysis.data_processing import load_data, clean_data, feature_engineering, PIPELINE_VERSION
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", ".cache")
+
+
+def file_fingerprint(filepath: str, block_size: int = 1 << 20) -> str:
+    """
+    Computes the SHA-256 content hash of a file, reading it in blocks.
+
+    Args:
+        filepath (str): The path to the file.
+        block_size (int): Bytes read per iteration.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_path(filepath: str, cache_dir: Optional[str] = None, fingerprint: Optional[str] = None) -> str:
+    """
+    Returns the snapshot location for a source CSV, keyed by its content hash and the pipeline version.
+
+    Args:
+        filepath (str): The path to the source CSV.
+        cache_dir (Optional[str]): Directory holding snapshots. Defaults to data/.cache.
+        fingerprint (Optional[str]): The file's content hash, if the caller already has it. Computed otherwise.
+
+    Returns:
+        str: The path of the Arrow IPC snapshot file.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    stem = os.path.splitext(os.path.basename(filepath))[0].replace(" ", "_")
+    fingerprint = fingerprint or file_fingerprint(filepath)
+    return os.path.join(cache_dir, f"{stem}-{fingerprint[:16]}-v{PIPELINE_VERSION}.arrow")
+
+
+def save_snapshot(df: pd.DataFrame, path: str) -> bool:
+    """
+    Persists an engineered dataframe as an uncompressed Arrow IPC (Feather v2) file.
+
+    The file is written uncompressed so it can be memory-mapped without decoding.
+
+    Args:
+        df (pd.DataFrame): The engineered dataframe.
+        path (str): Destination path.
+
+    Returns:
+        bool: True if the snapshot was written.
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import feather
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        # A uniquely named temporary file, so concurrent writers of the same snapshot never share one
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+        os.close(fd)
+        try:
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return True
+    except Exception as e:
+        report_error("saving snapshot", e)
+        return False
+
+
+def prune_stale(filepath: str, current_path: str, cache_dir: Optional[str] = None) -> None:
+    """
+    Removes snapshots and stored aggregates keyed by other versions of the source file or the pipeline.
+
+    Args:
+        filepath (str): The path to the source CSV.
+        current_path (str): The snapshot just written; files sharing its key are kept.
+        cache_dir (Optional[str]): Directory holding snapshots. Defaults to data/.cache.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    stem = os.path.splitext(os.path.basename(filepath))[0].replace(" ", "_")
+    current_key = os.path.splitext(os.path.basename(current_path))[0] + "."
+    pattern = f"{glob.escape(stem)}-{'[0-9a-f]' * 16}-v*"
+    for path in glob.glob(os.path.join(glob.escape(cache_dir), pattern)):
+        if not os.path.basename(path).startswith(current_key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def load_snapshot(path: str, memory_map: bool = False) -> Optional[pd.DataFrame]:
+    """
+    Loads an engineered dataframe from an Arrow IPC snapshot.
+
+    Args:
+        path (str): The snapshot path.
+        memory_map (bool): Memory-map the file instead of reading it into memory.
+
+    Returns:
+        Optional[pd.DataFrame]: The dataframe, or None if the snapshot is missing or unreadable.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        from pyarrow import feather
+
+        table = feather.read_table(path, memory_map=memory_map)
+        return table.to_pandas()
+    except Exception as e:
+        report_error("loading snapshot", e)
+        return None
+
+
+@instrument
+def load_prepared_data(filepath: str, cache_dir: Optional[str] = None, memory_map: bool = False,
+                       use_cache: bool = True, max_workers: int = 1,
+                       fingerprint: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Returns the cleaned and engineered dataset, served from a snapshot when one matches the source file.
+
+    On a miss the full load_data -> clean_data -> feature_engineering pipeline runs and its result is persisted,
+    replacing the snapshots of earlier versions of the file or the pipeline.
+
+    Args:
+        filepath (str): The path to the source CSV.
+        cache_dir (Optional[str]): Directory holding snapshots. Defaults to data/.cache.
+        memory_map (bool): Memory-map the snapshot when loading it.
+        use_cache (bool): Set to False to bypass the snapshot layer entirely.
+        max_workers (int): On a miss, run the pipeline on this many processes over byte-range partitions.
+        fingerprint (Optional[str]): The file's content hash, if the caller already has it.
+
+    Returns:
+        Optional[pd.DataFrame]: The engineered dataframe, or None if the source could not be loaded.
+    """
+    path = snapshot_path(filepath, cache_dir, fingerprint) if use_cache else None
+    if path is not None:
+        df = load_snapshot(path, memory_map=memory_map)
+        if df is not None:
+            return df
+
+    if max_workers > 1:
+        from analysis.parallel import prepare_data_parallel
+
+        df = prepare_data_parallel(filepath, max_workers=max_workers)
+        if df is None or df.empty:
+            return None
+    else:
+        df = load_data(filepath)
+        if df is None:
+            return None
+        df = clean_data(df)
+        if df.empty:
+            return None
+        df = feature_engineering(df)
+        if df.empty:
+            return None
+
+    if path is not None and save_snapshot(df, path):
+        prune_stale(filepath, path, cache_dir)
+    return df
@@ -0,0 +1,187 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+from analysis.insights import (
+    get_product_profitability,
+    get_division_performance,
+    get_pareto_data,
+    get_monthly_trends,
+    get_state_performance,
+    get_cost_breakdown,
+    get_customer_profitability
+)
+
+# Additive measures kept per dimension. Sums of partial sums equal the full-frame sums,
+# so the insights functions can run unchanged on the reduced frames.
+DIMENSION_MEASURES: Dict[str, List[str]] = {
+    'Product Name': ['Sales', 'Gross Profit', 'Units'],
+    'Division': ['Sales', 'Gross Profit', 'Units'],
+    'State/Province': ['Sales', 'Gross Profit'],
+    'Customer ID': ['Sales', 'Gross Profit', 'Units'],
+    'Order Date': ['Sales', 'Gross Profit'],
+}
+
+TOTAL_COLUMNS = ['Sales', 'Gross Profit', 'Units', 'Cost', 'Manufacturing Cost', 'Shipping Cost', 'Overhead Cost']
+
+
+def merge_moments(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    """
+    Combines the centred moments of two disjoint samples with Chan et al.'s pairwise update.
+
+    Works elementwise, so arrays hold one set of moments per column or group. Merging centred moments keeps
+    the variance accurate when the spread is tiny relative to the mean, where raw sums of squares cancel.
+
+    Args:
+        n_a, n_b: Sample sizes (at least one of them non-zero).
+        mean_a, mean_b: Sample means.
+        m2_a, m2_b: Sums of squared deviations from the sample means.
+
+    Returns:
+        Tuple: The combined (n, mean, m2).
+    """
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    return n, mean_a + delta * (n_b / n), m2_a + m2_b + delta * delta * (n_a * n_b / n)
+
+
+class StreamingAggregator:
+    """
+    Incrementally aggregates cleaned and engineered chunks so insights can be produced in bounded memory.
+
+    Memory grows with the number of distinct keys per dimension, not with the number of rows.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self._parts: Dict[str, Optional[pd.DataFrame]] = {dim: None for dim in DIMENSION_MEASURES}
+        self._totals: Dict[str, float] = {}
+        # Running centred moments for the Cost vs Gross Margin (%) Pearson correlation
+        self._moments = np.zeros(6)  # n, mean_x, mean_y, m2_x, m2_y, c_xy
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """
+        Folds one chunk into the running aggregates.
+
+        Args:
+            chunk (pd.DataFrame): A cleaned and engineered chunk.
+        """
+        self.rows += len(chunk)
+
+        for dim, measures in DIMENSION_MEASURES.items():
+            if dim not in chunk.columns:
+                continue
+            cols = [c for c in measures if c in chunk.columns]
+            if dim == 'Order Date':
+                # Monthly grain: bucket to the first day of the month
+                keys = chunk['Order Date'].dt.to_period('M').dt.start_time
+            else:
+                keys = chunk[dim]
+            part = chunk[cols].groupby(keys, observed=True).sum()
+            existing = self._parts[dim]
+            self._parts[dim] = part if existing is None else pd.concat([existing, part]).groupby(level=0, observed=True).sum()
+
+        for col in TOTAL_COLUMNS:
+            if col in chunk.columns:
+                self._totals[col] = self._totals.get(col, 0) + chunk[col].sum()
+
+        if 'Cost' in chunk.columns and 'Gross Margin (%)' in chunk.columns:
+            x = chunk['Cost'].to_numpy(dtype=np.float64)
+            y = chunk['Gross Margin (%)'].to_numpy(dtype=np.float64)
+            valid = ~(np.isnan(x) | np.isnan(y))
+            x, y = x[valid], y[valid]
+            if len(x):
+                mx, my = x.mean(), y.mean()
+                dx, dy = x - mx, y - my
+                self._merge_moments(np.array([len(x), mx, my, (dx * dx).sum(), (dy * dy).sum(), (dx * dy).sum()]))
+
+    def _merge_moments(self, other: np.ndarray) -> None:
+        """
+        Folds a chunk's centred moments into the running ones (see merge_moments).
+
+        Raw sums of squares lose most of their significant digits to cancellation (sum_xx - sum_x**2 / n)
+        once hundreds of millions of rows are summed; centred moments stay accurate.
+        """
+        n_a, mx_a, my_a, m2x_a, m2y_a, cxy_a = self._moments
+        n_b, mx_b, my_b, m2x_b, m2y_b, cxy_b = other
+        n, (mx, my), (m2x, m2y) = merge_moments(n_a, np.array([mx_a, my_a]), np.array([m2x_a, m2y_a]),
+                                                n_b, np.array([mx_b, my_b]), np.array([m2x_b, m2y_b]))
+        # The co-moment picks up the same correction with the product of the mean differences
+        cxy = cxy_a + cxy_b + (mx_b - mx_a) * (my_b - my_a) * (n_a * n_b / n)
+        self._moments = np.array([n, mx, my, m2x, m2y, cxy])
+
+    def consume(self, chunks: Iterable[pd.DataFrame]) -> "StreamingAggregator":
+        """
+        Folds every chunk of an iterable into the running aggregates.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Cleaned and engineered chunks, e.g. from iter_prepared_chunks.
+
+        Returns:
+            StreamingAggregator: self, for chaining.
+        """
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def frame(self, dim: str) -> pd.DataFrame:
+        """
+        Returns the reduced per-key frame for a dimension, with the key as a regular column.
+
+        Args:
+            dim (str): One of the DIMENSION_MEASURES keys.
+
+        Returns:
+            pd.DataFrame: One row per distinct key with the summed measures.
+        """
+        part = self._parts.get(dim)
+        if part is None:
+            return pd.DataFrame(columns=[dim] + DIMENSION_MEASURES[dim])
+        part = part.copy()
+        part.index.name = dim
+        return part.reset_index()
+
+    def total(self, col: str) -> float:
+        """Returns the running sum of a column, or 0 if it was never seen."""
+        return self._totals.get(col, 0)
+
+    def cost_margin_correlation(self) -> float:
+        """
+        Returns the Pearson correlation between Cost and Gross Margin (%) from the running moments.
+
+        Returns:
+            float: The correlation, or NaN if it is undefined.
+        """
+        n, _, _, m2_x, m2_y, c_xy = self._moments
+        if n < 2 or m2_x <= 0 or m2_y <= 0:
+            return float('nan')
+        return float(c_xy / np.sqrt(m2_x * m2_y))
+
+    def product_profitability(self) -> pd.DataFrame:
+        """Streaming equivalent of get_product_profitability."""
+        return get_product_profitability(self.frame('Product Name'))
+
+    def division_performance(self) -> pd.DataFrame:
+        """Streaming equivalent of get_division_performance."""
+        return get_division_performance(self.frame('Division'))
+
+    def pareto_data(self) -> pd.DataFrame:
+        """Streaming equivalent of get_pareto_data."""
+        return get_pareto_data(self.frame('Product Name'))
+
+    def monthly_trends(self) -> pd.DataFrame:
+        """Streaming equivalent of get_monthly_trends."""
+        return get_monthly_trends(self.frame('Order Date'))
+
+    def state_performance(self) -> pd.DataFrame:
+        """Streaming equivalent of get_state_performance."""
+        return get_state_performance(self.frame('State/Province'))
+
+    def cost_breakdown(self) -> pd.DataFrame:
+        """Streaming equivalent of get_cost_breakdown."""
+        components = ['Manufacturing Cost', 'Shipping Cost', 'Overhead Cost']
+        return get_cost_breakdown(pd.DataFrame([{c: self._totals[c] for c in components if c in self._totals}]))
+
+    def customer_profitability(self) -> pd.DataFrame:
+        """Streaming equivalent of get_customer_profitability."""
+        return get_customer_profitability(self.frame('Customer ID'))
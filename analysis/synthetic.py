@@ -0,0 +1,148 @@
+import sys
+import os
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional
+
+# Add analysis directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "Nassau Candy Distributor.csv")
+
+LOCATION_COLUMNS = ['Country/Region', 'City', 'State/Province', 'Postal Code', 'Region']
+PRODUCT_COLUMNS = ['Product ID', 'Product Name', 'Division']
+COUNTRY_CODES = {'United States': 'US', 'Canada': 'CA'}
+DATE_FORMAT = '%d-%m-%Y'
+
+
+def fit_order_profile(source: str = DATA_PATH) -> Dict[str, object]:
+    """
+    Extracts the empirical distributions the generator samples from.
+
+    Products keep their fixed unit price and unit cost, locations are sampled as whole (city, state, postal code,
+    region) tuples, and order dates, shipping lags, units, ship modes and customers follow their observed frequencies.
+
+    Args:
+        source (str): The reference order file.
+
+    Returns:
+        Dict[str, object]: The fitted tables and value/weight arrays.
+    """
+    raw = pd.read_csv(source, dtype=str, keep_default_na=False)
+    units = raw['Units'].astype(int)
+    order_dates = pd.to_datetime(raw['Order Date'], format=DATE_FORMAT)
+    ship_lag = (pd.to_datetime(raw['Ship Date'], format=DATE_FORMAT) - order_dates).dt.days
+
+    products = raw[PRODUCT_COLUMNS].assign(
+        unit_price=raw['Sales'].astype(float) / units,
+        unit_cost=raw['Cost'].astype(float) / units
+    ).groupby(PRODUCT_COLUMNS, observed=True).agg(
+        unit_price=('unit_price', 'median'), unit_cost=('unit_cost', 'median'), weight=('unit_price', 'size')
+    ).reset_index()
+    locations = raw.groupby(LOCATION_COLUMNS).size().rename('weight').reset_index()
+
+    def _frequencies(values: pd.Series):
+        counts = values.value_counts(sort=False)
+        return counts.index.to_numpy(), (counts / counts.sum()).to_numpy()
+
+    return {
+        'columns': list(raw.columns),
+        'products': products,
+        'locations': locations,
+        'order_dates': _frequencies(order_dates.dt.normalize()),
+        'ship_lag': _frequencies(ship_lag),
+        'units': _frequencies(units),
+        'ship_modes': _frequencies(raw['Ship Mode']),
+        'customers': _frequencies(raw['Customer ID']),
+    }
+
+
+def _format_dates(dates: pd.DatetimeIndex) -> np.ndarray:
+    """Formats dates as DATE_FORMAT strings, formatting each distinct day only once."""
+    unique_dates, inverse = np.unique(dates.to_numpy(), return_inverse=True)
+    return pd.DatetimeIndex(unique_dates).strftime(DATE_FORMAT).to_numpy(dtype=object)[inverse]
+
+
+def _sample_block(profile: Dict[str, object], rng: np.random.Generator, start: int, n: int) -> pd.DataFrame:
+    """Draws n orders with Row IDs start + 1 .. start + n. The first block covers every product and location."""
+    products, locations = profile['products'], profile['locations']
+
+    def _choice(values_weights, size):
+        values, weights = values_weights
+        return values[rng.choice(len(values), size=size, p=weights)]
+
+    product_idx = rng.choice(len(products), size=n, p=(products['weight'] / products['weight'].sum()).to_numpy())
+    location_idx = rng.choice(len(locations), size=n, p=(locations['weight'] / locations['weight'].sum()).to_numpy())
+    if start == 0:
+        # Guarantee the reference cardinalities even for small outputs
+        product_idx[:min(n, len(products))] = np.arange(min(n, len(products)))
+        location_idx[:min(n, len(locations))] = np.arange(min(n, len(locations)))
+
+    product = products.iloc[product_idx].reset_index(drop=True)
+    location = locations.iloc[location_idx].reset_index(drop=True)
+    units = _choice(profile['units'], n)
+    order_date = pd.DatetimeIndex(_choice(profile['order_dates'], n))
+    ship_date = order_date + pd.to_timedelta(_choice(profile['ship_lag'], n), unit='D')
+    customers = _choice(profile['customers'], n)
+
+    sales = np.round(product['unit_price'].to_numpy() * units, 2)
+    cost = np.round(product['unit_cost'].to_numpy() * units, 2)
+    country_code = location['Country/Region'].map(COUNTRY_CODES).fillna('XX').to_numpy(dtype=object)
+    order_year = order_date.year.astype(str).to_numpy(dtype=object)
+
+    block = pd.DataFrame({
+        'Row ID': np.arange(start + 1, start + n + 1),
+        'Order ID': country_code + '-' + order_year + '-' + customers.astype(object) + '-' + product['Product ID'].to_numpy(dtype=object),
+        'Order Date': _format_dates(order_date),
+        'Ship Date': _format_dates(ship_date),
+        'Ship Mode': _choice(profile['ship_modes'], n),
+        'Customer ID': customers,
+        **{col: location[col].to_numpy() for col in LOCATION_COLUMNS},
+        **{col: product[col].to_numpy() for col in PRODUCT_COLUMNS},
+        'Sales': sales,
+        'Units': units,
+        'Gross Profit': np.round(sales - cost, 2),
+        'Cost': cost,
+    })
+    return block[profile['columns']]
+
+
+def generate_orders(path: str, n_rows: int, seed: int = 0, block_rows: int = 1_000_000,
+                    source: str = DATA_PATH, profile: Optional[Dict[str, object]] = None) -> str:
+    """
+    Writes a schema-faithful synthetic order file of n_rows, streaming it in blocks so memory stays flat.
+
+    The file has the reference columns, date format and the same product, division and state cardinalities
+    (every product and location appears at least once). Sales and Cost are units times the product's unit price
+    and unit cost, so per-product margins match the reference data.
+
+    Args:
+        path (str): Destination CSV.
+        n_rows (int): Number of data rows, e.g. 100_000 up to 100_000_000.
+        seed (int): Seed for reproducible files.
+        block_rows (int): Rows generated and written per block.
+        source (str): Reference order file to fit the distributions on.
+        profile (Optional[Dict[str, object]]): A fit_order_profile result to reuse.
+
+    Returns:
+        str: The path written.
+    """
+    profile = profile or fit_order_profile(source)
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(profile['columns']) + "\n")
+        for start in range(0, n_rows, block_rows):
+            _sample_block(profile, rng, start, min(block_rows, n_rows - start)).to_csv(f, index=False, header=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python analysis/synthetic.py <output.csv> <rows> [seed]")
+        sys.exit(1)
+    output, rows = sys.argv[1], int(float(sys.argv[2]))
+    generate_orders(output, rows, seed=int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    print(f"Wrote {rows:,} rows to {output}")
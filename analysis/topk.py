@@ -0,0 +1,213 @@
+import pandas as pd
+import numpy as np
+from typing import Hashable, Iterable, Optional, Sequence, Union
+
+DEFAULT_SKETCH_CAPACITY = 10_000
+
+
+def _as_values(values: Union[np.ndarray, pd.Series, Sequence[float]]) -> np.ndarray:
+    """Returns float64 values with NaN ranked below every number, as sort_values(ascending=False) places them last."""
+    arr = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(arr), -np.inf, arr)
+
+
+def top_k(values: Union[np.ndarray, pd.Series, Sequence[float]], k: int) -> np.ndarray:
+    """
+    Returns the positions of the k largest values, largest first, without sorting the other n - k.
+
+    np.argpartition selects the k largest in O(n); only those k are then sorted. Ties keep position order.
+
+    Args:
+        values (Union[np.ndarray, pd.Series, Sequence[float]]): The scores, e.g. Gross Profit per product.
+        k (int): Number of positions to return (clipped to the number of values).
+
+    Returns:
+        np.ndarray: Positions into values, by descending value.
+    """
+    arr = _as_values(values)
+    k = max(0, min(int(k), len(arr)))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if k == len(arr):
+        candidates = np.arange(len(arr))
+    else:
+        # argpartition picks arbitrary members of a tie at the k-th value; take the earliest positions instead
+        kth = arr[np.argpartition(-arr, k - 1)[k - 1]]
+        above = np.flatnonzero(arr > kth)
+        candidates = np.concatenate([above, np.flatnonzero(arr == kth)[:k - len(above)]])
+    return candidates[np.lexsort((candidates, -arr[candidates]))]
+
+
+def top_k_frame(df: pd.DataFrame, column: str, k: int) -> pd.DataFrame:
+    """
+    Returns the k rows with the largest values of a column, largest first.
+
+    Args:
+        df (pd.DataFrame): The table, e.g. one row per product.
+        column (str): The ranking column.
+        k (int): Number of rows.
+
+    Returns:
+        pd.DataFrame: The top rows, keeping their original index.
+    """
+    return df.iloc[top_k(df[column].to_numpy(), k)]
+
+
+def pareto_count(values: Union[np.ndarray, pd.Series, Sequence[float]], pct: float = 80.0) -> int:
+    """
+    Counts how many of the largest items fit within pct percent of the total, i.e. the number of rows whose
+    'Cumulative Percentage' (ranked by value, descending) is <= pct.
+
+    Instead of sorting every item, the top k are selected and sorted with k growing fourfold until the cumulative share
+    passes pct, so the work is proportional to the answer rather than to the number of items.
+
+    Args:
+        values (Union[np.ndarray, pd.Series, Sequence[float]]): The item values, e.g. Gross Profit per product.
+        pct (float): The cumulative share, in percent.
+
+    Returns:
+        int: The number of leading items whose cumulative share stays within pct.
+    """
+    arr = np.asarray(values, dtype=np.float64)
+    arr = arr[~np.isnan(arr)]
+    total = arr.sum()
+    n = len(arr)
+    if not total > 0 or pct >= 100:
+        # The running share is not monotone here (losses can pull it back under pct), so rank everything
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cumulative = 100 * np.cumsum(arr[top_k(arr, n)]) / total
+        return int((cumulative <= pct).sum())
+
+    k = min(n, 64)
+    while True:
+        order = top_k(arr, k)
+        cumulative = 100 * np.cumsum(arr[order]) / total
+        within = cumulative <= pct
+        # With a positive total the share rises while values are positive and never falls back below
+        # 100%, so once it exceeds pct (< 100) it stays above: the answer is the first position past pct
+        if not within.all():
+            return int(np.argmin(within))
+        if k == n:
+            return n
+        k = min(n, k * 4)
+
+
+class HeavyHitters:
+    """
+    Mergeable Misra-Gries sketch of the keys carrying the most weight (e.g. profit per SKU x customer key).
+
+    Keeps at most `capacity` counters, so memory is fixed however many distinct keys stream past. Each chunk
+    is pre-aggregated and merged in one vectorized step: counters are summed by key, and when more than
+    `capacity` remain, the (capacity + 1)-th largest count is subtracted from all of them and non-positive
+    counters are dropped. Every estimate undercounts the true weight by at most `error_bound`, which is
+    at most total weight / (capacity + 1). Only positive weights are counted, so loss-making keys are ignored.
+
+    Args:
+        capacity (int): Maximum number of tracked keys.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.float64)
+        self.total_weight = 0.0
+        self.error_bound = 0.0
+
+    def update(self, keys: Union[pd.Series, pd.MultiIndex, Sequence[Hashable]], weights: Union[np.ndarray, pd.Series]) -> "HeavyHitters":
+        """
+        Adds a chunk of (key, weight) pairs.
+
+        Args:
+            keys: One key per row; a MultiIndex (e.g. from two columns) tracks composite keys.
+            weights: One weight per row.
+
+        Returns:
+            HeavyHitters: self, for chaining.
+        """
+        weights = np.clip(np.nan_to_num(np.asarray(weights, dtype=np.float64)), 0, None)
+        chunk = pd.Series(weights, index=keys).groupby(level=list(range(getattr(keys, 'nlevels', 1))), sort=False).sum()
+        self.total_weight += float(weights.sum())
+        self._merge_counts(chunk[chunk > 0])
+        return self
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        """
+        Folds another sketch (e.g. from a different partition) into this one.
+
+        Args:
+            other (HeavyHitters): The sketch to merge.
+
+        Returns:
+            HeavyHitters: self, for chaining.
+        """
+        self.total_weight += other.total_weight
+        self.error_bound += other.error_bound
+        self._merge_counts(other.counts)
+        return self
+
+    def _merge_counts(self, counts: pd.Series) -> None:
+        """Adds counters and, above capacity, applies the Misra-Gries reduction."""
+        if counts.empty:
+            return
+        combined = counts if self.counts.empty else pd.concat([self.counts, counts]).groupby(level=list(range(counts.index.nlevels)), sort=False).sum()
+        if len(combined) > self.capacity:
+            values = combined.to_numpy()
+            cut = values[np.argpartition(-values, self.capacity)[self.capacity]]
+            combined = combined[values > cut] - cut
+            self.error_bound += cut
+        self.counts = combined
+
+    def top(self, n: int) -> pd.DataFrame:
+        """
+        Returns the n heaviest tracked keys.
+
+        Args:
+            n (int): Number of keys.
+
+        Returns:
+            pd.DataFrame: 'Key', 'Estimate' (lower bound) and 'Upper Bound' of each key's weight, heaviest first.
+        """
+        order = top_k(self.counts.to_numpy(), n)
+        estimates = self.counts.to_numpy()[order]
+        return pd.DataFrame({
+            'Key': list(self.counts.index[order]),
+            'Estimate': estimates,
+            'Upper Bound': estimates + self.error_bound,
+        })
+
+    def pareto_count(self, pct: float = 80.0) -> Optional[int]:
+        """
+        Estimates how many of the heaviest keys make up pct percent of the total positive weight.
+
+        Args:
+            pct (float): The cumulative share, in percent.
+
+        Returns:
+            Optional[int]: The estimated count, or None when the tracked keys do not reach pct of the total
+            (raise the capacity).
+        """
+        if self.total_weight <= 0:
+            return None
+        cumulative = 100 * np.cumsum(self.counts.to_numpy()[top_k(self.counts.to_numpy(), len(self.counts))]) / self.total_weight
+        reached = np.flatnonzero(cumulative > pct)
+        return int(reached[0]) if len(reached) else None
+
+
+def sketch_heavy_hitters(chunks: Iterable[pd.DataFrame], keys: Sequence[str] = ('Product Name', 'Customer ID'),
+                         weight: str = 'Gross Profit', capacity: int = DEFAULT_SKETCH_CAPACITY) -> HeavyHitters:
+    """
+    Streams chunks (e.g. from iter_prepared_chunks) into a HeavyHitters sketch over composite keys.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Engineered chunks.
+        keys (Sequence[str]): Key columns; their combination is one item.
+        weight (str): The weight column.
+        capacity (int): Counters kept by the sketch.
+
+    Returns:
+        HeavyHitters: The sketch.
+    """
+    sketch = HeavyHitters(capacity)
+    for chunk in chunks:
+        index = pd.MultiIndex.from_frame(chunk[list(keys)]) if len(keys) > 1 else pd.Index(chunk[keys[0]])
+        sketch.update(index, chunk[weight].to_numpy())
+    return sketch
@@ -0,0 +1,108 @@
+import pandas as pd
+import numpy as np
+from typing import Optional, Sequence, Union
+
+# A row selection over a base frame: a boolean mask (array or Series) or an array of integer positions
+RowSelection = Union[np.ndarray, pd.Series, Sequence[int], None]
+
+
+def row_mask(rows: RowSelection, n_rows: int) -> Optional[np.ndarray]:
+    """
+    Normalizes a row selection into a boolean NumPy mask over n_rows rows.
+
+    Args:
+        rows (RowSelection): Boolean mask, integer positions, or None for every row.
+        n_rows (int): Length of the base frame.
+
+    Returns:
+        Optional[np.ndarray]: A boolean mask of length n_rows, or None when every row is selected.
+    """
+    if rows is None:
+        return None
+    if isinstance(rows, pd.Series):
+        rows = rows.to_numpy(dtype=bool, na_value=False) if pd.api.types.is_bool_dtype(rows) else rows.to_numpy()
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        if len(rows) != n_rows:
+            raise ValueError(f"Boolean row mask has {len(rows)} entries for {n_rows} rows")
+        return rows
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[rows.astype(np.intp, copy=False)] = True
+    return mask
+
+
+def row_count(df: pd.DataFrame, rows: RowSelection = None) -> int:
+    """
+    Returns the number of selected rows without materializing them.
+
+    Args:
+        df (pd.DataFrame): The base frame.
+        rows (RowSelection): Row selection over df.
+
+    Returns:
+        int: Number of selected rows.
+    """
+    mask = row_mask(rows, len(df))
+    return len(df) if mask is None else int(np.count_nonzero(mask))
+
+
+def masked_sum(series: pd.Series, rows: RowSelection = None) -> float:
+    """
+    Sums a column over the selected rows directly on its buffer, skipping missing values like Series.sum().
+
+    Args:
+        series (pd.Series): The column of the base frame.
+        rows (RowSelection): Row selection over the column.
+
+    Returns:
+        float: The sum (0 for an empty selection).
+    """
+    mask = row_mask(rows, len(series))
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(values)
+    if mask is not None:
+        valid &= mask
+    return float(np.sum(values, where=valid))
+
+
+def masked_mean(series: pd.Series, rows: RowSelection = None) -> float:
+    """
+    Averages a column over the selected rows directly on its buffer, skipping missing values like Series.mean().
+
+    Args:
+        series (pd.Series): The column of the base frame.
+        rows (RowSelection): Row selection over the column.
+
+    Returns:
+        float: The mean, or NaN when no non-missing value is selected.
+    """
+    mask = row_mask(rows, len(series))
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(values)
+    if mask is not None:
+        valid &= mask
+    count = np.count_nonzero(valid)
+    return float(np.sum(values, where=valid) / count) if count else np.nan
+
+
+def take_columns(df: pd.DataFrame, columns: Sequence[str], rows: RowSelection = None) -> pd.DataFrame:
+    """
+    Gathers only the requested columns of the selected rows.
+
+    Filtered analyses use this instead of df[mask] so a rerun copies the few columns it reads rather than
+    every column of every selected order.
+
+    Args:
+        df (pd.DataFrame): The base frame.
+        columns (Sequence[str]): Columns to gather; missing ones are skipped.
+        rows (RowSelection): Row selection over df.
+
+    Returns:
+        pd.DataFrame: A new frame with the selected rows of those columns, keeping the original index.
+    """
+    columns = [c for c in columns if c in df.columns]
+    mask = row_mask(rows, len(df))
+    if mask is None:
+        return df[columns].copy()
+    positions = np.flatnonzero(mask)
+    return pd.DataFrame({c: df[c].array.take(positions) for c in columns}, index=df.index[positions])
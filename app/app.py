@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import plotly.io as pio
@@ -11,15 +12,25 @@ from plotly.subplots import make_subplots
 import sys
 import os
 
-import io
+import time
 
 # Add analysis directory to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from analysis.data_processing import load_data, clean_data, feature_engineering
-from analysis.insights import get_product_profitability, get_division_performance, get_pareto_data, get_monthly_trends, get_state_performance, get_cost_breakdown, get_customer_profitability
-from analysis.forecasting import generate_forecast
-from analysis.scenario import run_scenario
+from analysis.snapshot import load_prepared_data, DEFAULT_CACHE_DIR
+from analysis.cube import ProfitCube
+from analysis.cache import LRUCache, normalize_filter_state
+from analysis.exports import export_path, sweep_exports, write_csv_chunked, write_excel_report
+from analysis.plot_data import reduce_scatter_data, DEFAULT_POINT_BUDGET
+from analysis.dates import DATE_KEY_COLUMNS, date_range_positions
+from analysis.search import ProductSearchIndex
+from analysis.views import row_mask, row_count, masked_sum, masked_mean, take_columns
+from analysis.insights import get_product_profitability, get_division_performance, get_pareto_data, get_monthly_trends, get_state_performance, get_cost_breakdown, get_customer_profitability, aggregate_dimensions
+from analysis.forecasting import generate_forecast, ForecastModelCache
+from analysis.scenario import run_scenario, sensitivity_grid
+from analysis.risk import simulate_profit_risk
+from analysis.topk import pareto_count
+from analysis import instrumentation
 
 # Page config
 st.set_page_config(layout="wide", page_title="Nassau Candy Profitability Analysis")
@@ -124,424 +135,720 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Load Data
-@st.cache_data
-def load_and_prep_data():
-    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "Nassau Candy Distributor.csv")
-    if not os.path.exists(data_path):
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "Nassau Candy Distributor.csv")
+
+# Scenario sliders run from -SCENARIO_RANGE to +SCENARIO_RANGE percent; the heatmap uses the same positions
+SCENARIO_RANGE = 20.0
+SCENARIO_STEP = 0.5
+
+def get_data_version():
+    # Changes whenever analysis/ingest.py appends a drop, so cached data, cube and results are rebuilt
+    if not os.path.exists(DATA_PATH):
         return None
-    df = load_data(data_path)
-    if df is not None:
-        df = clean_data(df)
-        if df.empty:
-            return None
-        df = feature_engineering(df)
-        if df.empty:
-            return None
-    return df
-
-df = load_and_prep_data()
-
-if df is None:
-    st.error("Data file not found or could not be loaded. Please check the data directory.")
+    stat = os.stat(DATA_PATH)
+    return (stat.st_mtime_ns, stat.st_size)
+
+@st.cache_data(max_entries=1)
+def load_and_prep_data(data_version):
+    if data_version is None:
+        return None
+    return load_prepared_data(DATA_PATH)
+
+@st.cache_resource(max_entries=1)
+def load_cube(data_version):
+    data = load_and_prep_data(data_version)
+    return ProfitCube.from_frame(data) if data is not None else None
+
+@st.cache_resource(max_entries=1)
+def load_product_index(data_version):
+    data = load_and_prep_data(data_version)
+    return ProductSearchIndex.from_frame(data) if data is not None else None
+
+@st.cache_resource
+def get_result_cache():
+    # Shared across sessions: entries are keyed on data version and filter state, and the dataset is the same for everyone
+    return LRUCache(max_entries=256)
+
+@st.cache_resource
+def get_forecast_cache():
+    # Fitted models are keyed on the monthly series itself, so they are reused across filter states and restarts.
+    # Warm starts make a forecast depend on earlier fits by ~1e-4 relative, well below what the chart shows.
+    return ForecastModelCache(max_entries=512, cache_dir=os.path.join(DEFAULT_CACHE_DIR, "forecasts"))
+
+# Stage recording is per rerun; the toggle lives at the bottom of the sidebar but must apply from the first stage
+if st.session_state.get('record_performance', False):
+    instrumentation.enable(memory=True)
 else:
-    # Sidebar
-    st.sidebar.title("Filters")
-    
-    # Date Range Filter
-    min_date = df['Order Date'].min()
-    max_date = df['Order Date'].max()
-    start_date, end_date = st.sidebar.date_input("Select Date Range", [min_date, max_date], min_value=min_date, max_value=max_date)
-    
-    # Division Filter
-    division = st.sidebar.multiselect("Select Division", options=df['Division'].unique(), default=df['Division'].unique())
+    instrumentation.disable()
 
-    # Product Category Filter
-    if 'Product Category' in df.columns:
-        product_category = st.sidebar.multiselect("Select Product Category", options=df['Product Category'].unique(), default=df['Product Category'].unique())
-    else:
-        product_category = []
+# Recording must stop however the rerun ends (st.stop, an exception in a tab), or tracemalloc stays on
+try:
+    data_version = get_data_version()
+    df = load_and_prep_data(data_version)
 
-    # Customer Segment Filter
-    if 'Customer Segment' in df.columns:
-        customer_segment = st.sidebar.multiselect("Select Customer Segment", options=df['Customer Segment'].unique(), default=df['Customer Segment'].unique())
+    if df is None:
+        st.error("Data file not found or could not be loaded. Please check the data directory.")
     else:
-        customer_segment = []
-    
-    # Margin Threshold Slider
-    margin_threshold = st.sidebar.slider("Min Gross Margin (%)", min_value=float(df['Gross Margin (%)'].min()), max_value=float(df['Gross Margin (%)'].max()), value=0.0)
+        # Sidebar
+        st.sidebar.title("Filters")
     
-    # Filter data
-    # Create mask for filtering
-    mask = (
-        (df['Division'].isin(division)) & 
-        (df['Order Date'] >= pd.to_datetime(start_date)) & 
-        (df['Order Date'] <= pd.to_datetime(end_date)) &
-        (df['Gross Margin (%)'] >= margin_threshold)
-    )
+        # Date Range Filter
+        min_date = df['Order Date'].min()
+        max_date = df['Order Date'].max()
+        raw_columns = [c for c in df.columns if c not in DATE_KEY_COLUMNS]
+        start_date, end_date = st.sidebar.date_input("Select Date Range", [min_date, max_date], min_value=min_date, max_value=max_date)
     
-    if product_category:
-        mask = mask & (df['Product Category'].isin(product_category))
+        # Division Filter
+        division = st.sidebar.multiselect("Select Division", options=df['Division'].unique().tolist(), default=df['Division'].unique().tolist())
 
-    if customer_segment:
-        mask = mask & (df['Customer Segment'].isin(customer_segment))
+        # Product Category Filter
+        if 'Product Category' in df.columns:
+            product_category = st.sidebar.multiselect("Select Product Category", options=df['Product Category'].unique().tolist(), default=df['Product Category'].unique().tolist())
+        else:
+            product_category = []
 
-    filtered_df = df[mask]
+        # Customer Segment Filter
+        if 'Customer Segment' in df.columns:
+            customer_segment = st.sidebar.multiselect("Select Customer Segment", options=df['Customer Segment'].unique().tolist(), default=df['Customer Segment'].unique().tolist())
+        else:
+            customer_segment = []
     
-    # Main Dashboard
-    st.title("Product Line Profitability Analysis")
+        # Margin Threshold Slider
+        margin_threshold = st.sidebar.slider("Min Gross Margin (%)", min_value=float(df['Gross Margin (%)'].min()), max_value=float(df['Gross Margin (%)'].max()), value=0.0)
     
-    # Key Metrics
-    col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total Sales", f"${filtered_df['Sales'].sum():,.2f}")
-    col2.metric("Total Profit", f"${filtered_df['Gross Profit'].sum():,.2f}")
-    col3.metric("Total Units", f"{filtered_df['Units'].sum():,.0f}")
-    col4.metric("Avg Margin", f"{filtered_df['Gross Margin (%)'].mean():.2f}%")
+        # Filter data
+        # Create mask for filtering
+        with instrumentation.stage('filter_mask', rows_in=len(df)) as filter_stage:
+            # The frame is sorted by Order Date, so the date range is one block found by binary search;
+            # the remaining conditions are only evaluated on the rows inside it
+            date_start, date_stop = date_range_positions(df, start_date, end_date)
+            window = slice(date_start, date_stop)
+            mask = (
+                (df['Division'].iloc[window].isin(division)) &
+                (df['Gross Margin (%)'].iloc[window] >= margin_threshold)
+            )
+        
+            if product_category:
+                mask = mask & (df['Product Category'].iloc[window].isin(product_category))
+
+            if customer_segment:
+                mask = mask & (df['Customer Segment'].iloc[window].isin(customer_segment))
+
+            # The selection stays a mask over the cached frame; rows are only copied for row-level views and exports
+            filter_mask = np.zeros(len(df), dtype=bool)
+            filter_mask[window] = mask.to_numpy()
+            filtered_count = int(filter_mask.sum())
+            filter_stage.rows_out = filtered_count
+
+        def filtered_rows(columns=None):
+            # The integer date keys are internal lookup columns, so full-row views and exports leave them out
+            return take_columns(df, raw_columns if columns is None else columns, filter_mask)
+
+        # Aggregate views are answered from the pre-built cube. The margin threshold is a row-level filter,
+        # so once it excludes any order we fall back to the base frame with the filter mask as row selection.
+        cube = load_cube(data_version)
+        if cube is not None and cube.can_answer(margin_threshold):
+            summary_df = cube.slice(start_date, end_date, {
+                'Division': division,
+                'Product Category': product_category or None,
+                'Customer Segment': customer_segment or None
+            })
+            summary_rows = None
+            kpis = ProfitCube.kpis(summary_df)
+        else:
+            summary_df = df
+            summary_rows = filter_mask
+            kpis = {
+                'Total Sales': masked_sum(df['Sales'], filter_mask),
+                'Total Profit': masked_sum(df['Gross Profit'], filter_mask),
+                'Total Units': masked_sum(df['Units'], filter_mask),
+                'Avg Margin': masked_mean(df['Gross Margin (%)'], filter_mask)
+            }
+        summary_empty = row_count(summary_df, summary_rows) == 0
+
+        # Every per-tab computation is memoized on the normalized filter state
+        result_cache = get_result_cache()
+        filter_key = (data_version,) + normalize_filter_state(start_date, end_date, division, product_category, customer_segment, margin_threshold)
+
+        def memo(name, compute, *extra):
+            return result_cache.get_or_compute(name, filter_key + extra, compute)
     
-    # Tabs
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10, tab11 = st.tabs(["Overview", "Product Analysis", "Division Performance", "Profit Concentration", "Cost Diagnostics", "Temporal Trends", "Geospatial Insights", "Customer Insights", "Forecasting", "Scenario Planning", "Reports"])
+        # Main Dashboard
+        st.title("Product Line Profitability Analysis")
     
-    with tab1:
-        st.subheader("Profitability Overview")
-        # Scatter plot Sales vs Profit
-        fig = px.scatter(
-            filtered_df, 
-            x='Sales', 
-            y='Gross Profit', 
-            color='Division', 
-            hover_data=['Product Name', 'Gross Margin (%)'],
-            title="Sales vs Gross Profit",
-            color_discrete_sequence=COLOR_SEQUENCE
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        
-    with tab2:
-        st.subheader("Product Analysis")
-        
-        # Product Search
-        search_term = st.text_input("Search Product", "", placeholder="Search here...")
-        if search_term:
-            product_view = filtered_df[filtered_df['Product Name'].str.contains(search_term, case=False)]
+        # Key Metrics
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total Sales", f"${kpis['Total Sales']:,.2f}")
+        col2.metric("Total Profit", f"${kpis['Total Profit']:,.2f}")
+        col3.metric("Total Units", f"{kpis['Total Units']:,.0f}")
+        col4.metric("Avg Margin", f"{kpis['Avg Margin']:.2f}%")
+    
+        # Exports are only built once requested for the current filter state, streamed to disk and cached per filter
+        def export_requested(name):
+            return st.session_state.get(f'{name}_requested_for') == filter_key
+
+        def request_export(name):
+            st.session_state[f'{name}_requested_for'] = filter_key
+
+        def export_file(name, build):
+            # Old exports are swept from disk, so a cached path whose file is gone is rebuilt rather than opened
+            path = memo(name, build)
+            if not os.path.exists(path):
+                result_cache.discard(name, filter_key)
+                path = memo(name, build)
+            return path
+
+        def build_csv_export():
+            sweep_exports()
+            # Rows are gathered from the cached frame one chunk at a time as they are written
+            return write_csv_chunked(df, export_path('filtered_data', filter_key, 'csv'), rows=filter_mask, columns=raw_columns)
+
+        # Sidebar Data Export
+        st.sidebar.markdown("---")
+        if export_requested('csv_export'):
+            csv_path = export_file('csv_export', build_csv_export)
+            with open(csv_path, 'rb') as csv_file:
+                st.sidebar.download_button(
+                    label="Download Filtered Data",
+                    data=csv_file,
+                    file_name='filtered_profitability_data.csv',
+                    mime='text/csv',
+                )
         else:
-            product_view = filtered_df
-            
-        product_stats = get_product_profitability(product_view)
-        st.dataframe(product_stats.head(20).style.format({'Sales': '${:,.2f}', 'Gross Profit': '${:,.2f}', 'Gross Margin (%)': '{:.2f}%', 'Profit per Unit': '${:,.2f}'}))
+            st.sidebar.button("Prepare Filtered Data (CSV)", on_click=request_export, args=('csv_export',))
+
+        with st.sidebar.expander("Cache Statistics"):
+            st.json(result_cache.stats())
+
+        # Scatter plots ship one marker per point to the browser, so large selections are reduced server-side
+        with st.sidebar.expander("Plot Settings"):
+            point_budget = st.number_input("Scatter point budget", min_value=500, max_value=200_000, value=DEFAULT_POINT_BUDGET, step=500)
+            reduction_method = st.radio("Reduction above budget", ["Stratified sample", "Grid density"], help="Sampling keeps row-level hover details; density bins show every row as sized cells.")
+            # Exact points are only offered while the selection fits the budget, so a large selection can never be shipped whole
+            exact_allowed = filtered_count <= point_budget
+            exact_points = st.checkbox("Show exact points", value=False, disabled=not exact_allowed,
+                                       help="Plot every row. Only available while the selection is within the point budget.") and exact_allowed
+
+        # Columns any scatter reads (axes, colour, marker size and hover data)
+        SCATTER_COLUMNS = ['Sales', 'Gross Profit', 'Cost', 'Gross Margin (%)', 'Division', 'Product Name']
+
+        def scatter_data(x, y, measures=()):
+            if exact_points:
+                return filtered_rows(SCATTER_COLUMNS), {'method': 'exact', 'rows': filtered_count, 'points': filtered_count}
+            method = 'bin' if reduction_method == "Grid density" else 'sample'
+            return memo(f'scatter:{x}:{y}', lambda: reduce_scatter_data(filtered_rows(SCATTER_COLUMNS), x, y, by='Division', max_points=point_budget, method=method, measures=measures), point_budget, method)
+
+        def scatter_caption(info):
+            if info['method'] == 'sample':
+                st.caption(f"Showing a stratified sample of {info['points']:,} of {info['rows']:,} orders.")
+            elif info['method'] == 'bin':
+                st.caption(f"Showing {info['rows']:,} orders aggregated into {info['points']:,} density cells (marker size = order count).")
+    
+        def render_overview():
+            st.subheader("Profitability Overview")
+            # Scatter plot Sales vs Profit
+            plot_df, plot_info = scatter_data('Sales', 'Gross Profit')
+            binned = plot_info['method'] == 'bin'
+            fig = px.scatter(
+                plot_df, 
+                x='Sales', 
+                y='Gross Profit', 
+                color='Division', 
+                size='Count' if binned else None,
+                hover_data=['Count'] if binned else ['Product Name', 'Gross Margin (%)'],
+                title="Sales vs Gross Profit",
+                color_discrete_sequence=COLOR_SEQUENCE
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            scatter_caption(plot_info)
         
-    with tab3:
-        st.subheader("Division Performance")
-        division_stats = get_division_performance(filtered_df)
-        fig = px.bar(
-            division_stats, 
-            x='Division', 
-            y='Gross Profit', 
-            color='Division',
-            title="Total Gross Profit by Division",
-            hover_data=['Sales', 'Gross Margin (%)'],
-            color_discrete_sequence=COLOR_SEQUENCE
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        def render_product_analysis():
+            st.subheader("Product Analysis")
         
-    with tab4:
-        st.subheader("Pareto Analysis")
-        if not filtered_df.empty:
-            pareto_df = get_pareto_data(filtered_df)
-            top_n = min(20, len(pareto_df))
-            pareto_subset = pareto_df.head(top_n)
-            
-            # Create figure with secondary y-axis
-            fig = make_subplots(specs=[[{"secondary_y": True}]])
+            # Product Search
+            search_term = st.text_input("Search Product", "", placeholder="Search here...")
 
-            # Add traces
-            fig.add_trace(
-                go.Bar(x=pareto_subset['Product Name'], y=pareto_subset['Gross Profit'], name="Gross Profit", marker_color=COLOR_SEQUENCE[0]),
-                secondary_y=False,
-            )
+            # The term is matched against the distinct product names only; misspellings fall back to fuzzy matching
+            product_index = load_product_index(data_version)
+            product_ids = product_index.search(search_term)
+            if search_term.strip() and len(product_ids) == 0:
+                product_ids = product_index.fuzzy_search(search_term)
+                if len(product_ids):
+                    st.caption("No exact matches. Showing close matches: " + ", ".join(product_index.names[product_ids]))
 
-            fig.add_trace(
-                go.Scatter(x=pareto_subset['Product Name'], y=pareto_subset['Cumulative Percentage'], name="Cumulative %", mode='lines+markers', line=dict(color=COLOR_SEQUENCE[2], width=2)),
-                secondary_y=True,
-            )
+            def compute_product_stats():
+                rows = summary_rows
+                if search_term.strip():
+                    if summary_rows is None:
+                        # Cube cells: match the few cells by name
+                        matches = summary_df['Product Name'].isin(product_index.names[product_ids]).to_numpy()
+                    else:
+                        # Base frame: the matched products' posting lists give their rows directly
+                        matches = row_mask(product_index.rows(product_ids), len(summary_df))
+                    rows = matches if rows is None else matches & rows
+                return get_product_profitability(summary_df, rows=rows, top_n=20)
 
-            # Add figure title
-            fig.update_layout(
-                title_text=f"Top {top_n} Products - Pareto Chart"
+            product_stats = memo('product_stats_top', compute_product_stats, search_term.strip().lower())
+            st.dataframe(product_stats.style.format({'Sales': '${:,.2f}', 'Gross Profit': '${:,.2f}', 'Gross Margin (%)': '{:.2f}%', 'Profit per Unit': '${:,.2f}'}))
+        
+        def render_division_performance():
+            st.subheader("Division Performance")
+            division_stats = memo('division_stats', lambda: get_division_performance(summary_df, rows=summary_rows))
+            fig = px.bar(
+                division_stats, 
+                x='Division', 
+                y='Gross Profit', 
+                color='Division',
+                title="Total Gross Profit by Division",
+                hover_data=['Sales', 'Gross Margin (%)'],
+                color_discrete_sequence=COLOR_SEQUENCE
             )
+            st.plotly_chart(fig, use_container_width=True)
+        
+        def render_profit_concentration():
+            st.subheader("Pareto Analysis")
+            if not summary_empty:
+                # Only the charted top 20 are ranked; the 80% count selects the leading products without a full sort
+                pareto_subset = memo('pareto_top', lambda: get_pareto_data(summary_df, rows=summary_rows, top_n=20))
+                top_n = len(pareto_subset)
 
-            # Set x-axis title
-            fig.update_xaxes(title_text="Product Name")
+                def compute_pareto_count():
+                    product_profit = aggregate_dimensions(summary_df, ['Product Name'], ['Gross Profit'], rows=summary_rows)['Product Name']['Gross Profit']
+                    return pareto_count(product_profit, 80), len(product_profit)
 
-            # Set y-axes titles
-            fig.update_yaxes(title_text="Gross Profit", secondary_y=False)
-            fig.update_yaxes(title_text="Cumulative %", secondary_y=True)
+                count_80, total_products = memo('pareto_count', compute_pareto_count)
             
-            # Add 80% line
-            fig.add_hline(y=80, line_dash="dash", line_color="red", annotation_text="80% Threshold", secondary_y=True)
+                # Create figure with secondary y-axis
+                fig = make_subplots(specs=[[{"secondary_y": True}]])
 
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No data available for Pareto Analysis with current filters.")
+                # Add traces
+                fig.add_trace(
+                    go.Bar(x=pareto_subset['Product Name'], y=pareto_subset['Gross Profit'], name="Gross Profit", marker_color=COLOR_SEQUENCE[0]),
+                    secondary_y=False,
+                )
 
-    with tab5:
-        st.subheader("Cost Structure Diagnostics")
-        if not filtered_df.empty:
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("#### Cost vs Margin")
-                fig = px.scatter(
-                    filtered_df, 
-                    x='Cost', 
-                    y='Gross Margin (%)', 
-                    color='Division', 
-                    size='Sales', 
-                    hover_data=['Product Name'],
-                    title="Cost vs Gross Margin (%)",
-                    color_discrete_sequence=COLOR_SEQUENCE
+                fig.add_trace(
+                    go.Scatter(x=pareto_subset['Product Name'], y=pareto_subset['Cumulative Percentage'], name="Cumulative %", mode='lines+markers', line=dict(color=COLOR_SEQUENCE[2], width=2)),
+                    secondary_y=True,
                 )
-                fig.add_hline(y=0, line_dash="dash", line_color="red")
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with col2:
-                st.markdown("#### Cost Components Breakdown (Simulated)")
-                cost_breakdown = get_cost_breakdown(filtered_df)
-                fig = px.pie(
-                    cost_breakdown, 
-                    values='Total Cost', 
-                    names='Cost Component', 
-                    title="Total Cost Breakdown",
-                    color_discrete_sequence=COLOR_SEQUENCE
+
+                # Add figure title
+                fig.update_layout(
+                    title_text=f"Top {top_n} Products - Pareto Chart"
                 )
-                st.plotly_chart(fig, use_container_width=True)
+
+                # Set x-axis title
+                fig.update_xaxes(title_text="Product Name")
+
+                # Set y-axes titles
+                fig.update_yaxes(title_text="Gross Profit", secondary_y=False)
+                fig.update_yaxes(title_text="Cumulative %", secondary_y=True)
             
-            st.markdown("### High Cost, Low Margin Products")
-            high_cost_low_margin = filtered_df[(filtered_df['Cost'] > filtered_df['Cost'].median()) & (filtered_df['Gross Margin (%)'] < 10)]
-            st.dataframe(high_cost_low_margin[['Product Name', 'Division', 'Cost', 'Sales', 'Gross Margin (%)']].drop_duplicates().head(10))
-        else:
-            st.info("No data available.")
+                # Add 80% line
+                fig.add_hline(y=80, line_dash="dash", line_color="red", annotation_text="80% Threshold", secondary_y=True)
+
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption(f"{count_80} of {total_products} products make up 80% of gross profit.")
+            else:
+                st.info("No data available for Pareto Analysis with current filters.")
 
-    with tab6:
-        st.subheader("Temporal Trends (Monthly)")
-        if not filtered_df.empty:
-            monthly_trends = get_monthly_trends(filtered_df)
+        def render_cost_diagnostics():
+            st.subheader("Cost Structure Diagnostics")
+            if filtered_count:
+                col1, col2 = st.columns(2)
             
-            fig = make_subplots(specs=[[{"secondary_y": True}]])
+                with col1:
+                    st.markdown("#### Cost vs Margin")
+                    plot_df, plot_info = scatter_data('Cost', 'Gross Margin (%)', measures=('Sales',))
+                    fig = px.scatter(
+                        plot_df, 
+                        x='Cost', 
+                        y='Gross Margin (%)', 
+                        color='Division', 
+                        size='Sales', 
+                        hover_data=['Count'] if plot_info['method'] == 'bin' else ['Product Name'],
+                        title="Cost vs Gross Margin (%)",
+                        color_discrete_sequence=COLOR_SEQUENCE
+                    )
+                    fig.add_hline(y=0, line_dash="dash", line_color="red")
+                    st.plotly_chart(fig, use_container_width=True)
+                    scatter_caption(plot_info)
             
-            fig.add_trace(
-                go.Bar(x=monthly_trends['Month'].astype(str), y=monthly_trends['Sales'], name="Total Sales", marker_color=COLOR_SEQUENCE[0]),
-                secondary_y=False
-            )
+                with col2:
+                    st.markdown("#### Cost Components Breakdown (Simulated)")
+                    cost_breakdown = memo('cost_breakdown', lambda: get_cost_breakdown(summary_df, rows=summary_rows))
+                    fig = px.pie(
+                        cost_breakdown, 
+                        values='Total Cost', 
+                        names='Cost Component', 
+                        title="Total Cost Breakdown",
+                        color_discrete_sequence=COLOR_SEQUENCE
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
             
-            fig.add_trace(
-                go.Scatter(x=monthly_trends['Month'].astype(str), y=monthly_trends['Gross Margin (%)'], name="Gross Margin (%)", marker_color=COLOR_SEQUENCE[2], mode='lines+markers'),
-                secondary_y=True
-            )
+                st.markdown("### High Cost, Low Margin Products")
+                cost_rows = filtered_rows(['Product Name', 'Division', 'Cost', 'Sales', 'Gross Margin (%)'])
+                high_cost_low_margin = cost_rows[(cost_rows['Cost'] > cost_rows['Cost'].median()) & (cost_rows['Gross Margin (%)'] < 10)]
+                st.dataframe(high_cost_low_margin[['Product Name', 'Division', 'Cost', 'Sales', 'Gross Margin (%)']].drop_duplicates().head(10))
+            else:
+                st.info("No data available.")
+
+        def render_temporal_trends():
+            st.subheader("Temporal Trends (Monthly)")
+            if not summary_empty:
+                monthly_trends = memo('monthly_trends', lambda: get_monthly_trends(summary_df, rows=summary_rows))
             
-            fig.update_layout(title_text="Monthly Sales and Gross Margin Trends")
-            fig.update_yaxes(title_text="Total Sales ($)", secondary_y=False)
-            fig.update_yaxes(title_text="Gross Margin (%)", secondary_y=True)
+                fig = make_subplots(specs=[[{"secondary_y": True}]])
             
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No data to display trends.")
-
-    with tab7:
-        st.subheader("Geospatial Insights (By State)")
-        if not filtered_df.empty:
-            state_performance = get_state_performance(filtered_df)
+                fig.add_trace(
+                    go.Bar(x=monthly_trends['Month'].astype(str), y=monthly_trends['Sales'], name="Total Sales", marker_color=COLOR_SEQUENCE[0]),
+                    secondary_y=False
+                )
             
-            fig = px.bar(
-                state_performance.head(10), 
-                x='Gross Profit', 
-                y='State/Province', 
-                orientation='h',
-                color='Gross Profit',
-                title="Top 10 States by Gross Profit",
-                hover_data=['Sales', 'Gross Margin (%)'],
-                color_continuous_scale='Viridis'
-            )
-            fig.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig, use_container_width=True)
+                fig.add_trace(
+                    go.Scatter(x=monthly_trends['Month'].astype(str), y=monthly_trends['Gross Margin (%)'], name="Gross Margin (%)", marker_color=COLOR_SEQUENCE[2], mode='lines+markers'),
+                    secondary_y=True
+                )
             
-            st.write("Full State Performance Data:")
-            st.dataframe(state_performance.style.format({'Sales': '${:,.2f}', 'Gross Profit': '${:,.2f}', 'Gross Margin (%)': '{:.2f}%'}))
-        else:
-            st.info("No data available.")
-
-    with tab8:
-        st.subheader("Customer Profitability (Simulated)")
-        if not filtered_df.empty:
-            cust_stats = get_customer_profitability(filtered_df)
+                fig.update_layout(title_text="Monthly Sales and Gross Margin Trends")
+                fig.update_yaxes(title_text="Total Sales ($)", secondary_y=False)
+                fig.update_yaxes(title_text="Gross Margin (%)", secondary_y=True)
             
-            col1, col2 = st.columns([2, 1])
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("No data to display trends.")
+
+        def render_geospatial_insights():
+            st.subheader("Geospatial Insights (By State)")
+            if not summary_empty:
+                state_performance = memo('state_performance', lambda: get_state_performance(summary_df, rows=summary_rows))
             
-            with col1:
-                st.markdown("#### Top 15 Customers by Profit")
                 fig = px.bar(
-                    cust_stats.head(15),
-                    x='Customer ID',
-                    y='Gross Profit',
-                    title="Top 15 Customers by Profit",
+                    state_performance.head(10), 
+                    x='Gross Profit', 
+                    y='State/Province', 
+                    orientation='h',
+                    color='Gross Profit',
+                    title="Top 10 States by Gross Profit",
                     hover_data=['Sales', 'Gross Margin (%)'],
                     color_continuous_scale='Viridis'
                 )
+                fig.update_layout(yaxis={'categoryorder':'total ascending'})
                 st.plotly_chart(fig, use_container_width=True)
+            
+                st.write("Full State Performance Data:")
+                st.dataframe(state_performance.style.format({'Sales': '${:,.2f}', 'Gross Profit': '${:,.2f}', 'Gross Margin (%)': '{:.2f}%'}))
+            else:
+                st.info("No data available.")
+
+        def render_customer_insights():
+            st.subheader("Customer Profitability (Simulated)")
+            if not summary_empty:
+                cust_stats = memo('customer_stats', lambda: get_customer_profitability(summary_df, rows=summary_rows))
+            
+                col1, col2 = st.columns([2, 1])
+            
+                with col1:
+                    st.markdown("#### Top 15 Customers by Profit")
+                    fig = px.bar(
+                        cust_stats.head(15),
+                        x='Customer ID',
+                        y='Gross Profit',
+                        title="Top 15 Customers by Profit",
+                        hover_data=['Sales', 'Gross Margin (%)'],
+                        color_continuous_scale='Viridis'
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
                 
-            with col2:
-                st.markdown("#### Customer Metrics")
-                st.metric("Total Customers", f"{cust_stats['Customer ID'].nunique():,.0f}")
-                st.metric("Avg Profit per Customer", f"${cust_stats['Gross Profit'].mean():,.2f}")
+                with col2:
+                    st.markdown("#### Customer Metrics")
+                    st.metric("Total Customers", f"{cust_stats['Customer ID'].nunique():,.0f}")
+                    st.metric("Avg Profit per Customer", f"${cust_stats['Gross Profit'].mean():,.2f}")
                 
-            st.markdown("#### Detailed Customer Data")
-            st.dataframe(cust_stats.head(50).style.format({'Sales': '${:,.2f}', 'Gross Profit': '${:,.2f}', 'Gross Margin (%)': '{:.2f}%'}))
-        else:
-            st.info("No data available.")
-
-    # Sidebar Data Export
-    st.sidebar.markdown("---")
-    st.sidebar.download_button(
-        label="Download Filtered Data",
-        data=filtered_df.to_csv(index=False).encode('utf-8'),
-        file_name='filtered_profitability_data.csv',
-        mime='text/csv',
-    )
-    
-    with tab9:
-        st.subheader("Sales & Profit Forecasting (6 Months)")
-        if not filtered_df.empty:
-            forecast_df = generate_forecast(filtered_df, periods=6)
+                st.markdown("#### Detailed Customer Data")
+                st.dataframe(cust_stats.head(50).style.format({'Sales': '${:,.2f}', 'Gross Profit': '${:,.2f}', 'Gross Margin (%)': '{:.2f}%'}))
+            else:
+                st.info("No data available.")
+
+        def render_forecasting():
+            st.subheader("Sales & Profit Forecasting (6 Months)")
+            if not summary_empty:
+                forecast_df = memo('forecast', lambda: generate_forecast(summary_df, periods=6, cache=get_forecast_cache(), rows=summary_rows), 6)
             
-            # Metric Card for Forecasted Totals
-            forecast_only = forecast_df[forecast_df['Type'] == 'Forecast']
-            total_forecast_sales = forecast_only['Sales'].sum()
-            total_forecast_profit = forecast_only['Gross Profit'].sum()
+                # Metric Card for Forecasted Totals
+                forecast_only = forecast_df[forecast_df['Type'] == 'Forecast']
+                total_forecast_sales = forecast_only['Sales'].sum()
+                total_forecast_profit = forecast_only['Gross Profit'].sum()
             
-            c1, c2 = st.columns(2)
-            c1.metric("Forecasted Sales (Next 6 Months)", f"${total_forecast_sales:,.2f}")
-            c2.metric("Forecasted Profit (Next 6 Months)", f"${total_forecast_profit:,.2f}")
+                c1, c2 = st.columns(2)
+                c1.metric("Forecasted Sales (Next 6 Months)", f"${total_forecast_sales:,.2f}")
+                c2.metric("Forecasted Profit (Next 6 Months)", f"${total_forecast_profit:,.2f}")
             
-            # Plot
-            fig = px.line(
-                forecast_df, 
-                x='Order Date', 
-                y='Sales', 
-                color='Type', 
-                title="Sales Forecast",
-                color_discrete_sequence=[COLOR_SEQUENCE[0], COLOR_SEQUENCE[2]] # Blue for history, Orange for forecast
-            )
-            st.plotly_chart(fig, use_container_width=True)
+                # Plot
+                fig = px.line(
+                    forecast_df, 
+                    x='Order Date', 
+                    y='Sales', 
+                    color='Type', 
+                    title="Sales Forecast",
+                    color_discrete_sequence=[COLOR_SEQUENCE[0], COLOR_SEQUENCE[2]] # Blue for history, Orange for forecast
+                )
+                st.plotly_chart(fig, use_container_width=True)
             
-            fig2 = px.line(
-                forecast_df, 
-                x='Order Date', 
-                y='Gross Profit', 
-                color='Type', 
-                title="Gross Profit Forecast",
-                color_discrete_sequence=[COLOR_SEQUENCE[1], COLOR_SEQUENCE[3]] # Green for history, Red for forecast
-            )
-            st.plotly_chart(fig2, use_container_width=True)
-        else:
-            st.info("No data available for forecasting.")
+                fig2 = px.line(
+                    forecast_df, 
+                    x='Order Date', 
+                    y='Gross Profit', 
+                    color='Type', 
+                    title="Gross Profit Forecast",
+                    color_discrete_sequence=[COLOR_SEQUENCE[1], COLOR_SEQUENCE[3]] # Green for history, Red for forecast
+                )
+                st.plotly_chart(fig2, use_container_width=True)
+            else:
+                st.info("No data available for forecasting.")
 
-    with tab10:
-        st.subheader("Scenario Planning (What-If Analysis)")
-        st.markdown("Adjust the parameters below to see the impact on profitability.")
+        def render_scenario_planning():
+            st.subheader("Scenario Planning (What-If Analysis)")
+            st.markdown("Adjust the parameters below to see the impact on profitability.")
         
-        c1, c2, c3 = st.columns(3)
-        with c1:
-            mfg_change = st.slider("Mfg Cost Change (%)", -20.0, 20.0, 0.0, 0.5)
-        with c2:
-            ship_change = st.slider("Shipping Cost Change (%)", -20.0, 20.0, 0.0, 0.5)
-        with c3:
-            price_change = st.slider("Sales Price Change (%)", -20.0, 20.0, 0.0, 0.5)
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                mfg_change = st.slider("Mfg Cost Change (%)", -SCENARIO_RANGE, SCENARIO_RANGE, 0.0, SCENARIO_STEP)
+            with c2:
+                ship_change = st.slider("Shipping Cost Change (%)", -SCENARIO_RANGE, SCENARIO_RANGE, 0.0, SCENARIO_STEP)
+            with c3:
+                price_change = st.slider("Sales Price Change (%)", -SCENARIO_RANGE, SCENARIO_RANGE, 0.0, SCENARIO_STEP)
             
-        if st.button("Run Simulation"):
-            if not filtered_df.empty:
-                results = run_scenario(filtered_df, mfg_change, ship_change, price_change)
+            if st.button("Run Simulation"):
+                if not summary_empty:
+                    results = memo('scenario', lambda: run_scenario(summary_df, mfg_change, ship_change, price_change, rows=summary_rows), mfg_change, ship_change, price_change)
                 
-                # Display Results
-                st.divider()
-                st.markdown("### Simulation Results")
+                    # Display Results
+                    st.divider()
+                    st.markdown("### Simulation Results")
                 
-                m1, m2, m3 = st.columns(3)
-                m1.metric(
-                    "Projected Profit", 
-                    f"${results['New Profit']:,.2f}", 
-                    f"{results['Profit Change']:,.2f}",
-                    delta_color="normal"
-                )
-                m2.metric(
-                    "Projected Margin", 
-                    f"{results['New Margin']:.2f}%", 
-                    f"{results['Margin Change']:.2f}%",
-                    delta_color="normal"
-                )
-                m3.metric(
-                    "Projected Sales", 
-                    f"${results['New Sales']:,.2f}", 
-                    f"${results['New Sales'] - results['Original Sales']:,.2f}",
-                    delta_color="normal"
-                )
+                    m1, m2, m3 = st.columns(3)
+                    m1.metric(
+                        "Projected Profit", 
+                        f"${results['New Profit']:,.2f}", 
+                        f"{results['Profit Change']:,.2f}",
+                        delta_color="normal"
+                    )
+                    m2.metric(
+                        "Projected Margin", 
+                        f"{results['New Margin']:.2f}%", 
+                        f"{results['Margin Change']:.2f}%",
+                        delta_color="normal"
+                    )
+                    m3.metric(
+                        "Projected Sales", 
+                        f"${results['New Sales']:,.2f}", 
+                        f"${results['New Sales'] - results['Original Sales']:,.2f}",
+                        delta_color="normal"
+                    )
                 
-                # Comparison Chart
-                scenario_data = pd.DataFrame({
-                    'Metric': ['Total Profit', 'Total Profit'],
-                    'Scenario': ['Original', 'New'],
-                    'Value': [results['Original Profit'], results['New Profit']]
-                })
+                    # Comparison Chart
+                    scenario_data = pd.DataFrame({
+                        'Metric': ['Total Profit', 'Total Profit'],
+                        'Scenario': ['Original', 'New'],
+                        'Value': [results['Original Profit'], results['New Profit']]
+                    })
                 
-                fig = px.bar(
-                    scenario_data, 
-                    x='Metric', 
-                    y='Value', 
-                    color='Scenario', 
-                    barmode='group',
-                    title="Profit Comparison",
-                    color_discrete_sequence=[COLOR_SEQUENCE[0], COLOR_SEQUENCE[2]]
+                    fig = px.bar(
+                        scenario_data, 
+                        x='Metric', 
+                        y='Value', 
+                        color='Scenario', 
+                        barmode='group',
+                        title="Profit Comparison",
+                        color_discrete_sequence=[COLOR_SEQUENCE[0], COLOR_SEQUENCE[2]]
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.warning("No data available to simulate.")
+
+            if not summary_empty:
+                st.divider()
+                st.markdown("### Sensitivity Heatmap")
+                st.caption(f"Profit change across every price and manufacturing cost slider position, at a {ship_change:+.1f}% shipping cost change.")
+                steps = np.linspace(-SCENARIO_RANGE, SCENARIO_RANGE, int(round(2 * SCENARIO_RANGE / SCENARIO_STEP)) + 1)
+                grid = memo('sensitivity_grid', lambda: sensitivity_grid(summary_df, steps, [ship_change], steps, rows=summary_rows), ship_change)
+                heatmap = grid.pivot(index='Mfg Cost Change (%)', columns='Price Change (%)', values='Profit Change')
+                fig = px.imshow(
+                    heatmap,
+                    origin='lower',
+                    aspect='auto',
+                    color_continuous_scale='RdYlGn',
+                    color_continuous_midpoint=0,
+                    labels={'x': 'Sales Price Change (%)', 'y': 'Mfg Cost Change (%)', 'color': 'Profit Change ($)'},
+                    title="Profit Change by Price and Manufacturing Cost"
                 )
+                # Every slider position is a cell, so the current scenario is marked exactly
+                fig.add_scatter(x=[price_change], y=[mfg_change], mode='markers', name='Current scenario',
+                                marker=dict(symbol='x', size=12, color='black'), showlegend=False)
                 st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.warning("No data available to simulate.")
 
+            if not summary_empty:
+                st.divider()
+                with st.expander("Monte Carlo Risk Simulation"):
+                    st.caption("Draws correlated price and cost shocks per group and reports the resulting profit distribution. Overhead is held fixed.")
+                    r1, r2, r3 = st.columns(3)
+                    with r1:
+                        risk_by = st.selectbox("Shock Groups", ['Division', 'Product Name'], key="risk_by")
+                        n_trials = st.select_slider("Trials", options=[10_000, 50_000, 100_000, 250_000, 500_000], value=100_000, key="risk_trials")
+                    with r2:
+                        price_vol = st.number_input("Price Volatility (%)", 0.0, 50.0, 5.0, 0.5, key="risk_price_vol")
+                        mfg_vol = st.number_input("Mfg Cost Volatility (%)", 0.0, 50.0, 5.0, 0.5, key="risk_mfg_vol")
+                    with r3:
+                        ship_vol = st.number_input("Shipping Cost Volatility (%)", 0.0, 50.0, 10.0, 0.5, key="risk_ship_vol")
+                        group_corr = st.slider("Cross-Group Correlation", 0.0, 1.0, 0.5, 0.05, key="risk_group_corr")
+
+                    if st.button("Run Risk Simulation"):
+                        risk = memo('risk_simulation', lambda: simulate_profit_risk(
+                            summary_df, by=risk_by, n_trials=n_trials, price_vol_pct=price_vol, mfg_vol_pct=mfg_vol,
+                            shipping_vol_pct=ship_vol, group_correlation=group_corr, rows=summary_rows
+                        ), risk_by, n_trials, price_vol, mfg_vol, ship_vol, group_corr)
+                        if risk:
+                            summary = risk['Summary']
+                            k1, k2, k3, k4 = st.columns(4)
+                            k1.metric("Expected Profit", f"${summary['Mean Profit']:,.2f}", f"{summary['Mean Profit'] - summary['Baseline Profit']:,.2f}")
+                            k2.metric("VaR (95%)", f"${summary['VaR 95%']:,.2f}")
+                            k3.metric("Expected Shortfall (95%)", f"${summary['Expected Shortfall 95%']:,.2f}")
+                            k4.metric("Probability of Loss", f"{summary['Probability of Loss']:.2%}")
+
+                            # Histogram of a bounded sample keeps the chart payload small at any trial count
+                            trials = risk['Trials']
+                            shown = np.random.default_rng(0).choice(trials, size=min(len(trials), DEFAULT_POINT_BUDGET), replace=False)
+                            fig = px.histogram(x=shown, nbins=60, labels={'x': 'Simulated Gross Profit ($)'},
+                                               title="Simulated Profit Distribution", color_discrete_sequence=[COLOR_SEQUENCE[0]])
+                            fig.add_vline(x=summary['Baseline Profit'], line_dash="dash", annotation_text="Baseline")
+                            fig.add_vline(x=summary['Baseline Profit'] - summary['VaR 95%'], line_dash="dot", annotation_text="VaR 95%")
+                            st.plotly_chart(fig, use_container_width=True)
+
+                            q1, q2 = st.columns(2)
+                            with q1:
+                                st.markdown("**Profit Quantiles**")
+                                st.dataframe(risk['Quantiles'].style.format({'Quantile': '{:.0%}', 'Profit': '${:,.2f}', 'Change vs Baseline': '${:,.2f}'}), hide_index=True)
+                            with q2:
+                                st.markdown("**Downside Contributions**")
+                                st.dataframe(risk['Contributions'][[risk_by, 'Baseline Profit', 'Std Profit', 'Shortfall Contribution', 'Shortfall Share (%)']]
+                                             .style.format({'Baseline Profit': '${:,.2f}', 'Std Profit': '${:,.2f}', 'Shortfall Contribution': '${:,.2f}', 'Shortfall Share (%)': '{:.1f}%'}), hide_index=True)
+                        else:
+                            st.warning("Risk simulation failed for the current selection.")
 
-    with tab11:
-        st.subheader("Generate Reports")
-        st.markdown("Download detailed analysis reports based on current filters.")
+
+        def render_reports():
+            st.subheader("Generate Reports")
+            st.markdown("Download detailed analysis reports based on current filters.")
         
-        if not filtered_df.empty:
-            # 1. Excel Report Generator
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                # Sheet 1: Filtered Raw Data
-                filtered_df.to_excel(writer, sheet_name='Raw Data', index=False)
-                
-                # Sheet 2: Product Performance
-                product_stats = get_product_profitability(filtered_df)
-                product_stats.to_excel(writer, sheet_name='Product Performance', index=False)
-                
-                # Sheet 3: Division Performance
-                division_stats = get_division_performance(filtered_df)
-                division_stats.to_excel(writer, sheet_name='Division Performance', index=False)
-                
-                # Sheet 4: Monthly Trends
-                monthly_trends = get_monthly_trends(filtered_df)
-                monthly_trends.to_excel(writer, sheet_name='Monthly Trends', index=False)
-                
-            buffer.seek(0)
-            
-            st.download_button(
-                label="Download Comprehensive Excel Report",
-                data=buffer,
-                file_name="Profitability_Analysis_Report.xlsx",
-                mime="application/vnd.ms-excel"
-            )
+            if filtered_count:
+                # 1. Excel Report Generator
+                def build_excel_report():
+                    report_aggregates = aggregate_dimensions(summary_df, ['Product Name', 'Division'], rows=summary_rows)
+                    sheets = {
+                        # Sheet 1: Filtered Raw Data, gathered from the cached frame chunk by chunk
+                        'Raw Data': (df, filter_mask, raw_columns),
+                        # Sheet 2: Product Performance
+                        'Product Performance': get_product_profitability(summary_df, report_aggregates),
+                        # Sheet 3: Division Performance
+                        'Division Performance': get_division_performance(summary_df, report_aggregates),
+                        # Sheet 4: Monthly Trends
+                        'Monthly Trends': memo('monthly_trends', lambda: get_monthly_trends(summary_df, rows=summary_rows)),
+                    }
+                    sweep_exports()
+                    return write_excel_report(export_path('excel_report', filter_key, 'xlsx'), sheets)
+
+                if export_requested('excel_report'):
+                    with st.spinner("Building Excel report..."):
+                        report_path = export_file('excel_report', build_excel_report)
+                    with open(report_path, 'rb') as report_file:
+                        st.download_button(
+                            label="Download Comprehensive Excel Report",
+                            data=report_file,
+                            file_name="Profitability_Analysis_Report.xlsx",
+                            mime="application/vnd.ms-excel"
+                        )
+                else:
+                    st.button("Prepare Excel Report", on_click=request_export, args=('excel_report',))
             
-            st.markdown("### Report Contents:")
-            st.markdown("""
-            - **Raw Data**: The complete dataset allowing for your own custom analysis.
-            - **Product Performance**: Sales, Profit, and Margin metrics by Product.
-            - **Division Performance**: Aggregated metrics by Division.
-            - **Monthly Trends**: Time-series data for Sales and Profit.
-            """)
+                st.markdown("### Report Contents:")
+                st.markdown("""
+                - **Raw Data**: The complete dataset allowing for your own custom analysis.
+                - **Product Performance**: Sales, Profit, and Margin metrics by Product.
+                - **Division Performance**: Aggregated metrics by Division.
+                - **Monthly Trends**: Time-series data for Sales and Profit.
+                """)
             
+            else:
+                st.info("No data available to generate reports.")
+
+        # Tab dispatch
+        TAB_RENDERERS = {
+            "Overview": render_overview,
+            "Product Analysis": render_product_analysis,
+            "Division Performance": render_division_performance,
+            "Profit Concentration": render_profit_concentration,
+            "Cost Diagnostics": render_cost_diagnostics,
+            "Temporal Trends": render_temporal_trends,
+            "Geospatial Insights": render_geospatial_insights,
+            "Customer Insights": render_customer_insights,
+            "Forecasting": render_forecasting,
+            "Scenario Planning": render_scenario_planning,
+            "Reports": render_reports
+        }
+
+        def timed_render(name):
+            start = time.perf_counter()
+            with instrumentation.stage(f"Tab: {name}"):
+                TAB_RENDERERS[name]()
+            st.session_state.setdefault('tab_timings', {})[name] = (time.perf_counter() - start) * 1000
+
+        st.sidebar.markdown("---")
+        lazy_tabs = st.sidebar.toggle("Lazy tab rendering", value=True, help="Only run the analytics of the selected tab on each rerun.")
+        st.sidebar.toggle("Record performance", key="record_performance", help="Record wall time, rows in/out and peak memory of every pipeline stage and insight function on the next rerun. Adds tracemalloc overhead while on.")
+
+        rendered = []
+        if lazy_tabs:
+            # st.tabs always executes every body, so a selector drives which single tab runs
+            active_tab = st.radio("View", list(TAB_RENDERERS), horizontal=True, key="active_tab", label_visibility="collapsed")
+            timed_render(active_tab)
+            rendered.append(active_tab)
         else:
-            st.info("No data available to generate reports.")                
+            for tab, name in zip(st.tabs(list(TAB_RENDERERS)), TAB_RENDERERS):
+                with tab:
+                    timed_render(name)
+                    rendered.append(name)
+
+        # Timing breakdown: last measured cost of every tab, and what lazy mode skipped on this rerun
+        with st.sidebar.expander("Render Timing"):
+            timings = st.session_state.get('tab_timings', {})
+            timing_df = pd.DataFrame({
+                'Tab': list(TAB_RENDERERS),
+                'Last Render (ms)': [timings.get(name) for name in TAB_RENDERERS],
+                'Ran This Rerun': [name in rendered for name in TAB_RENDERERS]
+            })
+            st.dataframe(timing_df, hide_index=True)
+            rendered_ms = sum(timings.get(name, 0) for name in rendered)
+            skipped_ms = sum(timings.get(name, 0) for name in TAB_RENDERERS if name not in rendered)
+            st.caption(f"This rerun: {rendered_ms:,.0f} ms rendered, ~{skipped_ms:,.0f} ms skipped (based on each tab's last measured render).")
+
+        # Stage-level breakdown of this rerun; cached and memoized stages do not run, so they do not appear
+        with st.expander("Performance"):
+            if instrumentation.is_enabled():
+                instrumentation.disable()
+                stages = instrumentation.stage_report()
+                if stages.empty:
+                    st.info("No stages ran on this rerun (every result came from a cache).")
+                else:
+                    st.dataframe(stages, hide_index=True, column_config={
+                        'Total ms': st.column_config.NumberColumn(format="%.1f"),
+                        'Mean ms': st.column_config.NumberColumn(format="%.1f"),
+                        'Peak MB': st.column_config.NumberColumn(format="%.2f"),
+                    })
+                    st.caption(f"{stages['Calls'].sum()} stage calls recorded. Peak MB is allocation above what was live when the stage started.")
+                    if not instrumentation.memory_recorded():
+                        st.caption("Peak MB was not recorded: another session is recording memory, and only one can at a time.")
+            else:
+                st.caption("Turn on 'Record performance' in the sidebar to time each pipeline stage and insight function.")
+finally:
+    instrumentation.disable()
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from analysis.cube import ProfitCube
+from analysis.data_processing import load_data, clean_data, feature_engineering
+from analysis.risk import simulate_profit_risk
+from analysis.scenario import SCENARIO_METRICS, run_scenario
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "Nassau Candy Distributor.csv")
+PARAMS = (5.0, -2.5, 7.5)
+
+
+@pytest.fixture(scope="module")
+def engineered():
+    df = feature_engineering(clean_data(load_data(DATA_PATH)))
+    return df.reset_index(drop=True)
+
+
+def _with_missing_costs(df, columns, fraction=0.05, seed=0):
+    df = df.copy()
+    rng = np.random.default_rng(seed)
+    for col in columns:
+        df.loc[rng.random(len(df)) < fraction, col] = np.nan
+    return df
+
+
+VARIANTS = {
+    'complete': lambda df: df,
+    'nan components': lambda df: _with_missing_costs(df, ['Manufacturing Cost', 'Shipping Cost', 'Overhead Cost']),
+    'nan cost, no components': lambda df: _with_missing_costs(df, ['Cost']).drop(
+        columns=['Manufacturing Cost', 'Shipping Cost', 'Overhead Cost']),
+}
+
+
+@pytest.mark.parametrize("variant", list(VARIANTS))
+def test_scenario_on_cube_matches_raw_rows(engineered, variant):
+    df = VARIANTS[variant](engineered)
+    cube = ProfitCube.from_frame(df)
+    division = df['Division'].iloc[0]
+
+    cells = cube.slice(members={'Division': [division]})
+    expected = run_scenario(df, *PARAMS, rows=(df['Division'] == division).to_numpy())
+    actual = run_scenario(cells, *PARAMS)
+
+    for key in SCENARIO_METRICS:
+        assert actual[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-6), key
+
+
+@pytest.mark.parametrize("variant", list(VARIANTS))
+def test_risk_on_cube_matches_raw_rows(engineered, variant):
+    df = VARIANTS[variant](engineered)
+    cube = ProfitCube.from_frame(df)
+
+    expected = simulate_profit_risk(df, n_trials=2_000)
+    actual = simulate_profit_risk(cube.cells, n_trials=2_000)
+
+    for key, value in expected['Summary'].items():
+        assert actual['Summary'][key] == pytest.approx(value, rel=1e-9, abs=1e-6), key
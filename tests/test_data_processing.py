@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.data_processing import (
+    DATE_FORMAT, SIMULATED_CATEGORICAL_COLUMNS, load_data, clean_data, feature_engineering, parse_dates, row_keys
+)
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "Nassau Candy Distributor.csv")
+SIMULATED_COLUMNS = SIMULATED_CATEGORICAL_COLUMNS + ['Manufacturing Cost', 'Shipping Cost', 'Overhead Cost']
+
+DATE_STRINGS = ['03-01-2024', '31-12-2025', '03-01-2024', None, '', '31-02-2024', '2024/01/05', 'n/a',
+                ' 03-01-2024', '29-02-2024', '03-01-2024', None]
+
+
+def _reference(values):
+    return pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+
+
+@pytest.mark.parametrize("dtype", [object, 'category'])
+def test_parse_dates_matches_to_datetime(dtype):
+    values = pd.Series(DATE_STRINGS, dtype=dtype, name='Order Date', index=np.arange(100, 100 + len(DATE_STRINGS)))
+
+    parsed = parse_dates(values)
+
+    pd.testing.assert_series_equal(parsed, _reference(pd.Series(DATE_STRINGS, index=values.index, name='Order Date')))
+    assert parsed.isna().tolist() == [False, False, False, True, True, True, True, True, True, False, False, True]
+
+
+@pytest.mark.parametrize("dtype", [object, 'category'])
+def test_parse_dates_empty(dtype):
+    values = pd.Series([], dtype=dtype, name='Order Date')
+
+    parsed = parse_dates(values)
+
+    assert len(parsed) == 0
+    assert parsed.dtype == 'datetime64[ns]'
+
+
+@pytest.mark.parametrize("dtype", [object, 'category'])
+def test_parse_dates_all_missing(dtype):
+    values = pd.Series([None, None], dtype=dtype)
+    assert parse_dates(values).isna().all()
+
+
+def test_parse_dates_leaves_datetimes_unchanged():
+    values = pd.Series(pd.to_datetime(['2024-01-03', None]))
+    assert parse_dates(values) is values
+
+
+def test_parse_dates_with_unused_categories():
+    values = pd.Series(pd.Categorical(['03-01-2024', 'bad'], categories=['01-01-2020', '03-01-2024', 'bad']))
+    pd.testing.assert_series_equal(parse_dates(values), _reference(values.astype(object)))
+
+
+@pytest.fixture(scope="module")
+def cleaned():
+    return clean_data(load_data(DATA_PATH))
+
+
+def _simulated(df):
+    return df[SIMULATED_COLUMNS].sort_index().astype({col: str for col in SIMULATED_CATEGORICAL_COLUMNS})
+
+
+@pytest.mark.parametrize("drop_row_id", [False, True])
+def test_simulated_columns_do_not_depend_on_row_order(cleaned, drop_row_id):
+    base = cleaned.drop(columns=['Row ID']) if drop_row_id else cleaned
+    expected = _simulated(feature_engineering(base.copy()))
+
+    shuffled = feature_engineering(base.sample(frac=1, random_state=0))
+
+    pd.testing.assert_frame_equal(_simulated(shuffled), expected)
+
+
+def test_simulated_columns_do_not_depend_on_batches(cleaned):
+    # Engineering the rows in separate drops, as ingest_orders does (it requires Row ID), gives the values
+    # of one full pass. The Order ID fallback numbers repeated lines per frame, so it only holds per frame.
+    expected = _simulated(feature_engineering(cleaned.copy()))
+    first = cleaned.index < 8000
+
+    parts = [feature_engineering(cleaned[first].copy()), feature_engineering(cleaned[~first].copy())]
+
+    pd.testing.assert_frame_equal(_simulated(pd.concat(parts)), expected)
+
+
+def test_order_id_fallback_keys_each_line():
+    lines = pd.DataFrame({'Order ID': ['A', 'A', 'A', 'B'], 'Product ID': ['X', 'Y', 'X', 'X']})
+
+    keys = row_keys(lines)
+
+    assert len(set(keys)) == 4
+    # Re-sorting keeps each line's key: repeats are numbered in index order
+    np.testing.assert_array_equal(row_keys(lines.iloc[::-1]), keys[::-1])
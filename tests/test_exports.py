@@ -0,0 +1,84 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.exports import write_csv_chunked, write_excel_report
+from analysis.views import take_columns
+
+
+def _orders(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Order ID': pd.Series([f"US-2024-{i:07d}" for i in range(n)]),
+        'Order Date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D'),
+        'Division': pd.Categorical(rng.choice(['Chocolate', 'Sugar', 'Other'], n)),
+        'Sales': rng.gamma(2.0, 10.0, n),
+        'Gross Profit': rng.normal(5.0, 3.0, n),
+        'Units': rng.integers(1, 10, n),
+    })
+
+
+@pytest.mark.parametrize("chunksize", [1, 7, 1_000])
+def test_csv_matches_materialized_selection(tmp_path, chunksize):
+    df = _orders(500)
+    mask = (df['Division'] != 'Sugar').to_numpy()
+    columns = ['Order ID', 'Sales', 'Division', 'Missing Column']
+
+    path = write_csv_chunked(df, str(tmp_path / "rows.csv"), rows=mask, columns=columns, chunksize=chunksize)
+
+    expected = take_columns(df, columns, mask).to_csv(index=False)
+    with open(path, encoding="utf-8", newline="") as f:
+        assert f.read() == expected
+
+
+def test_csv_of_empty_selection_has_header(tmp_path):
+    df = _orders(10)
+
+    path = write_csv_chunked(df, str(tmp_path / "rows.csv"), rows=np.zeros(len(df), dtype=bool), columns=['Sales', 'Units'])
+
+    assert pd.read_csv(path).columns.tolist() == ['Sales', 'Units']
+    assert len(pd.read_csv(path)) == 0
+
+
+def test_excel_selection_sheet_matches_rows(tmp_path):
+    df = _orders(300)
+    positions = np.flatnonzero((df['Units'] > 4).to_numpy())
+    columns = ['Order ID', 'Order Date', 'Sales']
+
+    path = write_excel_report(str(tmp_path / "report.xlsx"), {
+        'Raw Data': (df, positions, columns),
+        'Summary': pd.DataFrame({'Rows': [len(positions)]}),
+    }, chunksize=16)
+
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert list(sheets) == ['Raw Data', 'Summary']
+    expected = take_columns(df, columns, positions).reset_index(drop=True)
+    pd.testing.assert_frame_equal(sheets['Raw Data'], expected, check_dtype=False)
+
+
+def _peak_bytes(write):
+    tracemalloc.start()
+    try:
+        write()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_csv_peak_memory_does_not_grow_with_selection(tmp_path):
+    df = _orders(100_000)
+    path = str(tmp_path / "rows.csv")
+    small = np.zeros(len(df), dtype=bool)
+    small[:10_000] = True
+    full = np.ones(len(df), dtype=bool)
+
+    peaks = {name: _peak_bytes(lambda: write_csv_chunked(df, path, rows=rows, chunksize=5_000))
+             for name, rows in [('small', small), ('full', full)]}
+
+    growth = peaks['full'] - peaks['small']
+    added = take_columns(df, df.columns, full & ~small).memory_usage(deep=True).sum()
+    # Ten times the rows: only the 8-byte position array grows, never a copy of the selected rows
+    assert growth < 8 * (full.sum() - small.sum()) + 256 * 1024
+    assert growth < added / 4
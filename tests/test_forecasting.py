@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from analysis.forecasting import ForecastModelCache, _fit_holt_winters
+
+
+def _monthly_series(n_months, seed=0):
+    rng = np.random.default_rng(seed)
+    months = pd.date_range('2021-01-31', periods=n_months, freq='M')
+    values = 1000 + 10 * np.arange(n_months) + 200 * np.sin(np.arange(n_months) * np.pi / 6) + rng.normal(0, 20, n_months)
+    series = pd.Series(values, index=months, name='Sales')
+    series.index.freq = 'M'
+    return series
+
+
+def test_warm_index_is_written_on_flush_only(tmp_path):
+    cache = ForecastModelCache(cache_dir=str(tmp_path))
+    for n_months in (36, 37, 38):
+        cache.fit_forecast(_monthly_series(n_months), 6)
+    assert not os.path.exists(tmp_path / "warm_index.pkl")
+
+    cache.flush()
+
+    assert os.path.exists(tmp_path / "warm_index.pkl")
+    assert cache.warm_starts == 2
+    restarted = ForecastModelCache(cache_dir=str(tmp_path))
+    restarted.fit_forecast(_monthly_series(39), 6)
+    assert restarted.warm_starts == 1
+
+
+def test_without_warm_start_forecasts_match_cold_fits():
+    cache = ForecastModelCache(warm_start=False)
+    for n_months in (36, 37):
+        series = _monthly_series(n_months)
+        pd.testing.assert_series_equal(cache.fit_forecast(series, 6), _fit_holt_winters(series, 6))
+    assert cache.warm_starts == 0 and cache.cold_fits == 2
+
+
+def _entry_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith('.pkl') and name != 'warm_index.pkl')
+
+
+def test_persisted_entries_stay_bounded_across_restarts(tmp_path):
+    cache = ForecastModelCache(cache_dir=str(tmp_path))
+    for periods in range(1, 6):
+        cache.fit_forecast(_monthly_series(36), periods)
+    cache.flush()
+    files = _entry_files(tmp_path)
+    assert len(files) == 5
+    # Give the files distinct ages: the first one written is the least recently used
+    for age, name in enumerate(reversed([f"{key}.pkl" for key in cache._files])):
+        os.utime(tmp_path / name, (1_000_000 - age, 1_000_000 - age))
+    newest = [f"{key}.pkl" for key in list(cache._files)[-2:]]
+
+    restarted = ForecastModelCache(max_entries=2, cache_dir=str(tmp_path))
+
+    assert _entry_files(tmp_path) == sorted(newest)
+    for periods in range(6, 9):
+        restarted.fit_forecast(_monthly_series(36), periods)
+    assert len(_entry_files(tmp_path)) == 2
+    assert os.path.exists(tmp_path / "warm_index.pkl")
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.data_processing import load_data, clean_data, feature_engineering
+from analysis.parallel import byte_range_partitions, merge_order, prepare_data_parallel
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "Nassau Candy Distributor.csv")
+
+
+def _read_ranges(path, ranges):
+    data = path.read_bytes()
+    return [data[start:end] for start, end in ranges]
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+@pytest.mark.parametrize("n_partitions", [1, 2, 3, 7, 50])
+def test_partitions_cover_whole_lines(tmp_path, trailing_newline, n_partitions):
+    lines = [b"a,b"] + [f"{i},{'x' * (i % 13)}".encode() for i in range(40)]
+    content = b"\n".join(lines) + (b"\n" if trailing_newline else b"")
+    path = tmp_path / "rows.csv"
+    path.write_bytes(content)
+
+    header, ranges = byte_range_partitions(str(path), n_partitions)
+    blocks = _read_ranges(path, ranges)
+
+    assert header == b"a,b\n"
+    assert 1 <= len(ranges) <= n_partitions
+    # Contiguous, non-overlapping and ending at EOF, so every byte after the header is read exactly once
+    assert all(end == start for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]))
+    assert ranges[-1][1] == len(content)
+    assert header + b"".join(blocks) == content
+    # Every range but the last ends on a line boundary, so no row is split between partitions
+    assert all(block.endswith(b"\n") for block in blocks[:-1])
+    assert [line for block in blocks for line in block.splitlines()] == lines[1:]
+
+
+def test_partition_boundary_mid_line(tmp_path):
+    # Two long lines: the byte midpoint falls inside the first one, which must stay whole
+    path = tmp_path / "rows.csv"
+    path.write_bytes(b"h\n" + b"1" * 100 + b"\n" + b"2" * 10)
+
+    header, ranges = byte_range_partitions(str(path), 2)
+    blocks = _read_ranges(path, ranges)
+
+    assert blocks == [b"1" * 100 + b"\n", b"2" * 10]
+
+
+def _stable_reference(keys):
+    return np.argsort(np.concatenate(keys), kind='stable')
+
+
+def test_merge_order_matches_stable_sort_with_ties():
+    rng = np.random.default_rng(0)
+    for n_runs in (1, 2, 3, 5, 8):
+        keys = [np.sort(rng.integers(0, 20, rng.integers(0, 50))) for _ in range(n_runs)]
+        np.testing.assert_array_equal(merge_order(keys), _stable_reference(keys))
+
+
+def _dates(*values):
+    return np.array(values, dtype='datetime64[ns]')
+
+
+def test_merge_order_puts_nat_last():
+    keys = [_dates('2024-01-02', 'NaT'), _dates('2024-01-01', '2024-01-02', 'NaT', 'NaT'), _dates('NaT')]
+
+    order = merge_order(keys)
+
+    np.testing.assert_array_equal(order, _stable_reference(keys))
+    merged = np.concatenate(keys)[order]
+    assert np.isnat(merged[-4:]).all() and not np.isnat(merged[:-4]).any()
+
+
+def test_merge_order_empty():
+    assert len(merge_order([])) == 0
+    assert len(merge_order([np.array([], dtype=np.int64), np.array([], dtype=np.int64)])) == 0
+
+
+def test_parallel_pipeline_matches_sequential():
+    expected = feature_engineering(clean_data(load_data(DATA_PATH)))
+
+    result = prepare_data_parallel(DATA_PATH, max_workers=2, n_partitions=4)
+
+    assert result['Order Date'].is_monotonic_increasing
+    # Rows with equal Order Date may come out in a different order, so compare by file position
+    pd.testing.assert_frame_equal(result.sort_index(), expected.sort_index(), check_index_type=False)
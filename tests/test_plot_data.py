@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.plot_data import reduce_scatter_data, stratified_sample
+
+
+def _rows(sizes):
+    groups = np.repeat([f"g{i}" for i in range(len(sizes))], sizes)
+    return pd.DataFrame({'Division': groups, 'Sales': np.arange(len(groups), dtype=float)})
+
+
+@pytest.mark.parametrize("sizes, max_points", [
+    ([5_000, 3_000, 2_000], 500),
+    ([91] + [1] * 9, 10),
+    ([1] * 50, 10),
+    ([3] * 30 + [200], 20),
+])
+def test_sample_stays_within_budget(sizes, max_points):
+    df = _rows(sizes)
+
+    sample = stratified_sample(df, max_points)
+
+    assert len(sample) <= max_points
+    assert sample.index.is_monotonic_increasing and not sample.index.has_duplicates
+    # Every group is kept while there is room for one row each
+    kept = sample['Division'].nunique()
+    assert kept == min(len(sizes), max_points)
+
+
+def test_sample_is_proportional():
+    sample = stratified_sample(_rows([6_000, 3_000, 1_000]), 1_000)
+
+    counts = sample['Division'].value_counts()
+    for group, share in {'g0': 0.6, 'g1': 0.3, 'g2': 0.1}.items():
+        assert abs(counts[group] - share * 1_000) <= 3
+
+
+def test_reduce_reports_budget_points():
+    df = _rows([1] * 300 + [700])
+
+    reduced, info = reduce_scatter_data(df, 'Sales', 'Sales', max_points=100)
+
+    assert info == {'method': 'sample', 'rows': 1_000, 'points': len(reduced)}
+    assert len(reduced) <= 100
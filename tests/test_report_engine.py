@@ -0,0 +1,32 @@
+import json
+import os
+
+import pytest
+
+from analysis.report_engine import run_report_pack, specs_by
+from analysis.snapshot import load_prepared_data
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "Nassau Candy Distributor.csv")
+
+
+@pytest.fixture(scope="module")
+def subset():
+    # A caller-supplied frame that differs from the source file
+    df = load_prepared_data(DATA_PATH)
+    return df[df['Order Date'].dt.year == df['Order Date'].dt.year.max()]
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_workers_report_on_the_supplied_frame(tmp_path, subset, start_method):
+    specs = specs_by(subset, ['Division'])
+    expected = run_report_pack(specs, str(tmp_path / "inline"), formats=('json',), df=subset, max_workers=1)
+
+    manifest = run_report_pack(specs, str(tmp_path / "pool"), formats=('json',), df=subset, max_workers=2,
+                               batch_size=1, start_method=start_method)
+
+    assert manifest['Rows'].tolist() == expected['Rows'].tolist()
+    assert manifest['Status'].eq('ok').all()
+    for inline, pooled in zip(expected['Files'], manifest['Files']):
+        with open(inline[0]) as a, open(pooled[0]) as b:
+            assert json.load(a) == json.load(b)
+    assert json.load(open(tmp_path / "pool" / "manifest.json"))['Workers'] == 2
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.risk import simulate_profit_risk
+
+
+def _one_group(sales):
+    return pd.DataFrame({
+        'Division': ['Chocolate'] * 4,
+        'Sales': [sales / 4] * 4,
+        'Gross Profit': [sales * 3 / 16] * 4,
+        'Manufacturing Cost': [sales / 32] * 4,
+        'Shipping Cost': [sales / 64] * 4,
+        'Overhead Cost': [sales / 64] * 4,
+    })
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_group_std_survives_large_profits(max_workers):
+    # Profits around 1e9 with a spread of a few units: raw sums of squares cancel to noise here
+    df = _one_group(2e9)
+
+    result = simulate_profit_risk(df, n_trials=20_000, price_vol_pct=1e-6, mfg_vol_pct=1e-6, shipping_vol_pct=1e-6,
+                                  chunk_size=3_000, max_workers=max_workers)
+
+    # With one group, the group's profit in each trial is the trial total
+    contribution = result['Contributions'].iloc[0]
+    assert result['Summary']['Baseline Profit'] == pytest.approx(1.5e9)
+    assert contribution['Std Profit'] == pytest.approx(np.std(result['Trials']), rel=1e-6)
+    assert contribution['Mean Profit'] == pytest.approx(np.mean(result['Trials']), rel=1e-12)
@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pytest
+
+from analysis.data_processing import load_data, clean_data, feature_engineering
+from analysis.scenario import SCENARIO_METRICS, run_scenario, scenario_components, sensitivity_grid
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "Nassau Candy Distributor.csv")
+PARAMS = [(0.0, 0.0, 0.0), (5.0, -2.5, 7.5), (-20.0, 20.0, -12.5)]
+
+
+def _baseline_run_scenario(df, mfg_cost_change_pct, shipping_cost_change_pct, price_change_pct):
+    """The original row-by-row model: copy the frame, rewrite the columns, sum."""
+    scenario_df = df.copy()
+    if price_change_pct != 0:
+        scenario_df['Sales'] = scenario_df['Sales'] * (1 + price_change_pct / 100)
+    if 'Manufacturing Cost' in scenario_df.columns:
+        scenario_df['Manufacturing Cost'] = scenario_df['Manufacturing Cost'] * (1 + mfg_cost_change_pct / 100)
+    elif 'Cost' in scenario_df.columns:
+        scenario_df['Manufacturing Cost'] = scenario_df['Cost'] * 0.7 * (1 + mfg_cost_change_pct / 100)
+    if 'Shipping Cost' in scenario_df.columns:
+        scenario_df['Shipping Cost'] = scenario_df['Shipping Cost'] * (1 + shipping_cost_change_pct / 100)
+    elif 'Cost' in scenario_df.columns:
+        scenario_df['Shipping Cost'] = scenario_df['Cost'] * 0.2 * (1 + shipping_cost_change_pct / 100)
+    if 'Overhead Cost' not in scenario_df.columns and 'Cost' in scenario_df.columns:
+        scenario_df['Overhead Cost'] = scenario_df['Cost'] * 0.1
+    if all(c in scenario_df.columns for c in ('Manufacturing Cost', 'Shipping Cost', 'Overhead Cost')):
+        scenario_df['New Cost'] = scenario_df['Manufacturing Cost'] + scenario_df['Shipping Cost'] + scenario_df['Overhead Cost']
+    elif 'Cost' in scenario_df.columns:
+        scenario_df['New Cost'] = scenario_df['Cost']
+    else:
+        scenario_df['New Cost'] = 0
+    scenario_df['New Gross Profit'] = scenario_df['Sales'] - scenario_df['New Cost']
+
+    original_sales = df['Sales'].sum()
+    original_profit = df['Gross Profit'].sum()
+    original_margin = (original_profit / original_sales) * 100 if original_sales else 0
+    new_sales = scenario_df['Sales'].sum()
+    new_profit = scenario_df['New Gross Profit'].sum()
+    new_margin = (new_profit / new_sales) * 100 if new_sales else 0
+    return {
+        'Original Sales': original_sales, 'Original Profit': original_profit, 'Original Margin': original_margin,
+        'New Sales': new_sales, 'New Profit': new_profit, 'New Margin': new_margin,
+        'Profit Change': new_profit - original_profit, 'Margin Change': new_margin - original_margin
+    }
+
+
+@pytest.fixture(scope="module")
+def engineered():
+    df = feature_engineering(clean_data(load_data(DATA_PATH)))
+    return df.reset_index(drop=True)
+
+
+def _with_missing_costs(df, columns, fraction=0.05, seed=0):
+    df = df.copy()
+    rng = np.random.default_rng(seed)
+    for col in columns:
+        df.loc[rng.random(len(df)) < fraction, col] = np.nan
+    return df
+
+
+VARIANTS = {
+    'complete': lambda df: df,
+    'nan components': lambda df: _with_missing_costs(df, ['Manufacturing Cost', 'Shipping Cost', 'Overhead Cost']),
+    'nan cost only': lambda df: _with_missing_costs(df, ['Cost']),
+    'nan cost, no components': lambda df: _with_missing_costs(df, ['Cost']).drop(
+        columns=['Manufacturing Cost', 'Shipping Cost', 'Overhead Cost']),
+    'nan cost, partial components': lambda df: _with_missing_costs(df, ['Cost', 'Manufacturing Cost']).drop(
+        columns=['Shipping Cost']),
+    'no cost columns': lambda df: df.drop(columns=['Cost', 'Manufacturing Cost', 'Shipping Cost', 'Overhead Cost']),
+}
+
+
+def _assert_metrics_close(actual, expected):
+    for key in SCENARIO_METRICS:
+        assert actual[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-6), key
+
+
+@pytest.mark.parametrize("variant", list(VARIANTS))
+@pytest.mark.parametrize("params", PARAMS)
+def test_run_scenario_matches_row_by_row_model(engineered, variant, params):
+    df = VARIANTS[variant](engineered)
+    _assert_metrics_close(run_scenario(df, *params), _baseline_run_scenario(df, *params))
+
+
+@pytest.mark.parametrize("variant", list(VARIANTS))
+def test_run_scenario_with_row_selection(engineered, variant):
+    df = VARIANTS[variant](engineered)
+    mask = (df['Division'] == df['Division'].iloc[0]).to_numpy()
+    params = PARAMS[1]
+    _assert_metrics_close(run_scenario(df, *params, rows=mask), _baseline_run_scenario(df[mask], *params))
+    positions = np.flatnonzero(mask)
+    _assert_metrics_close(run_scenario(df, *params, rows=positions), _baseline_run_scenario(df[mask], *params))
+
+
+@pytest.mark.parametrize("variant", ['complete', 'nan components', 'nan cost, no components'])
+def test_grouped_components_match_per_group_model(engineered, variant):
+    df = VARIANTS[variant](engineered)
+    components = scenario_components(df, by='Division')
+    for division, group in df.groupby('Division', observed=True):
+        expected = _baseline_run_scenario(group, 0.0, 0.0, 0.0)
+        profit = (components['Costed Sales'][division] - components['Manufacturing Cost'][division]
+                  - components['Shipping Cost'][division] - components['Fixed Cost'][division])
+        assert profit == pytest.approx(expected['New Profit'], rel=1e-9)
+        assert components['Sales'][division] == pytest.approx(expected['New Sales'], rel=1e-12)
+
+
+def test_sensitivity_grid_matches_single_scenarios(engineered):
+    df = VARIANTS['nan components'](engineered)
+    steps = np.linspace(-20.0, 20.0, 81)
+
+    grid = sensitivity_grid(df, steps, [2.5], steps)
+
+    assert len(grid) == 81 * 81
+    for mfg, price in [(-20.0, 20.0), (7.5, -3.5), (0.0, 0.0)]:
+        row = grid[(grid['Mfg Cost Change (%)'] == mfg) & (grid['Price Change (%)'] == price)].iloc[0]
+        _assert_metrics_close(row, _baseline_run_scenario(df, mfg, 2.5, price))
@@ -0,0 +1,24 @@
+import os
+
+from analysis.snapshot import load_prepared_data, snapshot_path
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "Nassau Candy Distributor.csv")
+
+
+def test_rebuild_prunes_stale_snapshots(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    current = snapshot_path(DATA_PATH, str(cache_dir))
+    stem = os.path.basename(current).split("-")[0]
+    stale = [f"{stem}-{'0' * 16}-v5.arrow", f"{stem}-{'0' * 16}-v5.aggregates.pkl", f"{stem}-{'1' * 16}-v1.arrow"]
+    unrelated = [f"{stem}-2024-{'0' * 16}-v5.arrow", "forecasts"]
+    for name in stale + unrelated:
+        (cache_dir / name).write_bytes(b"")
+
+    df = load_prepared_data(DATA_PATH, str(cache_dir))
+
+    assert df is not None
+    assert sorted(os.listdir(cache_dir)) == sorted([os.path.basename(current)] + unrelated)
+    # A hit leaves the directory as it is
+    load_prepared_data(DATA_PATH, str(cache_dir))
+    assert os.path.exists(current)
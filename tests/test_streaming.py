@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.streaming import StreamingAggregator
+
+
+def _chunks(x, y, chunk_size):
+    for start in range(0, len(x), chunk_size):
+        yield pd.DataFrame({'Cost': x[start:start + chunk_size], 'Gross Margin (%)': y[start:start + chunk_size]})
+
+
+@pytest.mark.parametrize("chunk_size", [3, 1_000, 100_000])
+def test_cost_margin_correlation_matches_full_frame(chunk_size):
+    rng = np.random.default_rng(0)
+    x = rng.gamma(2.0, 3.0, 20_000)
+    y = 60 - 2 * x + rng.normal(0, 5, len(x))
+    x[rng.random(len(x)) < 0.01] = np.nan
+
+    corr = StreamingAggregator().consume(_chunks(x, y, chunk_size)).cost_margin_correlation()
+
+    valid = ~np.isnan(x)
+    assert corr == pytest.approx(np.corrcoef(x[valid], y[valid])[0, 1], rel=1e-12)
+
+
+def test_cost_margin_correlation_survives_large_offsets():
+    # Raw sums of squares cancel catastrophically when the spread is tiny relative to the mean
+    rng = np.random.default_rng(1)
+    x = 1e8 + rng.normal(0, 1, 200_000)
+    y = 1e8 + 0.5 * (x - 1e8) + rng.normal(0, 1, len(x))
+
+    corr = StreamingAggregator().consume(_chunks(x, y, 10_000)).cost_margin_correlation()
+
+    assert corr == pytest.approx(np.corrcoef(x, y)[0, 1], rel=1e-9)
+
+
+def test_cost_margin_correlation_undefined():
+    assert np.isnan(StreamingAggregator().cost_margin_correlation())
+    constant = StreamingAggregator().consume(_chunks(np.ones(10), np.arange(10.0), 3))
+    assert np.isnan(constant.cost_margin_correlation())
+    all_missing = StreamingAggregator().consume(_chunks(np.full(4, np.nan), np.arange(4.0), 2))
+    assert np.isnan(all_missing.cost_margin_correlation())
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.topk import top_k, top_k_frame, pareto_count, HeavyHitters, sketch_heavy_hitters
+
+
+def _reference_order(values):
+    # What the insights functions did before: a full descending sort (NaN last, ties in position order)
+    return pd.Series(values, dtype=np.float64).sort_values(ascending=False, kind='stable').index.to_numpy()
+
+
+def _reference_pareto_count(values, pct):
+    values = pd.Series(values, dtype=np.float64).dropna()
+    cumulative = 100 * values.sort_values(ascending=False, kind='stable').cumsum() / values.sum()
+    return int((cumulative <= pct).sum())
+
+
+def _random_values(rng, n):
+    kind = rng.integers(0, 4)
+    if kind == 0:
+        values = rng.pareto(1.2, n) * 100
+    elif kind == 1:
+        # Few distinct values, so most positions are tied
+        values = rng.integers(0, 5, n).astype(np.float64)
+    elif kind == 2:
+        # Mostly profitable items with some losses
+        values = rng.normal(50, 80, n)
+    else:
+        values = rng.normal(-10, 30, n)
+    values[rng.random(n) < 0.05] = np.nan
+    return values
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        values = _random_values(rng, int(rng.integers(0, 300)))
+        k = int(rng.integers(0, len(values) + 3))
+        np.testing.assert_array_equal(top_k(values, k), _reference_order(values)[:k])
+
+
+def test_top_k_frame_keeps_index():
+    df = pd.DataFrame({'Gross Profit': [5.0, 9.0, 9.0, 1.0]}, index=list('abcd'))
+    assert top_k_frame(df, 'Gross Profit', 3).index.tolist() == ['b', 'c', 'a']
+
+
+@pytest.mark.parametrize("pct", [0, 10, 50, 80, 99.9, 100, 120])
+def test_pareto_count_matches_full_sort(pct):
+    rng = np.random.default_rng(1)
+    for _ in range(150):
+        values = _random_values(rng, int(rng.integers(0, 2000)))
+        assert pareto_count(values, pct) == _reference_pareto_count(values, pct)
+
+
+def test_pareto_count_edge_cases():
+    assert pareto_count([], 80) == 0
+    assert pareto_count([np.nan, np.nan], 80) == 0
+    # Every item is needed to reach 100%
+    assert pareto_count([1.0, 1.0, 1.0, 1.0], 100) == 4
+    # Ties straddling the cut-off
+    assert pareto_count([2.0, 2.0, 2.0, 2.0, 2.0], 40) == 2
+    # Losses pull the total below the sum of the profitable items
+    assert pareto_count([100.0, 50.0, -60.0, -40.0], 80) == _reference_pareto_count([100.0, 50.0, -60.0, -40.0], 80)
+    assert pareto_count([-5.0, -1.0, -3.0], 80) == _reference_pareto_count([-5.0, -1.0, -3.0], 80)
+
+
+def _stream(keys, chunk_size):
+    for start in range(0, len(keys), chunk_size):
+        yield pd.DataFrame({'Key': keys[start:start + chunk_size], 'Weight': 1.0})
+
+
+@pytest.mark.parametrize("capacity", [5, 20, 100])
+def test_heavy_hitters_keeps_every_frequent_item(capacity):
+    rng = np.random.default_rng(2)
+    keys = np.minimum(rng.zipf(1.3, 20_000), 1_000)
+    counts = pd.Series(keys).value_counts()
+
+    sketch = sketch_heavy_hitters(_stream(keys, 1_000), keys=('Key',), weight='Weight', capacity=capacity)
+
+    n = len(keys)
+    # Misra-Gries: every item with frequency above n / (capacity + 1) survives
+    frequent = counts[counts > n / (capacity + 1)]
+    assert set(frequent.index) <= set(sketch.counts.index)
+    assert len(sketch.counts) <= capacity
+    assert sketch.error_bound <= n / (capacity + 1)
+    # Estimates are lower bounds within error_bound of the true count
+    true = counts.reindex(sketch.counts.index).to_numpy()
+    assert (sketch.counts.to_numpy() <= true).all()
+    assert (true - sketch.counts.to_numpy() <= sketch.error_bound + 1e-9).all()
+
+
+def test_heavy_hitters_merge_keeps_the_guarantee():
+    rng = np.random.default_rng(3)
+    keys = np.minimum(rng.zipf(1.5, 10_000), 500)
+    left = HeavyHitters(10).update(keys[:4_000], np.ones(4_000))
+    right = HeavyHitters(10).update(keys[4_000:], np.ones(6_000))
+
+    merged = left.merge(right)
+
+    counts = pd.Series(keys).value_counts()
+    assert set(counts[counts > len(keys) / 11].index) <= set(merged.counts.index)
+    assert merged.total_weight == len(keys)
+    assert merged.error_bound <= len(keys) / 11
+
+
+def test_heavy_hitters_is_exact_below_capacity():
+    keys = np.array(['a', 'b', 'a', 'c', 'a', 'b'])
+    weights = np.array([3.0, 2.0, 1.0, 5.0, -4.0, 1.0])
+
+    sketch = HeavyHitters(10).update(keys, weights)
+
+    top = sketch.top(3)
+    assert top['Key'].tolist() == ['c', 'a', 'b']
+    # Negative weights are not counted
+    assert top['Estimate'].tolist() == [5.0, 4.0, 3.0]
+    assert sketch.error_bound == 0
+    assert sketch.pareto_count(50) == _reference_pareto_count([5.0, 4.0, 3.0], 50)